@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Time autosave writes of large notes: PATCH (a one-character delta) against
+PUT (the whole body), and the revision diff (make_delta) on its own.
+
+Each save also keeps the replaced version as a revision (src/revisions.py);
+PATCH builds that revision from the client's delta, PUT by diffing bodies.
+
+Usage: python benchmarks/autosave.py [--sizes 5000,56000,560000] [--edits 30]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='5000,56000,560000', help='note sizes in characters')
+    parser.add_argument('--edits', type=int, default=30, help='saves timed per size and method')
+    return parser.parse_args(argv)
+
+
+def note_text(size):
+    sentences = (f'Sentence number {i} with a few more words. ' for i in range(size // 20 + 1))
+    return ''.join(sentences)[:size]
+
+
+def median_ms(timings):
+    return statistics.median(timings) * 1000
+
+
+def run(args):
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'autosave.db')}"
+    os.environ.setdefault('EMBEDDINGS', '0')
+
+    try:
+        from src.delta import make_delta
+        from src.main import app
+
+        client = app.test_client()
+        results = {}
+        for size in (int(s) for s in args.sizes.split(',')):
+            text = note_text(size)
+            note = client.post('/api/notes', json={'title': f'{size} chars', 'content': text}).get_json()
+            url = f"/api/notes/{note['id']}"
+
+            diff, patch, put = [], [], []
+            for _ in range(args.edits):
+                position = len(text) // 2
+                edited = text[:position] + 'x' + text[position:]
+                start = time.perf_counter()
+                make_delta(edited, text)
+                diff.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                response = client.patch(url, json={'base_version': note['version'],
+                                                   'content_delta': [{'retain': position}, {'insert': 'x'}]})
+                patch.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.get_json()
+                note['version'], text = response.get_json()['version'], edited
+
+            for _ in range(args.edits):
+                text += 'y'
+                start = time.perf_counter()
+                response = client.put(url, json={'content': text})
+                put.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.get_json()
+
+            results[size] = {'make_delta': median_ms(diff), 'patch': median_ms(patch), 'put': median_ms(put)}
+
+        print(f"{'note size':>12}{'make_delta':>14}{'PATCH':>12}{'PUT':>12}")
+        for size, timing in results.items():
+            print(f"{size:>12,}{timing['make_delta']:>12.2f}ms{timing['patch']:>10.2f}ms{timing['put']:>10.2f}ms")
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Load benchmark: drive the API at a given concurrency and report latency
+percentiles and throughput per scenario.
+
+By default everything runs locally and offline: a fresh SQLite database is
+seeded, the app is served on a threaded local server and LLM calls go to
+benchmarks/mock_llm.py. Use --database-url for Postgres (or an existing
+SQLite file), --url to hit an already running deployment instead of the
+in-process server, and --llm-endpoint for a real model.
+
+Usage: python benchmarks/load.py [--notes 10000] [--concurrency 8] [--requests 500]
+                                 [--scenarios list,get,search,create,update,generate,generate_batch,translate]
+                                 [--llm-latency 0.3] [--json results.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.seed import TAGS, WORDS, sentence
+
+SCENARIOS = ('list', 'get', 'search', 'create', 'update', 'generate', 'generate_batch', 'translate')
+LLM_SCENARIOS = ('generate', 'generate_batch', 'translate')
+BATCH_GENERATE_SIZE = 20
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(name, latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+    return {
+        'scenario': name,
+        'requests': total,
+        'errors': errors,
+        'rps': total / elapsed if elapsed else 0.0,
+        'mean_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50_ms': 1000 * percentile(latencies, 50),
+        'p95_ms': 1000 * percentile(latencies, 95),
+        'p99_ms': 1000 * percentile(latencies, 99),
+    }
+
+
+def make_request(scenario, rng, note_ids):
+    """(method, path, json body) for one request of a scenario"""
+    if scenario == 'list':
+        return 'GET', '/api/notes?limit=20', None
+    if scenario == 'get':
+        return 'GET', f'/api/notes/{rng.choice(note_ids)}', None
+    if scenario == 'search':
+        return 'GET', f'/api/notes/search?q={rng.choice(WORDS)}&limit=20', None
+    if scenario == 'create':
+        return 'POST', '/api/notes', {'title': sentence(rng, 3), 'content': sentence(rng, 40),
+                                      'tags': rng.sample(TAGS, 2)}
+    if scenario == 'update':
+        return 'PUT', f'/api/notes/{rng.choice(note_ids)}', {'content': sentence(rng, 40)}
+    if scenario == 'generate':
+        return 'POST', '/api/notes/generate', {'text': sentence(rng, 12), 'language': 'English'}
+    if scenario == 'generate_batch':
+        return 'POST', '/api/notes/generate/batch', {
+            'texts': [sentence(rng, 12) for _ in range(BATCH_GENERATE_SIZE)], 'language': 'English'}
+    if scenario == 'translate':
+        return 'POST', f'/api/notes/{rng.choice(note_ids)}/translate', {'target_language': 'French'}
+    raise ValueError(f'unknown scenario {scenario!r}')
+
+
+def run_scenario(base_url, scenario, note_ids, concurrency, requests_count, duration, seed=0):
+    """Run one scenario with `concurrency` workers until `requests_count`
+    requests have been sent (or `duration` seconds passed, if given)"""
+    import requests
+
+    local = threading.local()
+    counter = iter(range(10 ** 12))
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker(index):
+        local.session = requests.Session()  # keep-alive per worker
+        rng = random.Random(seed * 1000 + index)
+        while True:
+            with lock:
+                sent = next(counter)
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            elif sent >= requests_count:
+                return
+            method, path, body = make_request(scenario, rng, note_ids)
+            start = time.perf_counter()
+            try:
+                response = local.session.request(method, base_url + path, json=body, timeout=120)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return summarize(scenario, latencies, errors[0], time.perf_counter() - start)
+
+
+def serve_app(app):
+    """Serve the app on a threaded local HTTP server; returns (server, base_url)"""
+    import logging
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no per-request access log
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def print_report(results, header):
+    print(header)
+    print(f"{'scenario':<14} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"{r['scenario']:<14} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+
+def run(args):
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # Configure the app (and src.llm) before it is imported
+    mock = None
+    if any(s in LLM_SCENARIOS for s in scenarios) and not args.llm_endpoint:
+        from benchmarks.mock_llm import start_mock_server
+        mock, args.llm_endpoint = start_mock_server(latency=args.llm_latency, jitter=args.llm_jitter)
+        os.environ.setdefault('GITHUB_TOKEN', 'mock-token')
+    if args.llm_endpoint:
+        os.environ['LLM_ENDPOINT'] = args.llm_endpoint
+    os.environ['LLM_CACHE'] = '1' if args.llm_cache else '0'
+    os.environ.setdefault('JOB_WORKERS', '0')
+    os.environ.setdefault('METRICS', '0')
+    tmp = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    elif not args.url:
+        tmp = tempfile.mkdtemp(prefix='notes-bench-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+    server = None
+    note_ids = []
+    results = []
+    try:
+        if not args.url or args.database_url:
+            from sqlalchemy import func, select
+            from src.app import create_app
+            from src.models.note import Note, db
+            from benchmarks.seed import seed_notes
+
+            app = create_app()
+            with app.app_context():
+                existing = db.session.scalar(select(func.count()).select_from(Note))
+                if existing < args.notes:
+                    print(f'seeding {args.notes - existing} notes...')
+                    rate = seed_notes(db.session, Note, args.notes - existing, seed=args.seed, progress=True)
+                    print(f'seeded at {rate:.0f} notes/s')
+                note_ids = db.session.scalars(select(Note.id).order_by(Note.id).limit(args.id_sample)).all()
+            if not args.url:
+                server, args.url = serve_app(app)
+        if not note_ids:
+            import requests
+            note_ids = [note['id'] for note in requests.get(args.url + '/api/notes?limit=100').json()['notes']]
+
+        for scenario in scenarios:
+            result = run_scenario(args.url.rstrip('/'), scenario, note_ids, args.concurrency,
+                                  args.requests, args.duration, seed=args.seed)
+            results.append(result)
+    finally:
+        if server is not None:
+            server.shutdown()
+        if mock is not None:
+            mock.shutdown()
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    print_report(results, f'{args.url} | concurrency {args.concurrency} | '
+                          f'{len(note_ids)} sampled note ids | llm latency {args.llm_latency}s')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=10000, help='corpus size to seed (1k-1M)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--duration', type=float, default=0, help='seconds per scenario (overrides --requests)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--database-url', help='database to seed and serve (default: a fresh SQLite file)')
+    parser.add_argument('--url', help='benchmark an already running server instead')
+    parser.add_argument('--llm-endpoint', help='OpenAI-compatible endpoint (default: the offline mock)')
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='mock LLM latency in seconds')
+    parser.add_argument('--llm-jitter', type=float, default=0.05)
+    parser.add_argument('--llm-cache', action='store_true', help='leave the LLM response cache on')
+    parser.add_argument('--id-sample', type=int, default=10000, help='note ids to draw get/update targets from')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the results to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
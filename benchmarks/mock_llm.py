@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Offline OpenAI-compatible chat completions server for benchmarks.
+
+Answers POST /chat/completions (optionally under /v1) after a configurable
+delay. Extraction prompts get a Title/Notes/Tags JSON object (an array of them
+for batched prompts), everything
+else an echo of the last user message; streaming requests are answered as
+Server-Sent Events. Point the app at it with
+LLM_ENDPOINT=http://127.0.0.1:<port>/v1 GITHUB_TOKEN=anything.
+
+Usage: python benchmarks/mock_llm.py [--port 8808] [--latency 0.5] [--jitter 0.1]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def note_for(text):
+    words = text.split()
+    return {
+        'Title': ' '.join(words[:4]) or 'Untitled',
+        'Notes': f'Notes about: {text}',
+        'Tags': [word.strip('.,!?').lower() for word in words[:3]],
+    }
+
+
+def reply_for(messages):
+    system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    user = messages[-1]['content'] if messages else ''
+    if 'Title' in system and 'Tags' in system:
+        if 'JSON array of inputs' in system:
+            return json.dumps([dict(note_for(item['text']), id=item['id']) for item in json.loads(user)])
+        return json.dumps(note_for(user))
+    if user.startswith('Translate the following text to '):
+        language, _, text = user[len('Translate the following text to '):].partition(': ')
+        return f'[{language}] {text}'
+    return f'echo: {user}'
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            fail = server.error_rate and random.random() < server.error_rate
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        if fail:
+            self._send_json(500, {'error': {'message': 'mock upstream failure'}})
+            return
+        content = reply_for(body.get('messages', []))
+        if body.get('stream'):
+            self._stream(body, content)
+            return
+        prompt = sum(estimate_tokens(m.get('content', '')) for m in body.get('messages', []))
+        self._send_json(200, {
+            'id': 'chatcmpl-mock', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model', 'mock'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt, 'completion_tokens': estimate_tokens(content),
+                      'total_tokens': prompt + estimate_tokens(content)},
+        })
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, body, content):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        words = content.split(' ')
+        for i, word in enumerate(words):
+            chunk = {
+                'id': 'chatcmpl-mock', 'object': 'chat.completion.chunk', 'created': 0,
+                'model': body.get('model', 'mock'),
+                'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word},
+                             'finish_reason': None}],
+            }
+            self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+            if self.server.stream_delay:
+                time.sleep(self.server.stream_delay)
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_server(latency=0.0, jitter=0.0, error_rate=0.0, stream_delay=0.0, host='127.0.0.1', port=0):
+    """Serve in a daemon thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), MockLLMHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.latency, server.jitter = latency, jitter
+    server.error_rate, server.stream_delay = error_rate, stream_delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}/v1'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8808)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds before answering')
+    parser.add_argument('--jitter', type=float, default=0.1, help='+/- seconds of random latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls answered with 500')
+    parser.add_argument('--stream-delay', type=float, default=0.01, help='seconds between streamed chunks')
+    args = parser.parse_args()
+
+    server, url = start_mock_server(args.latency, args.jitter, args.error_rate, args.stream_delay,
+                                    host=args.host, port=args.port)
+    print(f'Mock LLM listening on {url} (latency {args.latency}s ± {args.jitter}s)')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Per-user queries with and without the (user_id, ...) composite indexes.
+
+Seeds `--users` users owning `--notes-per-user` notes each, interleaved as if
+written over time, then times one user's list page, note count and changes
+feed. The same queries are then run again after dropping the user_id indexes,
+which is what every per-user query cost before notes had owners: a scan of
+the whole table.
+
+Search is left out: on SQLite a user's search still matches against every
+note in the FTS index and filters the hits by owner (see src.search), so the
+user_id indexes don't change its cost.
+
+Usage: python benchmarks/ownership.py [--users 1000] [--notes-per-user 1000] [--db PATH]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+USER_INDEXES = ('ix_note_user_id_updated_at_id', 'ix_note_user_id_change_seq')
+SEED_BATCH_SIZE = 20000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--notes-per-user', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=50, help='users sampled per scenario')
+    parser.add_argument('--db', help='SQLite file to use (reused if already seeded)')
+    return parser.parse_args(argv)
+
+
+def seed(session, users, notes_per_user, rng):
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from src.models.note import Note
+    from src.models.user import User
+    from benchmarks.seed import TAGS, WORDS
+
+    session.execute(insert(User), [{'id': u, 'username': f'user{u}', 'email': f'user{u}@example.com'}
+                                   for u in range(1, users + 1)])
+    start = datetime(2024, 1, 1)
+    total = users * notes_per_user
+    for offset in range(0, total, SEED_BATCH_SIZE):
+        rows = []
+        for i in range(offset, min(offset + SEED_BATCH_SIZE, total)):
+            words = [rng.choice(WORDS) for _ in range(8)]
+            rows.append({
+                'title': ' '.join(words[:3]).title(),
+                'content': ' '.join(words),
+                'tags': ','.join(rng.sample(TAGS, 2)),
+                'user_id': i % users + 1,
+                'created_at': start + timedelta(seconds=i),
+                'updated_at': start + timedelta(seconds=i),
+                'change_seq': i // SEED_BATCH_SIZE,
+            })
+        session.execute(insert(Note), rows)
+        session.commit()
+        print(f"  seeded {min(offset + SEED_BATCH_SIZE, total)}/{total}", end='\r', flush=True)
+    print()
+
+
+def scenarios(session):
+    from sqlalchemy import func, select
+    from src.models.note import Note
+    from src.pagination import paginate_notes
+    from src.sync import changes_since
+
+    return {
+        'list page (50)': lambda u: paginate_notes(session, Note, limit=50, where=[Note.user_id == u]),
+        'count': lambda u: session.execute(select(func.count()).where(Note.user_id == u)).scalar(),
+        'changes feed (500)': lambda u: changes_since(session, None, limit=500, user_id=u),
+    }
+
+
+def time_all(fns, user_ids):
+    timings = {}
+    for name, fn in fns.items():
+        fn(user_ids[0])  # warm up
+        start = time.perf_counter()
+        for user_id in user_ids:
+            fn(user_id)
+        timings[name] = (time.perf_counter() - start) / len(user_ids)
+    return timings
+
+
+def run(args):
+    tmp = None if args.db else tempfile.mkdtemp()
+    path = args.db or os.path.join(tmp, 'ownership.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ.setdefault('EMBEDDINGS', '0')
+    os.environ.setdefault('REVISIONS', '0')
+
+    try:
+        from sqlalchemy import func, select, text
+        from src.main import app
+        from src.models.note import Note, db
+
+        rng = random.Random(0)
+        with app.app_context():
+            if not db.session.execute(select(func.count()).select_from(Note)).scalar():
+                print(f"Seeding {args.users} users x {args.notes_per_user} notes into {path}")
+                seed(db.session, args.users, args.notes_per_user, rng)
+            users = db.session.execute(select(func.max(Note.user_id))).scalar()
+            sample = [rng.randint(1, users) for _ in range(args.queries)]
+
+            indexed = time_all(scenarios(db.session), sample)
+            for name in USER_INDEXES:
+                db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+            db.session.commit()
+            try:
+                scanned = time_all(scenarios(db.session), sample)
+            finally:
+                for index in Note.__table__.indexes:
+                    if index.name in USER_INDEXES:
+                        index.create(db.engine, checkfirst=True)
+            db.session.remove()
+
+        print(f"{'scenario':<22}{'indexed':>12}{'full scan':>12}{'speedup':>10}")
+        for name in indexed:
+            print(f"{name:<22}{indexed[name] * 1000:>10.2f}ms{scanned[name] * 1000:>10.2f}ms"
+                  f"{scanned[name] / indexed[name]:>9.1f}x")
+        return indexed, scanned
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(parse_args())
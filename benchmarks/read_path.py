@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Compare the ORM read path (Note objects + to_dict() + stdlib jsonify)
+with the Core read path (plain row tuples + the fast JSON provider).
+
+Usage: python benchmarks/read_path.py [--notes 20000] [--repeat 5]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ.setdefault('LLM_CACHE', '0')
+
+    try:
+        from flask.json.provider import DefaultJSONProvider
+        from sqlalchemy import select
+        from src.main import app
+        from src.models.note import Note, db
+        from src.fast_json import json_array_response
+
+        with app.app_context():
+            db.session.execute(Note.__table__.insert(), [
+                {'title': f'Note {i}', 'content': 'Lorem ipsum dolor sit amet. ' * 20}
+                for i in range(args.notes)
+            ])
+            db.session.commit()
+
+            def orm_path():
+                notes = Note.query.order_by(Note.updated_at.desc()).all()
+                body = DefaultJSONProvider(app).dumps([note.to_dict() for note in notes])
+                db.session.expunge_all()
+                return len(body)
+
+            def core_path():
+                rows = db.session.execute(select(*Note.read_columns()).order_by(Note.updated_at.desc()))
+                return len(json_array_response(Note.row_to_dict(row) for row in rows).get_data())
+
+            orm_time, orm_size = best_of(args.repeat, orm_path)
+            core_time, core_size = best_of(args.repeat, core_path)
+
+        print(f"notes: {args.notes}")
+        print(f"ORM + to_dict + stdlib json: {orm_time * 1000:8.1f} ms  ({orm_size} bytes)")
+        print(f"Core rows + fast encoder:    {core_time * 1000:8.1f} ms  ({core_size} bytes)")
+        print(f"speedup: {orm_time / core_time:.1f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Seed a database with a synthetic, reproducible note corpus.
+
+Targets DATABASE_URL (SQLite file or Postgres) like the app does.
+
+Usage: DATABASE_URL=... python benchmarks/seed.py --notes 100000 [--no-tags]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = (
+    'meeting project budget review design launch customer feedback sprint roadmap '
+    'invoice travel flight hotel badminton gym recipe dinner groceries doctor '
+    'dentist birthday gift reading book chapter lecture exam homework deadline '
+    'release bug fix deploy server database cache latency metrics report summary '
+    'quarterly planning hiring interview onboarding vacation weekend garden repair'
+).split()
+TAGS = ('work', 'personal', 'ideas', 'todo', 'travel', 'health', 'finance', 'study', 'family', 'urgent')
+SEED_BATCH_SIZE = 5000
+
+
+def sentence(rng, words=12):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def synthetic_note(rng, tags=True):
+    return {
+        'title': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title(),
+        'content': ' '.join(sentence(rng, rng.randint(6, 18)) for _ in range(rng.randint(2, 12))),
+        'tags': ','.join(rng.sample(TAGS, rng.randint(0, 3))) if tags else None,
+    }
+
+
+def seed_notes(session, model, count, tags=True, seed=0, batch_size=SEED_BATCH_SIZE, progress=False):
+    """Insert `count` synthetic notes in batches; returns notes per second.
+
+    Rows go in through Core executemany (search-index triggers still fire);
+    tags are linked afterwards by the comma-tags migration."""
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from src.tags import migrate_comma_tags
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    for offset in range(0, count, batch_size):
+        rows = []
+        for i in range(offset, min(count, offset + batch_size)):
+            stamp = now - timedelta(seconds=count - i)
+            rows.append(dict(synthetic_note(rng, tags), created_at=stamp, updated_at=stamp, change_seq=0))
+        session.execute(insert(model), rows)
+        session.commit()
+        if progress:
+            print(f'  {offset + len(rows)}/{count} notes', end='\r', flush=True)
+    if tags:
+        migrate_comma_tags(session, model)
+    if progress:
+        print()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-tags', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.setdefault('JOB_WORKERS', '0')
+    from src.app import create_app
+    from src.models.note import Note, db
+
+    app = create_app()
+    with app.app_context():
+        rate = seed_notes(db.session, Note, args.notes, tags=not args.no_tags, seed=args.seed, progress=True)
+    print(f'seeded {args.notes} notes into {app.config["SQLALCHEMY_DATABASE_URI"].split("@")[-1]} '
+          f'({rate:.0f} notes/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import gzip
+import os
+import sys
+import click
+from flask import Flask
+from flask_cors import CORS
+
+ROOT_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+STATIC_DIR = os.path.join(ROOT_DIR, 'src', 'static')
+
+
+def database_uri():
+    # 优先使用环境变量中的数据库 URL（Supabase）
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        # 修复 Supabase 使用 postgres:// 而 SQLAlchemy 需要 postgresql://
+        if url.startswith('postgres://'):
+            url = url.replace('postgres://', 'postgresql://', 1)
+        return url
+    if os.environ.get('VERCEL'):
+        # Serverless without a database: nothing on disk survives anyway
+        return 'sqlite:///:memory:'
+    # 本地开发使用 SQLite
+    db_path = os.path.join(ROOT_DIR, 'database', 'app.db')
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    return f"sqlite:///{db_path}"
+
+
+def create_app(config=None):
+    """Build the application. Shared by the local server (src/main.py) and
+    the Vercel function (api/index.py) so both serve the same routes.
+
+    Boot does as little as possible: the LLM stack is imported on the first
+    LLM request, and the schema upgrade only runs when the recorded schema
+    version is behind (see prepare_database).
+    """
+    from src.models.user import db
+    from src.routes.user import user_bp
+    from src.routes.note import note_bp
+    from src.routes.job import job_bp
+    from src.routes.tag import tag_bp
+    from src.routes.site import site_bp
+    from src.jobs import init_jobs
+    from src.schema import prepare_database
+    from src.engine import engine_options, init_engine
+    from src.metrics import init_metrics
+    from src.http_cache import init_compression
+    from src.fast_json import init_json
+
+    app = Flask(__name__, static_folder=STATIC_DIR)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    # Enable CORS for all routes
+    CORS(app)
+    init_json(app)
+    init_compression(app)
+
+    # register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(note_bp, url_prefix='/api')
+    app.register_blueprint(job_bp, url_prefix='/api')
+    app.register_blueprint(tag_bp, url_prefix='/api')
+    app.register_blueprint(site_bp)
+
+    db.init_app(app)
+    init_engine(app, db)
+    init_metrics(app, db)
+    with app.app_context():
+        prepare_database(app)
+    init_jobs(app)
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Run the full schema upgrade regardless of the recorded version."""
+        with app.app_context():
+            prepare_database(app, force=True)
+        print(f"Schema ready (search backend: {app.config['SEARCH_BACKEND']})")
+
+    @app.cli.command('embed-notes')
+    def embed_notes():
+        """Compute missing note embeddings (requests embed at most EMBED_REFRESH_LIMIT at a time)."""
+        from src.embeddings import backfill_embeddings
+        with app.app_context():
+            print(f"Embedded {backfill_embeddings(db.session)} notes")
+
+    @app.cli.command('compress-notes')
+    @click.option('--vacuum', is_flag=True, help='VACUUM afterwards to shrink the database file.')
+    def compress_notes(vacuum):
+        """Store existing large note bodies compressed (SQLite)."""
+        from src.schema import compress_note_bodies
+        with app.app_context():
+            print(f"Compressed {compress_note_bodies(db.session)} note bodies")
+            if vacuum and db.engine.dialect.name == 'sqlite':
+                with db.engine.connect() as conn:
+                    conn.exec_driver_sql('VACUUM')
+
+    @app.cli.command('export-notes')
+    @click.argument('path', default='-')
+    @click.option('--gzip', 'compress', is_flag=True, help='gzip the output (implied by a .gz path).')
+    def export_notes(path, compress):
+        """Write every note as NDJSON to PATH (default: stdout)."""
+        from src.transfer import gzip_chunks, iter_export
+        compress = compress or path.endswith('.gz')
+        with app.app_context():
+            out = sys.stdout.buffer if path == '-' else open(path, 'wb')
+            try:
+                chunks = iter_export(db.session)
+                for chunk in (gzip_chunks(chunks) if compress else chunks):
+                    out.write(chunk)
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+
+    @app.cli.command('import-notes')
+    @click.argument('path', default='-')
+    @click.option('--keep-ids', is_flag=True, help='Keep exported note ids (target must not have them).')
+    @click.option('--batch-size', type=int, default=1000, show_default=True)
+    def import_notes(path, keep_ids, batch_size):
+        """Insert notes from an NDJSON export at PATH (.gz is decompressed)."""
+        from src.transfer import TransferError, import_notes as run_import
+        source = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        if path.endswith('.gz'):
+            source = gzip.GzipFile(fileobj=source, mode='rb')
+        with app.app_context():
+            try:
+                stats = run_import(db.session, source, batch_size=batch_size, keep_ids=keep_ids)
+            except TransferError as e:
+                raise click.ClickException(f"{e} ({e.stats['imported']} notes imported before the error)")
+            finally:
+                source.close()
+        for error in stats['errors']:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        print(f"Imported {stats['imported']} notes, skipped {stats['skipped']} lines")
+
+    return app
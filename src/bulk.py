@@ -0,0 +1,174 @@
+from datetime import datetime
+from sqlalchemy import delete, insert, update
+from src.models.note import NoteTombstone
+from src.owners import owner_filter
+from src.sync import allocate_change_seq
+from src.tags import clear_note_tags
+from src.embeddings import clear_embeddings, invalidate_embeddings
+from src.revisions import clear_revisions, record_revisions
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+MAX_OPERATIONS = 50000
+TITLE_MAX_LENGTH = 200
+# Bind parameters per statement: SQLite's default limit since 3.32 (Postgres
+# allows 65535), so one multi-row INSERT carries this many values at most
+MAX_BIND_PARAMS = 32766
+
+
+class BulkError(ValueError):
+    pass
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def insert_returning_ids(session, model, rows):
+    """Insert `rows` (dicts with the same keys) with multi-row
+    INSERT ... VALUES ... RETURNING statements and return the new ids in row
+    order.
+
+    insert().returning(sort_by_parameter_order=True) would run one INSERT per
+    row on SQLite, which can't correlate RETURNING rows with parameter sets.
+    A single statement hands out auto-increment ids in VALUES order, so the
+    returned ids sorted ascending line up with the rows.
+    """
+    ids = []
+    if not rows:
+        return ids
+    for chunk in _chunks(rows, max(1, MAX_BIND_PARAMS // len(rows[0]))):
+        new_ids = session.execute(insert(model).values(chunk).returning(model.id)).scalars().all()
+        ids.extend(sorted(new_ids) if 'id' not in chunk[0] else [row['id'] for row in chunk])
+    return ids
+
+
+def _validate(op, seen_ids):
+    """Return (kind, values) for a well-formed operation or raise BulkError"""
+    if not isinstance(op, dict):
+        raise BulkError('Operation must be an object')
+    kind = op.get('op')
+    if kind not in ('create', 'update', 'delete'):
+        raise BulkError('op must be "create", "update" or "delete"')
+
+    values = {}
+    if kind != 'create':
+        note_id = op.get('id')
+        if not isinstance(note_id, int) or isinstance(note_id, bool):
+            raise BulkError('id is required')
+        if note_id in seen_ids:
+            raise BulkError(f'Note {note_id} appears more than once in this request')
+        seen_ids.add(note_id)
+        values['id'] = note_id
+
+    if kind == 'create' and ('title' not in op or 'content' not in op):
+        raise BulkError('Title and content are required')
+    if kind == 'update' and 'title' not in op and 'content' not in op:
+        raise BulkError('No data provided')
+    if kind != 'delete':
+        for field in ('title', 'content'):
+            if field in op:
+                if not isinstance(op[field], str):
+                    raise BulkError(f'{field} must be a string')
+                values[field] = op[field]
+        if len(values.get('title', '')) > TITLE_MAX_LENGTH:
+            raise BulkError(f'title is longer than {TITLE_MAX_LENGTH} characters')
+        if kind == 'create' and not values['title']:
+            raise BulkError('title must not be empty')
+    return kind, values
+
+
+def apply_bulk(session, model, operations, batch_size=DEFAULT_BATCH_SIZE, atomic=False, user_id=None):
+    """Validate and apply create/update/delete operations in one transaction.
+
+    Creates use multi-row INSERT ... RETURNING statements (see
+    insert_returning_ids), updates an executemany
+    UPDATE by primary key, deletes an IN (...) DELETE, each in batches of
+    `batch_size`. Invalid items are reported per index; with atomic=True any
+    invalid item aborts the whole request instead. Creates belong to
+    `user_id`, and updates/deletes may only target that user's notes (None:
+    unowned notes).
+    Returns a list of per-operation results in request order.
+    """
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    seen_ids = set()
+    for index, op in enumerate(operations):
+        try:
+            kind, values = _validate(op, seen_ids)
+        except BulkError as e:
+            results[index] = {'index': index, 'op': op.get('op') if isinstance(op, dict) else None,
+                              'status': 'error', 'error': str(e)}
+            continue
+        {'create': creates, 'update': updates, 'delete': deletes}[kind].append((index, values))
+
+    # Updates and deletes must target existing notes; check them with one query per batch
+    targets = [values['id'] for _, values in updates + deletes]
+    existing = {}  # id -> owner, recorded on tombstones
+    owner = owner_filter(model.user_id, user_id)
+    for batch in _chunks(targets, batch_size):
+        existing.update(session.query(model.id, model.user_id).filter(model.id.in_(batch), *owner))
+    for kind, pending in (('update', updates), ('delete', deletes)):
+        for index, values in pending:
+            if values['id'] in existing:
+                continue
+            results[index] = {'index': index, 'op': kind, 'id': values['id'],
+                              'status': 'error', 'error': 'Note not found'}
+    updates = [(i, v) for i, v in updates if v['id'] in existing]
+    deletes = [(i, v) for i, v in deletes if v['id'] in existing]
+
+    if atomic and any(r is not None for r in results):
+        error = BulkError('One or more operations are invalid')
+        error.results = [r for r in results if r is not None]
+        raise error
+
+    now = datetime.utcnow()
+    # Core statements bypass the flush hook, so stamp the sync sequence here
+    seq = allocate_change_seq(session) if creates or updates or deletes else None
+    for batch in _chunks(creates, batch_size):
+        rows = [dict(values, created_at=now, updated_at=now, change_seq=seq, user_id=user_id) for _, values in batch]
+        ids = insert_returning_ids(session, model, rows)
+        for (index, _), note_id in zip(batch, ids):
+            results[index] = {'index': index, 'op': 'create', 'id': note_id, 'status': 'ok'}
+
+    # The versions being replaced are kept as revisions
+    previous = {}
+    for batch in _chunks([values['id'] for _, values in updates], batch_size):
+        previous.update((row.id, row) for row in session.query(
+            model.id, model.title, model.content, model.updated_at).filter(model.id.in_(batch)))
+    record_revisions(session, [{
+        'note_id': values['id'], 'title': previous[values['id']].title,
+        'content': previous[values['id']].content, 'updated_at': previous[values['id']].updated_at,
+        'new_title': values.get('title', previous[values['id']].title),
+        'new_content': values.get('content', previous[values['id']].content)
+    } for _, values in updates], reason='bulk')
+
+    # Group updates by the columns they touch so each executemany has one shape
+    shapes = {}
+    for index, values in updates:
+        shapes.setdefault(tuple(sorted(values)), []).append((index, values))
+    for group in shapes.values():
+        for batch in _chunks(group, batch_size):
+            session.execute(update(model), [dict(values, updated_at=now, change_seq=seq) for _, values in batch])
+            invalidate_embeddings(session, [values['id'] for _, values in batch])
+            for index, values in batch:
+                results[index] = {'index': index, 'op': 'update', 'id': values['id'], 'status': 'ok'}
+
+    for batch in _chunks(deletes, batch_size):
+        session.execute(insert(NoteTombstone), [
+            {'note_id': values['id'], 'user_id': existing[values['id']], 'change_seq': seq, 'deleted_at': now}
+            for _, values in batch
+        ])
+        clear_note_tags(session, [values['id'] for _, values in batch])
+        clear_embeddings(session, [values['id'] for _, values in batch])
+        clear_revisions(session, [values['id'] for _, values in batch])
+        session.execute(
+            delete(model).where(model.id.in_([values['id'] for _, values in batch])),
+            execution_options={'synchronize_session': False}
+        )
+        for index, values in batch:
+            results[index] = {'index': index, 'op': 'delete', 'id': values['id'], 'status': 'ok'}
+
+    session.commit()
+    return results
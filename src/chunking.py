@@ -0,0 +1,104 @@
+import re
+
+# Rough tokenizer-free estimate: CJK characters are about a token each,
+# other text about four characters per token
+CJK = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]')
+
+BLANK_LINE = re.compile(r'(\n[ \t]*\n\s*)')
+LINE_BREAK = re.compile(r'(\n)')
+SENTENCE_END = re.compile(r'((?<=[.!?;:])\s+|(?<=[。！？；])\s*)')
+
+
+def estimate_tokens(text):
+    cjk = len(CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _pieces(text, pattern):
+    """Split into [(body, separator)] keeping every separator verbatim"""
+    parts = pattern.split(text)
+    return [(parts[i], parts[i + 1] if i + 1 < len(parts) else '') for i in range(0, len(parts), 2)]
+
+
+def _blocks(text):
+    """Blank-line separated blocks, never splitting inside a ``` fence"""
+    blocks = []
+    body, fence_open = '', False
+    for piece, separator in _pieces(text, BLANK_LINE):
+        body += piece
+        if piece.count('```') % 2:
+            fence_open = not fence_open
+        if fence_open and separator:
+            body += separator
+            continue
+        blocks.append((body, separator))
+        body = ''
+    if body:
+        blocks.append((body, ''))
+    return blocks
+
+
+def _hard_split(text, max_tokens):
+    size = max(1, max_tokens * (1 if CJK.search(text) else 4))
+    return [(text[i:i + size], '') for i in range(0, len(text), size)]
+
+
+def _units(body, max_tokens, level):
+    """Break one oversized piece with the next finer splitter"""
+    if level == 0:
+        units = _pieces(body, LINE_BREAK)
+    elif level == 1:
+        units = _pieces(body, SENTENCE_END)
+    else:
+        return _hard_split(body, max_tokens)
+    if len(units) == 1:
+        return _units(body, max_tokens, level + 1)
+    return units
+
+
+def _pack(units, max_tokens, level):
+    """Greedily join consecutive (body, separator) units up to max_tokens"""
+    chunks = []
+    body, separator, tokens = '', '', 0
+    for unit, unit_separator in units:
+        unit_tokens = estimate_tokens(unit)
+        if unit_tokens > max_tokens and level < 3:
+            if body:
+                chunks.append((body, separator))
+                body, separator, tokens = '', '', 0
+            finer = _pack(_units(unit, max_tokens, level), max_tokens, level + 1)
+            last_body, last_separator = finer[-1]
+            chunks.extend(finer[:-1])
+            chunks.append((last_body, last_separator + unit_separator))
+            continue
+        if body and tokens + unit_tokens > max_tokens:
+            chunks.append((body, separator))
+            body, separator, tokens = '', '', 0
+        body += separator + unit if body else unit
+        separator = unit_separator
+        tokens += unit_tokens
+    if body or not chunks:
+        chunks.append((body, separator))
+    return chunks
+
+
+def split_into_chunks(text, max_tokens):
+    """Split text into [(chunk, separator)] of at most ~max_tokens each.
+
+    Splits on blank lines first (keeping fenced code blocks whole), then on
+    line breaks, then on sentence ends, then anywhere. Joining every chunk
+    with its separator gives back the original text exactly, so translated
+    chunks reassemble with the original paragraph and line structure.
+    """
+    return _pack(_blocks(text), max_tokens, 0)
+
+
+def reassemble(chunks, translations):
+    """Join translated chunks, restoring each chunk's surrounding whitespace
+    (models tend to strip it) and the original separators"""
+    parts = []
+    for (chunk, separator), translated in zip(chunks, translations):
+        leading = chunk[:len(chunk) - len(chunk.lstrip())]
+        trailing = chunk[len(chunk.rstrip()):]
+        parts.append(leading + translated.strip() + trailing + separator if chunk.strip() else chunk + separator)
+    return ''.join(parts)
@@ -0,0 +1,152 @@
+# Text deltas for incremental note updates.
+#
+# A delta is a list of ops applied left to right against the base text:
+#   {"retain": n}  keep the next n characters
+#   {"delete": n}  drop the next n characters
+#   {"insert": s}  insert s at the cursor
+# Anything after the last op is kept. Lengths count UTF-16 code units, as
+# JavaScript's String.length does, so browser-computed offsets line up even
+# around emoji and other characters outside the BMP.
+
+MAX_DELTA_OPS = 1000
+
+
+class DeltaError(ValueError):
+    pass
+
+
+def _utf16(text):
+    # surrogatepass: an insert may carry half of a pair whose other half is
+    # retained; the result is checked when the joined text is decoded
+    return text.encode('utf-16-le', 'surrogatepass')
+
+
+def _is_high_surrogate(unit):
+    return 0xD8 <= unit[1] <= 0xDB
+
+
+def _is_low_surrogate(unit):
+    return 0xDC <= unit[1] <= 0xDF
+
+
+def apply_delta(text, ops):
+    """Apply a delta to `text` and return the new text; raises DeltaError"""
+    if not isinstance(ops, list):
+        raise DeltaError('content_delta must be a list of ops')
+    if len(ops) > MAX_DELTA_OPS:
+        raise DeltaError(f'At most {MAX_DELTA_OPS} ops per delta')
+
+    source = _utf16(text)
+    parts = []
+    cursor = 0  # in bytes: two per UTF-16 code unit
+    for op in ops:
+        if not isinstance(op, dict) or len(op) != 1:
+            raise DeltaError('Each op must have exactly one of retain, delete or insert')
+        kind, value = next(iter(op.items()))
+        if kind == 'insert':
+            if not isinstance(value, str):
+                raise DeltaError('insert must be a string')
+            parts.append(_utf16(value))
+            continue
+        if kind not in ('retain', 'delete') or not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise DeltaError(f'{kind} must be a non-negative integer')
+        end = cursor + 2 * value
+        if end > len(source):
+            raise DeltaError(f'{kind} runs past the end of the base text')
+        if kind == 'retain':
+            parts.append(source[cursor:end])
+        cursor = end
+    parts.append(source[cursor:])
+    try:
+        return b''.join(parts).decode('utf-16-le')
+    except UnicodeDecodeError:
+        raise DeltaError('Delta splits a surrogate pair')
+
+
+def _common_prefix(a, b):
+    """Length of the common prefix of two bytes objects.
+
+    Compares slices (memcmp) rather than stepping byte by byte: doubling
+    blocks find the first difference, then a binary search within that
+    block pins it down, so a large note costs a few C-level comparisons.
+    """
+    limit = min(len(a), len(b))
+    lo, step = 0, 256
+    while True:
+        if lo >= limit:
+            return limit
+        hi = min(lo + step, limit)
+        if a[lo:hi] != b[lo:hi]:
+            break
+        lo, step = hi, step * 2
+    # a[:lo] == b[:lo] and a[:hi] != b[:hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _common_suffix(a, b, limit):
+    """Length (at most `limit`) of the common suffix of two bytes objects"""
+    end_a, end_b = len(a), len(b)
+    lo, step = 0, 256
+    while True:
+        if lo >= limit:
+            return limit
+        hi = min(lo + step, limit)
+        if a[end_a - hi:end_a - lo] != b[end_b - hi:end_b - lo]:
+            break
+        lo, step = hi, step * 2
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[end_a - mid:end_a - lo] == b[end_b - mid:end_b - lo]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def make_delta(old, new):
+    """Smallest single-edit delta turning `old` into `new` (common prefix and
+    suffix kept); mirrors the browser's autosave diff"""
+    a, b = _utf16(old), _utf16(new)
+    prefix = _common_prefix(a, b) & ~1  # whole code units only
+    if prefix and _is_high_surrogate(a[prefix - 2:prefix]):
+        prefix -= 2  # don't split a surrogate pair
+    suffix = _common_suffix(a, b, min(len(a), len(b)) - prefix) & ~1
+    if suffix and _is_low_surrogate(a[len(a) - suffix:len(a) - suffix + 2]):
+        suffix -= 2
+    ops = []
+    if prefix:
+        ops.append({'retain': prefix // 2})
+    deleted = len(a) - prefix - suffix
+    if deleted:
+        ops.append({'delete': deleted // 2})
+    inserted = b[prefix:len(b) - suffix]
+    if inserted:
+        ops.append({'insert': inserted.decode('utf-16-le')})
+    return ops
+
+
+def invert_delta(text, ops):
+    """Delta undoing `ops`: applied to apply_delta(text, ops) it gives `text`
+    back. `ops` must already have been applied successfully to `text`."""
+    source = _utf16(text)
+    inverse = []
+    cursor = 0
+    for op in ops:
+        kind, value = next(iter(op.items()))
+        if kind == 'retain':
+            inverse.append(op)
+            cursor += 2 * value
+        elif kind == 'delete':
+            end = cursor + 2 * value
+            # May hold half of a surrogate pair; apply_delta rejoins it
+            inverse.append({'insert': source[cursor:end].decode('utf-16-le', 'surrogatepass')})
+            cursor = end
+        elif value:
+            inverse.append({'delete': len(_utf16(value)) // 2})
+    return inverse
@@ -0,0 +1,551 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, insert, or_, select, update
+from src.jobs import register
+from src.models.embedding import NoteEmbedding
+from src.owners import ALL_USERS, owner_filter
+from src.models.job import Job
+from src.models.note import Note, NoteTombstone, db
+from src.sync import current_seq
+
+try:
+    import numpy as np
+except ImportError:  # degraded mode: a pure-Python scan, far too slow for large collections
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = int(os.environ.get('EMBEDDING_DIM', 256))
+EMBED_MAX_CHARS = 8000
+EMBED_BATCH_SIZE = 256
+# Without background job workers, notes a single index refresh embeds
+# inline; a larger backlog is worked off over later requests (or ahead of
+# time with `flask embed-notes`)
+EMBED_REFRESH_LIMIT = int(os.environ.get('EMBED_REFRESH_LIMIT', 500))
+# After the backend fails, wait this long before embedding again
+EMBED_RETRY_SECONDS = int(os.environ.get('EMBED_RETRY_SECONDS', 60))
+EMBED_JOB = 'embed_notes'
+DEFAULT_TOP_K = 10
+MAX_TOP_K = 100
+
+WORD = re.compile(r'[a-z0-9]+')
+CJK = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]+')
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has have i in is it its of on or that the this to was '
+    'were will with you your we our my me'.split()
+)
+
+
+# ============================== Backends ==============================
+
+class HashingEmbedder:
+    """Offline embedder: hashed word unigrams/bigrams and CJK character
+    bigrams, log-scaled term frequency, signed feature hashing, L2-normalized.
+    Deterministic and dependency-free, so vectors survive restarts."""
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.key = f'hashing-{dim}'
+
+    def features(self, text):
+        text = text.lower()
+        words = [w for w in WORD.findall(text) if w not in STOP_WORDS]
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1.0
+        for first, second in zip(words, words[1:]):
+            bigram = first + ' ' + second
+            counts[bigram] = counts.get(bigram, 0) + 0.5
+        for run in CJK.findall(text):
+            for gram in (run[i:i + 2] for i in range(max(1, len(run) - 1))):
+                counts[gram] = counts.get(gram, 0) + 1.0
+        return counts
+
+    def embed_one(self, text):
+        vector = [0.0] * self.dim
+        for feature, count in self.features(text).items():
+            h = zlib.crc32(feature.encode('utf-8'))
+            vector[h % self.dim] += (1.0 + math.log(count)) * (1 if h & 0x80000000 else -1)
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed(self, texts):
+        return [self.embed_one(text) for text in texts]
+
+
+class RemoteEmbedder:
+    """Embeddings API of the configured LLM endpoint (OpenAI-compatible)"""
+
+    def __init__(self, model, dim=EMBEDDING_DIM):
+        self.model = model
+        self.dim = dim
+        self.key = f'remote:{model}-{dim}'
+
+    def embed(self, texts):
+        import src.llm as llm
+        response = llm.client_manager.embeddings(
+            llm.endpoint, llm.token, model=self.model, input=list(texts), dimensions=self.dim)
+        return [normalize(item.embedding) for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def normalize(vector):
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else list(vector)
+
+
+def get_embedder():
+    """EMBEDDING_BACKEND=hashing (default, offline) or remote (EMBEDDING_MODEL)"""
+    backend = os.environ.get('EMBEDDING_BACKEND', 'hashing').lower()
+    if backend == 'remote':
+        return RemoteEmbedder(os.environ.get('EMBEDDING_MODEL', 'openai/text-embedding-3-small'))
+    return HashingEmbedder()
+
+
+def embeddings_enabled():
+    return os.environ.get('EMBEDDINGS', '1').lower() not in ('0', 'false', 'off')
+
+
+def pack(vector):
+    return array('f', vector).tobytes()
+
+
+def unpack(blob):
+    vector = array('f')
+    vector.frombytes(blob)
+    return vector
+
+
+# ============================== Persistence ==============================
+
+def note_text(title, content):
+    return f'{title}\n{content}'[:EMBED_MAX_CHARS]
+
+
+def _hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def embed_note_ids(session, note_ids, embedder=None, raise_errors=False):
+    """(Re)compute the stored embeddings of the given notes, skipping notes
+    whose text is unchanged.
+
+    A backend failure is logged and leaves the notes without a new vector
+    (a later job or index refresh retries them) rather than raising, unless
+    `raise_errors` is set.
+    """
+    if not note_ids or not embeddings_enabled():
+        return 0
+    embedder = embedder or get_embedder()
+    note_ids = list(note_ids)
+    written = 0
+    for start in range(0, len(note_ids), EMBED_BATCH_SIZE):
+        batch = note_ids[start:start + EMBED_BATCH_SIZE]
+        current = dict(session.execute(
+            select(NoteEmbedding.note_id, NoteEmbedding.content_hash)
+            .where(NoteEmbedding.note_id.in_(batch), NoteEmbedding.backend == embedder.key)
+        ).all())
+        pending = []
+        for note_id, title, content in session.execute(
+                select(Note.id, Note.title, Note.content).where(Note.id.in_(batch))):
+            text = note_text(title, content)
+            digest = _hash(text)
+            if current.get(note_id) != digest:
+                pending.append((note_id, text, digest))
+        if not pending:
+            continue
+        try:
+            vectors = embedder.embed([text for _, text, _ in pending])
+        except Exception as e:
+            logger.warning('Embedding %d notes failed: %s', len(pending), e)
+            if raise_errors:
+                raise
+            continue
+        ids = [note_id for note_id, _, _ in pending]
+        session.execute(delete(NoteEmbedding).where(NoteEmbedding.note_id.in_(ids)))
+        session.execute(insert(NoteEmbedding), [
+            {'note_id': note_id, 'backend': embedder.key, 'vector': pack(vector), 'content_hash': digest}
+            for (note_id, _, digest), vector in zip(pending, vectors)
+        ])
+        written += len(pending)
+    return written
+
+
+def clear_embeddings(session, note_ids):
+    session.execute(delete(NoteEmbedding).where(NoteEmbedding.note_id.in_(note_ids)))
+
+
+def invalidate_embeddings(session, note_ids):
+    """Drop the vectors of notes whose title or content changed. Writes never
+    call the embedding backend: the embed_notes job queued by the write's
+    commit re-embeds these notes (see queue_embedding)."""
+    if note_ids and embeddings_enabled():
+        clear_embeddings(session, note_ids)
+
+
+def _missing(embedder):
+    embedded = (select(NoteEmbedding.note_id)
+                .where(NoteEmbedding.note_id == Note.id, NoteEmbedding.backend == embedder.key)
+                .exists())
+    return ~embedded
+
+
+def backfill_embeddings(session, embedder=None, raise_errors=False):
+    """Embed notes that have no vector from the current backend"""
+    embedder = embedder or get_embedder()
+    stmt = select(Note.id).where(_missing(embedder)).order_by(Note.id)
+    total, last_id = 0, 0
+    while True:
+        ids = session.scalars(stmt.where(Note.id > last_id).limit(EMBED_BATCH_SIZE)).all()
+        if not ids:
+            break
+        last_id = ids[-1]
+        total += embed_note_ids(session, ids, embedder, raise_errors)
+        session.commit()
+    return total
+
+
+# ============================== Embedding jobs ==============================
+
+def background_embedding():
+    """Whether this app has job workers to embed notes after writes"""
+    pool = current_app.extensions.get('job_pool') if has_app_context() else None
+    return pool is not None and pool.workers > 0
+
+
+def queue_embedding(session):
+    """Add an embed_notes job to the session's transaction unless one is
+    already waiting. A finished job's row is re-queued instead of adding a
+    row per write, so the queue holds at most a waiting and a running one.
+    Within EMBED_RETRY_SECONDS of a failed job nothing is queued, so a
+    broken backend isn't retried on every write."""
+    now = datetime.utcnow()
+    retry_after = now - timedelta(seconds=EMBED_RETRY_SECONDS)
+    jobs = session.execute(select(Job.id, Job.status, Job.updated_at).where(Job.kind == EMBED_JOB)).all()
+    if any(job.status == 'queued' or (job.status == 'failed' and job.updated_at > retry_after) for job in jobs):
+        return False
+    finished = [job.id for job in jobs if job.status in ('succeeded', 'failed')]
+    if finished:
+        session.execute(update(Job).where(Job.id == finished[0]).values(
+            status='queued', attempts=0, result=None, error=None, locked_until=None, run_after=now, updated_at=now))
+    else:
+        session.add(Job(kind=EMBED_JOB, payload='{}', run_after=now))
+    session.info['embedding_queued'] = True
+    return True
+
+
+@register(EMBED_JOB)
+def run_embed_notes(payload):
+    """Embed every note without a vector; a backend failure fails the attempt
+    so the job is retried with backoff"""
+    return {'embedded': backfill_embeddings(db.session, raise_errors=True)}
+
+
+@event.listens_for(db.session, 'before_commit')
+def _queue_embedding_on_write(session):
+    # change_seq is set once the transaction has written notes (see src.sync)
+    wrote_notes = (session.info.get('change_seq') is not None
+                   or any(isinstance(obj, Note) for obj in session.new)
+                   or any(isinstance(obj, Note) and session.is_modified(obj) for obj in session.dirty))
+    if wrote_notes and embeddings_enabled() and background_embedding():
+        queue_embedding(session)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_embedding_worker(session):
+    if session.info.pop('embedding_queued', False):
+        current_app.extensions['job_pool'].notify()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _drop_embedding_queued(session):
+    session.info.pop('embedding_queued', None)
+
+
+# ============================== In-memory index ==============================
+
+class VectorIndex:
+    """Unit vectors held in memory for brute-force cosine top-k.
+
+    With NumPy the vectors live in one float32 matrix (grown geometrically)
+    and a query is a single matrix-vector product plus argpartition; removal
+    swaps the last row into the hole, so rows stay dense.
+    """
+
+    def __init__(self, dim, use_numpy=None):
+        self.dim = dim
+        self.use_numpy = (np is not None) if use_numpy is None else use_numpy
+        if use_numpy is None and np is None:
+            logger.warning('NumPy is not installed; similarity search falls back to a slow pure-Python scan')
+        self.seq = None  # sync sequence the index reflects
+        self.backlog = False  # notes are still waiting to be embedded
+        self.lock = threading.Lock()
+        # Held by the one request embedding inline; never while holding `lock`
+        self.embed_lock = threading.Lock()
+        self.retry_at = 0.0  # time.monotonic() before which inline embedding is skipped
+        self._ids = []
+        self._rows = {}
+        if self.use_numpy:
+            self._matrix = np.zeros((1024, dim), dtype=np.float32)
+        else:
+            self._vectors = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, note_id):
+        return note_id in self._rows
+
+    def upsert(self, note_id, vector):
+        row = self._rows.get(note_id)
+        if row is None:
+            row = self._rows[note_id] = len(self._ids)
+            self._ids.append(note_id)
+            if self.use_numpy:
+                if row >= len(self._matrix):
+                    grown = np.zeros((len(self._matrix) * 2, self.dim), dtype=np.float32)
+                    grown[:row] = self._matrix[:row]
+                    self._matrix = grown
+            else:
+                self._vectors.append(None)
+        if self.use_numpy:
+            self._matrix[row] = np.frombuffer(vector, dtype=np.float32) if isinstance(vector, bytes) else vector
+        else:
+            self._vectors[row] = unpack(vector) if isinstance(vector, bytes) else array('f', vector)
+
+    def remove(self, note_id):
+        row = self._rows.pop(note_id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+            if self.use_numpy:
+                self._matrix[row] = self._matrix[last]
+            else:
+                self._vectors[row] = self._vectors[last]
+        self._ids.pop()
+        if not self.use_numpy:
+            self._vectors.pop()
+
+    def get(self, note_id):
+        row = self._rows.get(note_id)
+        if row is None:
+            return None
+        return self._matrix[row].copy() if self.use_numpy else self._vectors[row]
+
+    def search(self, vector, k=DEFAULT_TOP_K, exclude=None, among=None):
+        """[(note_id, score)] of the k most similar vectors, best first.
+        `among` limits the candidates to those note ids (only they are scored)."""
+        if among is None:
+            rows, ids = None, self._ids
+        else:
+            rows = [self._rows[i] for i in among if i in self._rows and i != exclude]
+            ids = [self._ids[row] for row in rows]
+        count = len(ids)
+        if not count:
+            return []
+        if self.use_numpy:
+            query = np.asarray(vector, dtype=np.float32)
+            scores = (self._matrix[:count] if rows is None else self._matrix[rows]) @ query
+            if rows is None and exclude is not None and exclude in self._rows:
+                scores[self._rows[exclude]] = -np.inf
+            k = min(k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(ids[i], float(scores[i])) for i in top if scores[i] > 0]
+        vectors = self._vectors if rows is None else [self._vectors[row] for row in rows]
+        scored = [
+            (sum(a * b for a, b in zip(stored, vector)), note_id)
+            for note_id, stored in zip(ids, vectors) if note_id != exclude
+        ]
+        scored.sort(reverse=True)
+        return [(note_id, score) for score, note_id in scored[:k] if score > 0]
+
+
+def _load_rows(index, rows):
+    for note_id, vector in rows:
+        index.upsert(note_id, vector)
+
+
+def _load_new_vectors(session, index, vectors):
+    """Load stored vectors of notes the index lacks: those an embed_notes job,
+    `flask embed-notes` or another process wrote since they went missing"""
+    ids = [note_id for note_id in session.scalars(vectors.with_only_columns(NoteEmbedding.note_id))
+           if note_id not in index]
+    for start in range(0, len(ids), EMBED_BATCH_SIZE):
+        batch = ids[start:start + EMBED_BATCH_SIZE]
+        _load_rows(index, session.execute(vectors.where(NoteEmbedding.note_id.in_(batch))))
+
+
+def _pending_ids(session, embedder, since=None):
+    """Ids of up to EMBED_REFRESH_LIMIT + 1 notes that have no vector (only
+    notes written after sync sequence `since`, if given)"""
+    stmt = select(Note.id).where(_missing(embedder))
+    if since is not None:
+        stmt = stmt.where(or_(Note.change_seq > since, Note.change_seq.is_(None)))
+    return session.scalars(stmt.order_by(Note.id).limit(EMBED_REFRESH_LIMIT + 1)).all()
+
+
+def _embed_inline(session, index, embedder, vectors, pending):
+    """Embed up to EMBED_REFRESH_LIMIT pending notes in this request (apps
+    without job workers) and load them into the index.
+
+    The backend is called without holding the index lock, by one request at
+    a time; the others serve what the index has. After a failure nobody
+    embeds inline for EMBED_RETRY_SECONDS.
+    """
+    if time.monotonic() < index.retry_at or not index.embed_lock.acquire(blocking=False):
+        return
+    try:
+        batch_ids = pending[:EMBED_REFRESH_LIMIT]
+        failed = False
+        for start in range(0, len(batch_ids), EMBED_BATCH_SIZE):
+            batch = batch_ids[start:start + EMBED_BATCH_SIZE]
+            try:
+                embed_note_ids(session, batch, embedder, raise_errors=True)
+                session.commit()
+            except Exception:
+                session.rollback()
+                index.retry_at = time.monotonic() + EMBED_RETRY_SECONDS
+                failed = True
+                break
+            rows = session.execute(vectors.where(NoteEmbedding.note_id.in_(batch))).all()
+            with index.lock:
+                _load_rows(index, rows)
+        if not failed and len(pending) <= EMBED_REFRESH_LIMIT:
+            with index.lock:
+                index.backlog = False
+    finally:
+        index.embed_lock.release()
+
+
+def get_index(session, embedder=None):
+    """The app's vector index, brought up to date with the database.
+
+    The first call loads every stored vector; later calls only read notes
+    written (and tombstones recorded) since the sync sequence the index last
+    saw, so writes from other processes show up. The index lock only
+    covers these database reads: the embedding backend is never called
+    while holding it.
+
+    Notes without a vector (new, rewritten, or never embedded) leave the
+    index with a backlog. With job workers the embed_notes job embeds them
+    (queued by the write, or here if none is waiting) and later refreshes
+    load the new vectors. Without workers (e.g. serverless) they are
+    embedded here, at most EMBED_REFRESH_LIMIT per call so no request
+    embeds the whole corpus; run `flask embed-notes` to embed a large
+    backlog ahead of time.
+    """
+    embedder = embedder or get_embedder()
+    index = current_app.extensions.get('embedding_index')
+    if index is None or index.dim != embedder.dim:
+        index = current_app.extensions['embedding_index'] = VectorIndex(embedder.dim)
+
+    seq = current_seq(session)
+    if index.seq is not None and seq <= index.seq and not index.backlog:
+        return index
+    vectors = (select(NoteEmbedding.note_id, NoteEmbedding.vector)
+               .where(NoteEmbedding.backend == embedder.key))
+    with index.lock:
+        if index.seq is not None and seq <= index.seq and not index.backlog:
+            return index
+        first_load = index.seq is None
+        if first_load:
+            _load_rows(index, session.execute(vectors.execution_options(yield_per=5000)))
+            since = None
+        else:
+            changed = or_(Note.change_seq > index.seq, Note.change_seq.is_(None))
+            loaded = set()
+            for note_id, vector in session.execute(
+                    vectors.join(Note, Note.id == NoteEmbedding.note_id).where(changed)):
+                index.upsert(note_id, vector)
+                loaded.add(note_id)
+            # Rewritten notes lost their vector (invalidate_embeddings) until re-embedded
+            for note_id in session.scalars(select(Note.id).where(changed)):
+                if note_id not in loaded:
+                    index.remove(note_id)
+            for note_id in session.scalars(
+                    select(NoteTombstone.note_id).where(NoteTombstone.change_seq > index.seq)):
+                index.remove(note_id)
+            if index.backlog:
+                _load_new_vectors(session, index, vectors)
+            since = None if index.backlog else index.seq
+        pending = _pending_ids(session, embedder, since)
+        index.backlog = bool(pending)
+        index.seq = seq
+
+    if index.backlog:
+        if background_embedding():
+            if queue_embedding(session):
+                session.commit()
+        else:
+            _embed_inline(session, index, embedder, vectors, pending)
+        if index.backlog and first_load:
+            logger.warning('Notes are still waiting for embeddings; run `flask embed-notes` to embed them all')
+    return index
+
+
+def _with_notes(session, hits):
+    """Attach note fields to [(note_id, score)], keeping the ranking"""
+    if not hits:
+        return []
+    rows = {row.id: row for row in session.execute(
+        select(*Note.read_columns()).where(Note.id.in_([note_id for note_id, _ in hits])))}
+    results = []
+    for note_id, score in hits:
+        if note_id in rows:
+            item = Note.row_to_dict(rows[note_id])
+            item['score'] = round(score, 4)
+            results.append(item)
+    return results
+
+
+def _owned_ids(session, user_id):
+    """Candidate ids for a user-scoped query (None: every note)"""
+    if user_id is ALL_USERS:
+        return None
+    return session.scalars(select(Note.id).where(*owner_filter(Note.user_id, user_id))).all()
+
+
+def related_notes(session, note_id, k=DEFAULT_TOP_K, user_id=ALL_USERS, index=None):
+    """Notes most similar to the given one; None if the note doesn't exist.
+    With `user_id`, the note must be that user's and only their notes are scored.
+    Pass `index` when the caller already refreshed it (see get_index)."""
+    embedder = get_embedder()
+    among = _owned_ids(session, user_id)
+    if among is not None and note_id not in among:
+        return None
+    if index is None:
+        index = get_index(session, embedder)
+    with index.lock:
+        vector = index.get(note_id)
+    if vector is None:
+        row = session.execute(select(Note.title, Note.content).where(Note.id == note_id)).first()
+        if row is None:
+            return None
+        vector = embedder.embed([note_text(row.title, row.content)])[0]
+    with index.lock:
+        hits = index.search(vector, k, exclude=note_id, among=among)
+    return _with_notes(session, hits)
+
+
+def semantic_search(session, query, k=DEFAULT_TOP_K, user_id=ALL_USERS, index=None):
+    embedder = get_embedder()
+    among = _owned_ids(session, user_id)
+    if index is None:
+        index = get_index(session, embedder)
+    vector = embedder.embed([query])[0]
+    with index.lock:
+        hits = index.search(vector, k, among=among)
+    return _with_notes(session, hits)
@@ -0,0 +1,113 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from src.models.types import decompress_text
+
+PROFILES = ('sqlite', 'postgres', 'pgbouncer')
+
+# Supabase's transaction pooler (Supavisor/pgbouncer) listens on 6543
+POOLER_PORTS = (6543,)
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def engine_profile(uri):
+    """Pick the engine profile: DB_PROFILE if set, otherwise from the URL"""
+    profile = os.environ.get('DB_PROFILE', '').strip().lower()
+    if profile:
+        if profile not in PROFILES:
+            raise ValueError(f"DB_PROFILE must be one of {', '.join(PROFILES)}, got {profile!r}")
+        return profile
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        return 'sqlite'
+    if url.port in POOLER_PORTS or 'pooler' in (url.host or ''):
+        return 'pgbouncer'
+    return 'postgres'
+
+
+def engine_options(uri, profile=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given database URL.
+
+    - sqlite: default pool; pragmas are applied per connection (see init_engine).
+    - postgres: a direct/session connection, so keep a real pool and recycle
+      connections before Supabase's idle timeout drops them.
+    - pgbouncer: a transaction pooler does the pooling. Serverless functions
+      hold no pool of their own (a frozen lambda would pin server slots) and
+      nothing relies on session state or server-side prepared statements.
+    """
+    profile = profile or engine_profile(uri)
+    url = make_url(uri)
+    if profile == 'sqlite':
+        return {'connect_args': {'timeout': _env_int('SQLITE_BUSY_TIMEOUT', 5000) / 1000}}
+
+    connect_args = {'connect_timeout': _env_int('DB_CONNECT_TIMEOUT', 10)}
+    options = {'pool_pre_ping': True, 'connect_args': connect_args}
+    if profile == 'pgbouncer':
+        if url.get_driver_name() == 'psycopg':
+            # psycopg 3 prepares repeated statements server-side; with transaction
+            # pooling the next statement may land on a backend that never saw it
+            connect_args['prepare_threshold'] = None
+        if os.environ.get('VERCEL') and not os.environ.get('DB_POOL_SIZE'):
+            options['poolclass'] = NullPool
+            return options
+        options['pool_size'] = _env_int('DB_POOL_SIZE', 2)
+        options['max_overflow'] = _env_int('DB_MAX_OVERFLOW', 3)
+        options['pool_recycle'] = _env_int('DB_POOL_RECYCLE', 300)
+    else:
+        options['pool_size'] = _env_int('DB_POOL_SIZE', 5)
+        options['max_overflow'] = _env_int('DB_MAX_OVERFLOW', 10)
+        options['pool_recycle'] = _env_int('DB_POOL_RECYCLE', 1800)
+    options['pool_timeout'] = _env_int('DB_POOL_TIMEOUT', 10)
+    return options
+
+
+def sqlite_pragmas():
+    return {
+        # Readers no longer block on the writer during autosave bursts
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        # Safe under WAL: a power loss can drop the last commits, never corrupt
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT', 5000),
+        'temp_store': 'MEMORY',
+    }
+
+
+def register_sqlite_functions(dbapi_connection):
+    """Register the SQL functions the schema calls on a sqlite3 connection.
+
+    note_text() returns the plain text of a possibly compressed body. The
+    app's engines get it on connect; it's needed to read compressed bodies in
+    SQL (list previews, LIKE search, indexing them for full-text search), not
+    to write notes, so other sqlite3 clients can do without it.
+    """
+    dbapi_connection.create_function('note_text', 1, decompress_text, deterministic=True)
+
+
+def _sqlite_connect_hook(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        register_sqlite_functions(dbapi_connection)
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def init_engine(app, db):
+    """Hook per-connection setup onto the app's engine; call after db.init_app"""
+    profile = engine_profile(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['DB_PROFILE'] = profile
+    with app.app_context():
+        # Functions follow the database, not the profile: the schema needs them
+        # on every SQLite connection. Pragmas are the sqlite profile's tuning.
+        if db.engine.dialect.name == 'sqlite':
+            pragmas = sqlite_pragmas() if profile == 'sqlite' else {}
+            event.listen(db.engine, 'connect', _sqlite_connect_hook(pragmas))
+    return profile
@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import os
+from datetime import timezone
+from flask import Response, request
+from src.owners import USER_HEADER
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is used when brotli isn't installed
+    brotli = None
+
+# Suffixes appended to a strong ETag for each content-coding of the same resource
+CODING_SUFFIXES = {'gzip': '-gz', 'br': '-br'}
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESSIBLE_TYPES = ('application/json',)
+
+
+def note_etag(note_id, updated_at, change_seq=None):
+    """Strong ETag for a single note, derived from its row version"""
+    stamp = updated_at.isoformat() if updated_at else ''
+    return f'n{note_id}-{change_seq if change_seq is not None else ""}-{stamp}'
+
+
+def collection_etag(version):
+    """Strong ETag for a list/search response: the collection version plus
+    the full query string and owner, since each page, query and user's view
+    is its own representation"""
+    owner = request.headers.get(USER_HEADER, '')
+    digest = hashlib.sha1(f'{version}|{request.full_path}|{owner}'.encode('utf-8')).hexdigest()[:24]
+    return f'c{digest}'
+
+
+def _strip_coding(tag):
+    for suffix in CODING_SUFFIXES.values():
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)]
+    return tag
+
+
+def is_not_modified(etag, last_modified=None):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since for a GET"""
+    if request.if_none_match:
+        if request.if_none_match.star_tag:
+            return True
+        return etag in {_strip_coding(tag) for tag in request.if_none_match.as_set(include_weak=True)}
+    if request.if_modified_since and last_modified is not None:
+        # HTTP dates have one-second resolution
+        modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        return modified <= request.if_modified_since
+    return False
+
+
+def not_modified_response(etag, last_modified=None):
+    response = Response(status=304)
+    add_validators(response, etag, last_modified)
+    return response
+
+
+def add_validators(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Let clients cache but revalidate every time
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _choose_coding(accept_encoding):
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """after_request hook: gzip/brotli-encode JSON bodies above the threshold"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    coding = _choose_coding(request.accept_encodings)
+    if coding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    if coding == 'br':
+        encoded = brotli.compress(body, quality=5)
+    else:
+        encoded = gzip.compress(body, compresslevel=6)
+    response.set_data(encoded)
+    response.headers['Content-Encoding'] = coding
+
+    # A strong ETag must differ per encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + CODING_SUFFIXES[coding])
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
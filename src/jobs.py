@@ -0,0 +1,182 @@
+import atexit
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, update
+from src.models.job import Job, db
+
+# kind -> callable(payload dict) -> JSON-serializable result
+handlers = {}
+
+# Errors a retry can't fix (a deleted note, a bad payload, unusable model
+# output): the job fails on the first one. Anything else, such as a failed
+# LLM call or a database error, is retried with backoff.
+PERMANENT_ERRORS = (LookupError, ValueError, TypeError)
+
+
+def register(kind):
+    """Decorator registering a function as the handler for a job kind"""
+    def decorator(fn):
+        handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def _claimable(now):
+    return or_(
+        and_(Job.status == 'queued', Job.run_after <= now),
+        # Lease expired: the worker holding it died or hung
+        and_(Job.status == 'running', Job.locked_until < now),
+    )
+
+
+def claim_job(visibility_timeout):
+    """Atomically lease the next runnable job, or return None.
+
+    The claim is a conditional UPDATE, so concurrent workers (threads or
+    processes) racing for the same row cannot both win it.
+    """
+    while True:
+        now = datetime.utcnow()
+        candidate = db.session.query(Job.id).filter(_claimable(now)).order_by(Job.id).first()
+        if candidate is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == candidate.id, _claimable(now))
+            .values(status='running', attempts=Job.attempts + 1,
+                    locked_until=now + timedelta(seconds=visibility_timeout), updated_at=now)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, candidate.id)
+
+
+def run_job(job):
+    """Execute a leased job and record success, a retry, or failure"""
+    attempt = job.attempts
+    handler = handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job kind {job.kind!r}')
+        result = handler(json.loads(job.payload))
+        values = {'status': 'succeeded', 'result': json.dumps(result), 'error': None}
+    except Exception as e:
+        db.session.rollback()
+        values = {'error': str(e)}
+        if attempt < job.max_attempts and not isinstance(e, PERMANENT_ERRORS):
+            backoff = min(60, 2 ** attempt)
+            values.update(status='queued', run_after=datetime.utcnow() + timedelta(seconds=backoff))
+        else:
+            values['status'] = 'failed'
+
+    # Only record the outcome if our lease wasn't taken over by another worker
+    values.update(locked_until=None, updated_at=datetime.utcnow())
+    db.session.execute(
+        update(Job).where(Job.id == job.id, Job.attempts == attempt, Job.status == 'running').values(**values)
+    )
+    db.session.commit()
+
+
+def run_pending(app, visibility_timeout=300, limit=None):
+    """Drain runnable jobs in the calling thread; returns how many ran"""
+    ran = 0
+    with app.app_context():
+        while limit is None or ran < limit:
+            job = claim_job(visibility_timeout)
+            if job is None:
+                break
+            run_job(job)
+            ran += 1
+    return ran
+
+
+class JobWorkerPool:
+    """Local worker threads polling the job table (no external broker).
+
+    Workers start lazily on the first enqueue (or at boot when unfinished
+    jobs are found) and stop gracefully: stop() lets each worker finish the
+    job it holds; anything interrupted is re-run once its lease expires.
+    """
+
+    def __init__(self, app, workers=2, poll_interval=1.0, visibility_timeout=300):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, app):
+        uri = app.config['SQLALCHEMY_DATABASE_URI']
+        in_memory = uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:')
+        return cls(
+            app,
+            # Serverless functions are frozen between requests: no background threads
+            # there. Nor with an in-memory SQLite database, whose one connection
+            # every thread would share.
+            workers=int(os.environ.get('JOB_WORKERS', 0 if os.environ.get('VERCEL') or in_memory else 2)),
+            poll_interval=float(os.environ.get('JOB_POLL_INTERVAL', 1.0)),
+            visibility_timeout=int(os.environ.get('JOB_VISIBILITY_TIMEOUT', 300)),
+        )
+
+    def start(self):
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._loop, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        atexit.register(self.stop)
+
+    def notify(self):
+        self.start()
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                ran = run_pending(self.app, self.visibility_timeout, limit=1)
+            except Exception as e:
+                print(f"Job worker error: {e}")
+                ran = 0
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def stop(self, timeout=30):
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+
+def init_jobs(app):
+    pool = JobWorkerPool.from_env(app)
+    app.extensions['job_pool'] = pool
+    with app.app_context():
+        # Resume durable work left over from a previous process
+        if db.session.query(Job.id).filter(Job.status.in_(['queued', 'running'])).first():
+            pool.start()
+    return pool
+
+
+def enqueue(kind, payload, max_attempts=3, user_id=None):
+    """Persist a job (owned by `user_id`) and wake the current app's worker pool"""
+    job = Job(kind=kind, payload=json.dumps(payload), max_attempts=max_attempts, user_id=user_id)
+    db.session.add(job)
+    db.session.commit()
+    pool = current_app.extensions.get('job_pool')
+    if pool is not None:
+        pool.notify()
+    return job
@@ -1,7 +1,14 @@
 # import libraries
+import json
 import os
-from openai import OpenAI
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from src.chunking import estimate_tokens, reassemble, split_into_chunks
+from src.llm_cache import LLMCache, cache_key
+from src.llm_client import LLMClientManager
+from src.metrics import llm_cache_requests, record_llm_call
+from src.single_flight import SingleFlight
 
 load_dotenv() # Loads environment variables from .env
 
@@ -11,20 +18,120 @@ if not token:
     print("Warning: GITHUB_TOKEN not set. LLM features will not work.")
     token = "dummy_token"  # Prevent crashes when token is missing
 
-endpoint = "https://models.github.ai/inference"
+endpoint = os.environ.get("LLM_ENDPOINT", "https://models.github.ai/inference")
 model = "openai/gpt-4.1-mini"
-# A function to call an LLM model and return the response
-def call_llm_model(model, messages, temperature=1.0, top_p=1.0):
+
+# Shared client: reuses HTTP connections and bounds concurrent LLM requests
+client_manager = LLMClientManager.from_env()
+
+# Fan-out pool for independent LLM calls (e.g. a note's title and content)
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("LLM_WORKERS", client_manager.max_concurrency)),
+    thread_name_prefix="llm",
+)
+
+# Long texts are translated in chunks of about this many tokens, this many
+# chunks at a time (on their own pool, since callers may already be running
+# on `executor`)
+chunk_tokens = int(os.environ.get("LLM_CHUNK_TOKENS", 1500))
+chunk_parallelism = int(os.environ.get("LLM_CHUNK_PARALLELISM", 4))
+chunk_executor = ThreadPoolExecutor(
+    max_workers=max(chunk_parallelism, client_manager.max_concurrency),
+    thread_name_prefix="llm-chunk",
+)
+
+# Response cache: in-memory LRU in front of a SQLite file. Vercel only allows
+# writes under /tmp, so the persistent tier lives there when deployed.
+def _default_cache_path():
+    if os.environ.get("VERCEL"):
+        return "/tmp/llm_cache.db"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(root, "database", "llm_cache.db")
+
+cache_enabled = os.environ.get("LLM_CACHE", "1").lower() not in ("0", "false", "off")
+cache = LLMCache(
+    path=os.environ.get("LLM_CACHE_PATH", _default_cache_path()) if cache_enabled else None,
+    ttl=int(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600)),
+    memory_size=int(os.environ.get("LLM_CACHE_MEMORY_SIZE", 512)),
+    disk_size=int(os.environ.get("LLM_CACHE_DISK_SIZE", 50000)),
+)
+
+# Concurrent identical requests share one upstream call. Set
+# LLM_SINGLE_FLIGHT_LOCK_DIR to also coalesce across worker processes on
+# one machine (the shared disk cache hands the result over).
+single_flight_enabled = os.environ.get("LLM_SINGLE_FLIGHT", "1").lower() not in ("0", "false", "off")
+single_flight = SingleFlight(lock_dir=os.environ.get("LLM_SINGLE_FLIGHT_LOCK_DIR") or None)
+
+# A function to call an LLM model and return the response.
+# Identical (model, messages, sampling params) requests are served from the
+# cache; pass use_cache=False when a fresh sample is wanted (it is not cached).
+def call_llm_model(model, messages, temperature=1.0, top_p=1.0, use_cache=True, timeout=None):
+    key = cache_key(model, messages, temperature=temperature, top_p=top_p)
+    if use_cache and cache_enabled:
+        cached = cache.get(key)
+        if cached is not None:
+            llm_cache_requests.inc('hit')
+            return cached
+    llm_cache_requests.inc('miss' if use_cache and cache_enabled else 'bypass')
+
+    def upstream():
+        return _call_upstream(key, model, messages, temperature, top_p, timeout, use_cache)
+
+    # A fresh sample is explicitly not shared with anyone else
+    if not use_cache or not single_flight_enabled:
+        return upstream()
+    return single_flight.do(key, upstream, recheck=lambda: cache.get(key) if cache_enabled else None)
+
+def _call_upstream(key, model, messages, temperature, top_p, timeout, use_cache=True):
     if token == "dummy_token":
         raise Exception("GITHUB_TOKEN not configured. Please set it in Vercel environment variables.")
+    started = time.perf_counter()
     try:
-        client = OpenAI(base_url=endpoint,api_key=token)
-        response = client.chat.completions.create(
-        messages=messages,
-        temperature=temperature, top_p=top_p, model=model)
-        return response.choices[0].message.content
+        response = client_manager.chat_completion(
+            endpoint, token, timeout=timeout,
+            messages=messages, temperature=temperature, top_p=top_p, model=model)
+        content = response.choices[0].message.content
     except Exception as e:
+        record_llm_call(model, started, error=e)
         raise Exception(f"LLM API call failed: {str(e)}")
+    record_llm_call(model, started, usage=getattr(response, 'usage', None))
+
+    if use_cache and cache_enabled and content is not None:
+        cache.set(key, content)
+    return content
+
+# Streaming variant of call_llm_model: yields the completion as it arrives.
+# A cached response is replayed as a single chunk; a completed stream is cached
+# unless use_cache=False.
+def stream_llm_model(model, messages, temperature=1.0, top_p=1.0, use_cache=True, timeout=None):
+    key = cache_key(model, messages, temperature=temperature, top_p=top_p)
+    if use_cache and cache_enabled:
+        cached = cache.get(key)
+        if cached is not None:
+            llm_cache_requests.inc('hit')
+            yield cached
+            return
+    llm_cache_requests.inc('miss' if use_cache and cache_enabled else 'bypass')
+
+    if token == "dummy_token":
+        raise Exception("GITHUB_TOKEN not configured. Please set it in Vercel environment variables.")
+    parts = []
+    started = time.perf_counter()
+    try:
+        for delta in client_manager.stream_chat_completion(
+                endpoint, token, timeout=timeout,
+                messages=messages, temperature=temperature, top_p=top_p, model=model):
+            parts.append(delta)
+            yield delta
+    except GeneratorExit:
+        raise
+    except Exception as e:
+        record_llm_call(model, started, stream=True, error=e)
+        raise Exception(f"LLM API call failed: {str(e)}")
+    record_llm_call(model, started, stream=True)
+
+    if use_cache and cache_enabled:
+        cache.set(key, "".join(parts))
 # a function to translate text using the LLM model
 
 system_prompt = r'''
@@ -43,21 +150,216 @@ system_prompt = r'''
         }} 
 '''
 
-def extract_structured_notes(text, lang="English"):
-    prompt  = f"Extract the users' notes into structured fields in {lang}."
-    messages = [
+def extraction_messages(text, lang="English"):
+    return [
         {"role": "system", "content": system_prompt.format(lang=lang)},
         {"role": "user", "content": text}
     ]
-    return call_llm_model(model, messages)
 
 
-def translate(text, target_language):
-    messages = [
+def translation_messages(text, target_language):
+    return [
         {"role": "system", "content": "You are a helpful assistant that translates text."},
         {"role": "user", "content": f"Translate the following text to {target_language}: {text}"}
     ]
-    return call_llm_model(model, messages)
+
+
+batch_system_prompt = r'''
+        You will receive a JSON array of inputs, each {{"id": <number>, "text": <user notes>}}.
+        For every input, extract the user's notes into the following structured fields:
+        1. Title: A concise title of the notes less than 5 words
+        2. Notes: The notes based on user input written in full sentences.
+        3. Tags (A list): At most 3 Keywords or tags that categorize the content of the notes.
+        Output a JSON array without ```json, one object per input with the same id, in the
+        same order. Output title and notes in the language: {lang}.
+        Example:
+        Input: [{{"id": 0, "text": "Badminton tmr 5pm @polyu"}}]
+        Output:
+        [{{"id": 0, "Title": "Badminton at PolyU", "Notes": "Remember to play badminton at 5pm tomorrow at PolyU.", "Tags": ["badminton", "sports"]}}]
+'''
+
+# Inputs packed into one batched extraction call (by count and by size)
+batch_size = int(os.environ.get("LLM_BATCH_SIZE", 20))
+batch_tokens = int(os.environ.get("LLM_BATCH_TOKENS", 3000))
+
+
+def batch_extraction_messages(texts, lang="English"):
+    items = [{"id": i, "text": text} for i, text in enumerate(texts)]
+    return [
+        {"role": "system", "content": batch_system_prompt.format(lang=lang)},
+        {"role": "user", "content": json.dumps(items, ensure_ascii=False)}
+    ]
+
+
+def parse_batch_output(raw):
+    """Pull {"id": ..., ...} objects out of a batched reply, tolerating code
+    fences, prose around the array and truncation: every object that decodes
+    is kept, keyed by id. Missing ids are left for the caller to retry."""
+    decoder = json.JSONDecoder()
+    found = {}
+    position = raw.find("{")
+    while position != -1:
+        try:
+            item, end = decoder.raw_decode(raw, position)
+        except ValueError:
+            position = raw.find("{", position + 1)
+            continue
+        if isinstance(item, dict) and isinstance(item.get("id"), int):
+            found[item["id"]] = item
+            position = raw.find("{", end)
+        else:
+            # e.g. a wrapper object: look inside it
+            position = raw.find("{", position + 1)
+    return found
+
+
+def is_complete_note(item):
+    """Whether a generated note object has a title and a body (either key casing)"""
+    return (isinstance(item, dict) and any(key in item for key in ("Title", "title"))
+            and any(key in item for key in ("Notes", "notes", "content")))
+
+
+def _pack_batches(texts):
+    batches, current, tokens = [], [], 0
+    for index, text in enumerate(texts):
+        size = estimate_tokens(text)
+        if current and (len(current) >= batch_size or tokens + size > batch_tokens):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(index)
+        tokens += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _extract_batch(texts, lang, fresh):
+    """One LLM call for several inputs; returns {position: note dict} for
+    the complete notes it got back"""
+    if len(texts) == 1:
+        return {}  # a single input is cheaper as a plain call
+    try:
+        raw = call_llm_model(model, batch_extraction_messages(texts, lang), use_cache=not fresh)
+    except Exception:
+        return {}
+    return {i: item for i, item in parse_batch_output(raw or "").items()
+            if 0 <= i < len(texts) and is_complete_note(item)}
+
+
+def extract_structured_notes_batch(texts, lang="English", fresh=False):
+    """Extract notes for many inputs with as few LLM calls as possible.
+
+    Inputs are packed into batches (LLM_BATCH_SIZE items, LLM_BATCH_TOKENS
+    estimated tokens) that run concurrently. Items a batch fails to return,
+    or returns without a Title or Notes, are retried with individual calls.
+    Returns, in input order, a note dict or the exception of an item whose
+    individual call failed too.
+    """
+    batches = _pack_batches(texts)
+    futures = [executor.submit(_extract_batch, [texts[i] for i in batch], lang, fresh) for batch in batches]
+    results = [None] * len(texts)
+    for batch, future in zip(batches, futures):
+        for position, item in future.result().items():
+            results[batch[position]] = item
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    retries = [executor.submit(extract_structured_notes, texts[i], lang, fresh) for i in missing]
+    for index, future in zip(missing, retries):
+        try:
+            item = json.loads(future.result())
+            if not is_complete_note(item):
+                raise ValueError("Generated note is missing its Title or Notes")
+            results[index] = item
+        except Exception as e:
+            results[index] = e
+    return results
+
+
+def extract_structured_notes(text, lang="English", fresh=False):
+    return call_llm_model(model, extraction_messages(text, lang), use_cache=not fresh)
+
+
+def stream_extract_structured_notes(text, lang="English", fresh=False):
+    return stream_llm_model(model, extraction_messages(text, lang), use_cache=not fresh)
+
+
+def translate(text, target_language, fresh=False):
+    if estimate_tokens(text) > chunk_tokens:
+        return translate_chunked(text, target_language, fresh)
+    return call_llm_model(model, translation_messages(text, target_language), use_cache=not fresh)
+
+
+def stream_translate(text, target_language, fresh=False):
+    if estimate_tokens(text) > chunk_tokens:
+        return stream_translate_chunked(text, target_language, fresh)
+    return stream_llm_model(model, translation_messages(text, target_language), use_cache=not fresh)
+
+
+def _translate_chunk(chunk, target_language, fresh):
+    if not chunk.strip():
+        return chunk
+    return call_llm_model(model, translation_messages(chunk, target_language), use_cache=not fresh)
+
+
+def _chunk_results(chunks, target_language, fresh, parallelism=None):
+    """Yield chunk translations in order, keeping at most `parallelism`
+    chunks in flight so one long note can't take every LLM slot"""
+    parallelism = max(1, parallelism or chunk_parallelism)
+    pending = []
+    try:
+        for chunk, _ in chunks:
+            pending.append(chunk_executor.submit(_translate_chunk, chunk, target_language, fresh))
+            if len(pending) >= parallelism:
+                yield pending.pop(0).result()
+        while pending:
+            yield pending.pop(0).result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def translate_chunked(text, target_language, fresh=False, max_tokens=None, parallelism=None):
+    """Translate a long text chunk by chunk (split on paragraph, line and
+    sentence boundaries) and reassemble it with its original layout"""
+    chunks = split_into_chunks(text, max_tokens or chunk_tokens)
+    return reassemble(chunks, list(_chunk_results(chunks, target_language, fresh, parallelism)))
+
+
+def stream_translate_chunked(text, target_language, fresh=False):
+    """Streaming variant: chunks are translated concurrently and each is
+    yielded, in order, as soon as it and every chunk before it are done"""
+    chunks = split_into_chunks(text, chunk_tokens)
+    for chunk, translated in zip(chunks, _chunk_results(chunks, target_language, fresh)):
+        yield reassemble([chunk], [translated])
+
+
+def translate_many(texts, target_language, fresh=False):
+    """Translate several texts concurrently on the shared pool.
+    Returns results in input order; a failed item holds its exception.
+    Empty texts are passed through without an LLM call."""
+    futures = [
+        executor.submit(translate, text, target_language, fresh) if text else None
+        for text in texts
+    ]
+    results = []
+    for text, future in zip(texts, futures):
+        if future is None:
+            results.append(text or "")
+            continue
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def translate_note_fields(title, content, target_language, fresh=False):
+    """Translate a note's title and content in parallel"""
+    translated_title, translated_content = translate_many([title, content], target_language, fresh)
+    for result in (translated_title, translated_content):
+        if isinstance(result, Exception):
+            raise result
+    return translated_title, translated_content
 
 if __name__ == "__main__":
     # text = "Hello, how are you?"
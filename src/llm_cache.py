@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(model, messages, **params):
+    """Content-addressed key over everything that determines the completion"""
+    payload = json.dumps(
+        {'model': model, 'messages': messages, 'params': params},
+        sort_keys=True, ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Two-tier cache for LLM completions.
+
+    An in-memory LRU sits in front of a persistent SQLite table, so repeated
+    requests are served from memory within a worker and from disk across
+    restarts. Both tiers honour the TTL; each is capped by entry count and
+    evicts least recently used entries first.
+
+    Disk writes stay off the read path: a hit refreshes the entry's access
+    time only when it is older than `touch_interval`, and expired or excess
+    entries are purged every `evict_every` writes or once the table goes
+    over `disk_size` (then down to 90% of it, so the next purge isn't due
+    on the very next write).
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, memory_size=512, disk_size=50000,
+                 touch_interval=3600, evict_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.touch_interval = touch_interval
+        self.evict_every = evict_every
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._disk_entries = 0  # estimate, corrected at each purge
+        self._writes = 0  # since the last purge
+        self.stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if self.path:
+            self._init_disk()
+
+    def _init_disk(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+        conn.commit()
+        self._disk_entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats['hits'] += 1
+                    self.stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+        if self.path:
+            try:
+                conn = self._conn()
+                row = conn.execute(
+                    "SELECT value, created_at, accessed_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] < self.ttl:
+                    if now - row[2] >= self.touch_interval:
+                        conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        conn.commit()
+                    self._remember(key, row[0], row[1])
+                    with self._lock:
+                        self.stats['hits'] += 1
+                        self.stats['disk_hits'] += 1
+                    return row[0]
+            except sqlite3.Error as e:
+                print(f"LLM cache read failed: {e}")
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        now = time.time()
+        self._remember(key, value, now)
+        if not self.path:
+            return
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            with self._lock:
+                self._writes += 1
+                self._disk_entries += 1
+                over = self._disk_entries > self.disk_size
+                due = over or self._writes >= self.evict_every
+                if due:
+                    self._writes = 0
+            evicted = self._purge(conn, now, over) if due else 0
+            conn.commit()
+            if evicted > 0:
+                with self._lock:
+                    self.stats['evictions'] += evicted
+        except sqlite3.Error as e:
+            print(f"LLM cache write failed: {e}")
+
+    def _purge(self, conn, now, over):
+        """Delete expired entries, then the least recently used beyond the cap;
+        returns how many were deleted"""
+        keep = self.disk_size - self.disk_size // 10 if over else self.disk_size
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        evicted = conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (keep,)
+        ).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        with self._lock:
+            self._disk_entries = count
+        return evicted
+
+    def _remember(self, key, value, created_at):
+        with self._lock:
+            self._memory[key] = (value, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            conn = self._conn()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+            with self._lock:
+                self._disk_entries = self._writes = 0
+
+    def info(self):
+        with self._lock:
+            info = dict(self.stats, memory_entries=len(self._memory))
+        lookups = info['hits'] + info['misses']
+        info['hit_rate'] = info['hits'] / lookups if lookups else 0.0
+        return info
@@ -0,0 +1,191 @@
+import os
+import random
+import threading
+import time
+
+# openai/httpx are imported on first use: they dominate import time and
+# most workers only ever serve CRUD requests.
+
+
+class LLMClientManager:
+    """Process-wide owner of the OpenAI client.
+
+    One client (and one keep-alive httpx connection pool) is shared per
+    endpoint/token pair instead of being rebuilt on every call. In-flight
+    requests are bounded by a semaphore, every call gets a timeout, and
+    429/5xx/connection failures are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, max_concurrency=8, max_connections=20, max_keepalive=10,
+                 keepalive_expiry=60.0, timeout=60.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0):
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight = 0
+        self._stats = {'requests': 0, 'retries': 0, 'failures': 0, 'clients_created': 0}
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        return cls(
+            max_concurrency=int(env('LLM_MAX_CONCURRENCY', 8)),
+            max_connections=int(env('LLM_MAX_CONNECTIONS', 20)),
+            max_keepalive=int(env('LLM_MAX_KEEPALIVE', 10)),
+            timeout=float(env('LLM_TIMEOUT', 60)),
+            max_retries=int(env('LLM_MAX_RETRIES', 3)),
+        )
+
+    def get_client(self, base_url, api_key):
+        key = (base_url, api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                import httpx
+                from openai import OpenAI
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                    timeout=self.timeout,
+                )
+                # Retries are handled here so they also respect the semaphore
+                client = OpenAI(base_url=base_url, api_key=api_key,
+                                http_client=http_client, max_retries=0)
+                self._clients[key] = client
+                self._stats['clients_created'] += 1
+            return client
+
+    def _retryable(self, error):
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+        if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+            return True
+        return isinstance(error, APIStatusError) and error.status_code >= 500
+
+    def _backoff(self, attempt, error):
+        retry_after = None
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get('retry-after'))
+            except (TypeError, ValueError):
+                pass
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def chat_completion(self, base_url, api_key, timeout=None, **kwargs):
+        """Run chat.completions.create with pooling, concurrency limits and retries"""
+        client = self.get_client(base_url, api_key)
+        return self._call(client.chat.completions.create,
+                          timeout=timeout if timeout is not None else self.timeout, **kwargs)
+
+    def embeddings(self, base_url, api_key, timeout=None, **kwargs):
+        """Run embeddings.create with the same pooling, limits and retries"""
+        client = self.get_client(base_url, api_key)
+        return self._call(client.embeddings.create,
+                          timeout=timeout if timeout is not None else self.timeout, **kwargs)
+
+    def _call(self, create, **kwargs):
+        attempt = 0
+        while True:
+            with self._semaphore:
+                with self._lock:
+                    self._in_flight += 1
+                    self._stats['requests'] += 1
+                try:
+                    return create(**kwargs)
+                except Exception as e:
+                    error = e
+                finally:
+                    with self._lock:
+                        self._in_flight -= 1
+
+            # Sleep outside the semaphore so waiting retries don't hold a slot
+            if attempt >= self.max_retries or not self._retryable(error):
+                with self._lock:
+                    self._stats['failures'] += 1
+                raise error
+            time.sleep(self._backoff(attempt, error))
+            attempt += 1
+            with self._lock:
+                self._stats['retries'] += 1
+
+    def stream_chat_completion(self, base_url, api_key, timeout=None, **kwargs):
+        """Yield content deltas from a streamed chat completion.
+
+        The concurrency slot is held until the stream ends. Closing the
+        generator (e.g. the HTTP client disconnected) closes the upstream
+        response. Retries only happen before the first chunk arrives.
+        """
+        client = self.get_client(base_url, api_key)
+        attempt = 0
+        while True:
+            with self._semaphore:
+                with self._lock:
+                    self._in_flight += 1
+                    self._stats['requests'] += 1
+                started = False
+                stream = None
+                try:
+                    stream = client.chat.completions.create(
+                        stream=True, timeout=timeout if timeout is not None else self.timeout, **kwargs
+                    )
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            started = True
+                            yield delta
+                    return
+                except Exception as e:
+                    if started:
+                        with self._lock:
+                            self._stats['failures'] += 1
+                        raise
+                    error = e
+                finally:
+                    if stream is not None:
+                        stream.close()
+                    with self._lock:
+                        self._in_flight -= 1
+
+            if attempt >= self.max_retries or not self._retryable(error):
+                with self._lock:
+                    self._stats['failures'] += 1
+                raise error
+            time.sleep(self._backoff(attempt, error))
+            attempt += 1
+            with self._lock:
+                self._stats['retries'] += 1
+
+    def stats(self):
+        with self._lock:
+            info = dict(self._stats, in_flight=self._in_flight,
+                        max_concurrency=self.max_concurrency, clients=len(self._clients))
+            clients = list(self._clients.values())
+        connections = 0
+        for client in clients:
+            # httpx doesn't expose pool occupancy publicly; report it when available
+            pool = getattr(getattr(client._client, '_transport', None), '_pool', None)
+            connections += len(getattr(pool, 'connections', []) or [])
+        info['open_connections'] = connections
+        return info
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
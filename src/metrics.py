@@ -0,0 +1,238 @@
+import hmac
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Minimal Prometheus client: counters and histograms kept in process memory
+# and rendered in the text exposition format (version 0.0.4). Each worker
+# process reports its own series; Prometheus sums them per instance.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# A SELECT repeated this many times in one request is reported as an N+1
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', 10))
+
+registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = sorted(self._series.items())
+        for values, state in series:
+            lines.extend(self._render_series(values, state))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._series.get(labelvalues, 0)
+
+    def _render_series(self, values, total):
+        return [f'{self.name}_total{_labels(self.labelnames, values)} {_number(total)}']
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._series.get(labelvalues)
+            if state is None:
+                # per-bucket counts (the last slot is +Inf), sum, count
+                state = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labelvalues):
+        state = self._series.get(labelvalues)
+        return state[2] if state else 0
+
+    def _render_series(self, values, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = _labels(self.labelnames, values, [('le', _number(bound))])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _labels(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_number(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def render():
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+http_requests = Counter(
+    'http_requests', 'HTTP requests handled', ('method', 'endpoint', 'status'))
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response (streams: until the first byte)',
+    ('method', 'endpoint'))
+db_query_duration = Histogram(
+    'db_query_duration_seconds', 'SQL statement execution time', ('operation',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+db_statements_per_request = Histogram(
+    'db_statements_per_request', 'SQL statements executed by one request', ('endpoint',),
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250))
+db_time_per_request = Histogram(
+    'db_time_per_request_seconds', 'Total SQL time spent by one request', ('endpoint',))
+db_n_plus_one = Counter(
+    'db_n_plus_one', 'Requests that repeated one SELECT at least the N+1 threshold', ('endpoint',))
+llm_request_duration = Histogram(
+    'llm_request_duration_seconds', 'LLM API call latency', ('model', 'outcome', 'stream'),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0))
+llm_tokens = Counter(
+    'llm_tokens', 'Tokens reported by the LLM API', ('model', 'type'))
+llm_errors = Counter(
+    'llm_errors', 'Failed LLM API calls', ('model', 'error'))
+llm_cache_requests = Counter(
+    'llm_cache_requests', 'LLM calls answered from the cache or sent upstream', ('result',))
+
+
+def record_llm_call(model, started, stream=False, usage=None, error=None):
+    """Record one upstream LLM call that began at perf_counter() `started`"""
+    outcome = 'error' if error is not None else 'ok'
+    llm_request_duration.observe(time.perf_counter() - started, model, outcome, str(stream).lower())
+    if error is not None:
+        llm_errors.inc(model, type(error).__name__)
+    if usage is not None:
+        llm_tokens.inc(model, 'prompt', amount=getattr(usage, 'prompt_tokens', 0) or 0)
+        llm_tokens.inc(model, 'completion', amount=getattr(usage, 'completion_tokens', 0) or 0)
+
+
+OPERATIONS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA'}
+
+
+def _endpoint():
+    # The URL rule, not the path, so ids don't explode label cardinality
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    operation = statement.lstrip()[:8].split(None, 1)[0].upper() if statement.strip() else ''
+    db_query_duration.observe(elapsed, operation if operation in OPERATIONS else 'OTHER')
+
+    if not has_request_context():
+        return  # job workers, boot-time schema checks
+    stats = g.get('sql_stats')
+    if stats is None:
+        return
+    stats['count'] += 1
+    stats['time'] += elapsed
+    if operation == 'SELECT':
+        # Statements are parameterized, so a lookup repeated per row has identical text
+        repeats = stats['selects'][statement] = stats['selects'].get(statement, 0) + 1
+        if repeats == N_PLUS_ONE_THRESHOLD:
+            stats['n_plus_one'].append(statement)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_start'):
+        connection.info['query_start'].pop()
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.sql_stats = {'count': 0, 'time': 0.0, 'selects': {}, 'n_plus_one': []}
+
+
+def _finish_request(response):
+    started = g.pop('request_started', None)
+    stats = g.pop('sql_stats', None)
+    if started is None:
+        return response
+    endpoint = _endpoint()
+    http_requests.inc(request.method, endpoint, str(response.status_code))
+    http_request_duration.observe(time.perf_counter() - started, request.method, endpoint)
+    db_statements_per_request.observe(stats['count'], endpoint)
+    db_time_per_request.observe(stats['time'], endpoint)
+    if stats['n_plus_one']:
+        db_n_plus_one.inc(endpoint)
+        current_app.logger.warning(
+            'Possible N+1 in %s %s: %d statements, repeated SELECT: %s',
+            request.method, endpoint, stats['count'], stats['n_plus_one'][0][:200])
+    return response
+
+
+def metrics_view():
+    """Prometheus scrape endpoint. Set METRICS_TOKEN to require a bearer token."""
+    token = os.environ.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, token):
+            return Response('unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render(), content_type=CONTENT_TYPE)
+
+
+def init_metrics(app, db):
+    """Time requests and SQL statements and serve GET /metrics.
+    Disabled with METRICS=0."""
+    if os.environ.get('METRICS', '1').lower() in ('0', 'false', 'off'):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
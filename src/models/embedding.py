@@ -0,0 +1,13 @@
+from datetime import datetime
+from src.models.user import db
+
+
+class NoteEmbedding(db.Model):
+    """Embedding vector of a note's title and content (float32, L2-normalized)"""
+    note_id = db.Column(db.Integer, db.ForeignKey('note.id', ondelete='CASCADE'), primary_key=True)
+    # Which backend/dimension produced the vector; rows from another backend are re-embedded
+    backend = db.Column(db.String(100), nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)
+    # sha1 of the embedded text, so unchanged notes aren't re-embedded
+    content_hash = db.Column(db.String(40), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
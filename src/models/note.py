@@ -1,23 +1,84 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from src.models.user import db
+from src.models.types import CompressedText
 
 class Note(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    # Not loaded with the row: list and lookup queries never need the body.
+    # Full-note reads undefer it (see full_note()).
+    content = db.deferred(db.Column(CompressedText, nullable=False))
+    # Comma-joined copy of the note's tags for the join-free read path; the
+    # note_tag links (src/models/tag.py) are what filters and counts query.
+    # Written only through src.tags.set_note_tags.
+    tags = db.Column(db.String(500))
+    # Owner; NULL for notes written without a user (see src/owners.py)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Sync sequence of the transaction that last wrote this note (see src/sync.py)
+    change_seq = db.Column(db.BigInteger)
+
+    # Composite index backing keyset pagination on (updated_at DESC, id DESC);
+    # the user_id-led ones serve the same orders within one user's notes
+    __table_args__ = (
+        db.Index('ix_note_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_note_change_seq', 'change_seq'),
+        db.Index('ix_note_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_note_user_id_change_seq', 'user_id', 'change_seq'),
+    )
     
     def __repr__(self):
         return f'<Note {self.title}>'
-    
+
+    @classmethod
+    def full_note(cls):
+        """Loader option for queries that serialize whole notes"""
+        return db.undefer(cls.content)
+
+    @classmethod
+    def read_columns(cls):
+        """Columns selected by the ORM-free read path, in to_dict() order"""
+        return (cls.id, cls.title, cls.content, cls.tags, cls.user_id, cls.created_at, cls.updated_at,
+                cls.change_seq.label('version'))
+
+    @staticmethod
+    def row_to_dict(row):
+        # Datetimes are left as-is for the JSON provider to encode
+        item = row._asdict()
+        item['tags'] = item['tags'].split(',') if item['tags'] else []
+        return item
+
     def to_dict(self):
         return {
             'id': self.id,
             'title': self.title,
             'content': self.content,
+            'tags': self.tags.split(',') if self.tags else [],
+            'user_id': self.user_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            # Base version for PATCH deltas
+            'version': self.change_seq
         }
 
+
+class NoteTombstone(db.Model):
+    """Record of a deleted note so syncing clients can drop it from their cache"""
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, nullable=False)
+    # Owner of the deleted note, so a user's feed only lists their own deletions
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+    change_seq = db.Column(db.BigInteger, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_note_tombstone_user_id_change_seq', 'user_id', 'change_seq'),
+    )
+
+
+class SyncState(db.Model):
+    """Single-row counter handing out monotonic change sequence numbers"""
+    id = db.Column(db.Integer, primary_key=True)
+    last_seq = db.Column(db.BigInteger, nullable=False, default=0)
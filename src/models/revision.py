@@ -0,0 +1,29 @@
+from datetime import datetime
+from src.models.user import db
+
+
+class NoteRevision(db.Model):
+    """A past version of a note's title and content (see src/revisions.py).
+
+    `data` is zlib-compressed: either the full content ('snapshot') or a
+    reverse delta that turns the next revision's content (or the note's
+    current content, for the newest revision) into this one ('delta').
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, db.ForeignKey('note.id', ondelete='CASCADE'), nullable=False)
+    # Per-note revision number, 1 = oldest
+    revision = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    # Length of this revision's content in characters
+    content_length = db.Column(db.Integer, nullable=False)
+    # What replaced this version: edit, translate, restore or bulk
+    reason = db.Column(db.String(20), nullable=False)
+    # When this version was saved, and when it stopped being current
+    updated_at = db.Column(db.DateTime)
+    replaced_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_note_revision_note_id_revision', 'note_id', 'revision', unique=True),
+    )
@@ -0,0 +1,9 @@
+from datetime import datetime
+from src.models.user import db
+
+class SchemaInfo(db.Model):
+    """Single row recording which schema version the database was upgraded to"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    search_backend = db.Column(db.String(20))
+    upgraded_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
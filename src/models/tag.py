@@ -0,0 +1,18 @@
+from src.models.user import db
+
+# Note <-> tag links. The primary key serves "tags of a note"; the reverse
+# index serves tag filters and facet counts.
+note_tag = db.Table(
+    'note_tag',
+    db.Column('note_id', db.Integer, db.ForeignKey('note.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_note_tag_tag_id_note_id', 'tag_id', 'note_id'),
+)
+
+
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f'<Tag {self.name}>'
@@ -0,0 +1,64 @@
+import os
+import zlib
+from sqlalchemy import Text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+
+def compress_min_size():
+    """Bodies at least this many bytes are stored compressed; 0 turns it off"""
+    return int(os.environ.get('CONTENT_COMPRESS_MIN_SIZE', 1024))
+
+
+def decompress_text(value):
+    """Plain text from a stored value: str as-is, zlib bytes decompressed"""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode('utf-8')
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed (as a BLOB) on SQLite above a size threshold.
+
+    Reads always return str, so the ORM and Core selects see plain text. SQL
+    that reads the column itself must go through plain_text() (the search
+    triggers, list previews). Other databases store plain text: Postgres
+    already compresses large values (TOAST) and its full-text column is
+    computed from the text in SQL.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != 'sqlite':
+            return value
+        threshold = compress_min_size()
+        if threshold <= 0:
+            return value
+        raw = value.encode('utf-8')
+        if len(raw) < threshold:
+            return value
+        compressed = zlib.compress(raw, 6)
+        return compressed if len(compressed) < len(raw) else value
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
+class plain_text(FunctionElement):
+    """SQL expression for a CompressedText column's plain text"""
+    type = Text()
+    inherit_cache = True
+    name = 'plain_text'
+
+
+@compiles(plain_text)
+def _compile_plain_text(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(plain_text, 'sqlite')
+def _compile_plain_text_sqlite(element, compiler, **kw):
+    # note_text() is registered on every SQLite connection (see src/engine.py)
+    return f'note_text({compiler.process(element.clauses, **kw)})'
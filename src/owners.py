@@ -0,0 +1,66 @@
+"""Per-user scoping of notes, tags and jobs by the X-User-Id header.
+
+This is not a security boundary: the header is not authenticated, so any
+client can name any user. It keeps each user's data apart for clients that
+cooperate; deployments that need isolation must put real authentication in
+front of the API and set the header there.
+
+Requests without the header (the bundled frontend sends none) are scoped to
+unowned notes and jobs: those written without the header, including every
+note from before notes had owners, and those of deleted users. They never
+see a user's notes.
+"""
+from flask import g, jsonify, request
+from sqlalchemy import select
+from src.models.note import Note
+from src.models.user import User, db
+
+USER_HEADER = 'X-User-Id'
+
+# Pass as user_id to the query helpers (src.sync, src.search, ...) to read
+# every user's rows; user_id=None means rows without an owner
+ALL_USERS = object()
+
+
+def owner_filter(column, user_id):
+    """Filter clauses limiting rows to `user_id`'s (None: unowned rows)"""
+    if user_id is ALL_USERS:
+        return []
+    return [column.is_(None)] if user_id is None else [column == user_id]
+
+
+def request_user_id():
+    """The user id the current request is scoped to, or None"""
+    return g.get('user_id')
+
+
+def owned(model=Note):
+    """Filter clauses limiting a query of `model` (notes, jobs) to the request user's rows"""
+    return owner_filter(model.user_id, request_user_id())
+
+
+def scope_request():
+    """before_request hook: read the owner header into g.user_id, rejecting
+    ids of users that don't exist (their notes would be orphaned)"""
+    g.user_id = None
+    value = request.headers.get(USER_HEADER, '').strip()
+    if not value:
+        return
+    try:
+        g.user_id = int(value)
+    except ValueError:
+        return jsonify({'error': f'{USER_HEADER} must be an integer'}), 400
+    if db.session.execute(select(User.id).where(User.id == g.user_id)).first() is None:
+        g.user_id = None
+        return jsonify({'error': f'Unknown user {value}'}), 403
+
+
+def vary_on_owner(response):
+    """after_request hook: responses differ per user, so shared caches must key on it"""
+    response.vary.add(USER_HEADER)
+    return response
+
+
+def init_owner_scope(blueprint):
+    blueprint.before_request(scope_request)
+    blueprint.after_request(vary_on_owner)
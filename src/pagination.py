@@ -0,0 +1,93 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select
+from src.models.types import plain_text
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+PREVIEW_LENGTH = 120
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(updated_at, note_id):
+    """Encode the (updated_at, id) keyset position of the last row on a page"""
+    raw = f"{updated_at.isoformat()}|{note_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into (updated_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        updated_at, note_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(updated_at), int(note_id)
+    except (ValueError, UnicodeError):
+        raise CursorError('Invalid cursor')
+
+
+def parse_limit(value):
+    """Clamp the requested page size to [1, MAX_PAGE_SIZE]"""
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise CursorError('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_filter(model, cursor):
+    """Rows strictly after the cursor in (updated_at DESC, id DESC) order"""
+    updated_at, note_id = decode_cursor(cursor)
+    return or_(
+        model.updated_at < updated_at,
+        and_(model.updated_at == updated_at, model.id < note_id),
+    )
+
+
+def list_columns(model, preview_length=PREVIEW_LENGTH):
+    """Projection used by list mode: the preview is truncated by the database
+    so full note bodies never leave it"""
+    return (
+        model.id,
+        model.title,
+        func.substr(plain_text(model.content), 1, preview_length).label('preview'),
+        model.created_at,
+        model.updated_at,
+    )
+
+
+def paginate_notes(session, model, limit=DEFAULT_PAGE_SIZE, cursor=None, view='list', where=()):
+    """Fetch one keyset page of notes, newest first.
+
+    Returns (items, next_cursor). In 'list' view only id/title/preview/timestamps
+    are selected; in 'full' view the model's read_columns(). Rows are read as
+    plain tuples (no ORM hydration) and left for the JSON provider to encode.
+    `where` holds extra filter clauses (e.g. a tag filter).
+    """
+    if view == 'full':
+        stmt = select(*model.read_columns())
+        to_dict = model.row_to_dict
+    else:
+        stmt = select(*list_columns(model))
+        to_dict = lambda row: row._asdict()
+
+    if where:
+        stmt = stmt.where(*where)
+    if cursor:
+        stmt = stmt.where(keyset_filter(model, cursor))
+
+    # Fetch one extra row to know whether another page exists
+    rows = session.execute(
+        stmt.order_by(model.updated_at.desc(), model.id.desc()).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [to_dict(row) for row in rows]
+    next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].id) if has_more else None
+    return items, next_cursor
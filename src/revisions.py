@@ -0,0 +1,204 @@
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, event, func, inspect, select
+from src.delta import apply_delta, make_delta
+from src.models.note import Note, db
+from src.models.revision import NoteRevision
+
+DEFAULT_REVISIONS_LIMIT = 50
+MAX_REVISIONS_LIMIT = 500
+_BATCH_SIZE = 500
+# zlib rarely shrinks note text more than this, so a delta under 1/Nth of the
+# raw content is kept without compressing the whole body to compare
+_MAX_TEXT_COMPRESSION = 8
+
+
+def revisions_enabled():
+    return os.environ.get('REVISIONS', '1').lower() not in ('0', 'false', 'off')
+
+
+def snapshot_interval():
+    """Every Nth revision stores full content, so reading any revision
+    applies at most N-1 deltas"""
+    return max(1, int(os.environ.get('REVISION_SNAPSHOT_INTERVAL', 20)))
+
+
+def coalesce_window():
+    """Edits this soon after the previous kept revision replace the version
+    in between instead of adding one, so autosave keeps one revision per
+    burst of typing. 0 keeps every save."""
+    return timedelta(seconds=float(os.environ.get('REVISION_COALESCE_SECONDS', 60)))
+
+
+def set_revision_reason(session, reason):
+    """Label the revisions recorded by this transaction (default 'edit')"""
+    session.info['revision_reason'] = reason
+
+
+def _encode(number, content, next_content, ops=None):
+    """Return (kind, data) storing `content` against the version that replaced
+    it. `ops`, if known, is the delta turning `next_content` into `content`."""
+    raw = content.encode('utf-8')
+    if number % snapshot_interval() == 0:
+        return 'snapshot', zlib.compress(raw)
+    if ops is None:
+        ops = make_delta(next_content, content)
+    delta = zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'))
+    # A rewrite (e.g. a translation) is no smaller as a delta and ends the chain early
+    if len(delta) * _MAX_TEXT_COMPRESSION >= len(raw):
+        snapshot = zlib.compress(raw)
+        if len(delta) >= len(snapshot):
+            return 'snapshot', snapshot
+    return 'delta', delta
+
+
+def _decode(revision, next_content):
+    data = zlib.decompress(revision.data).decode('utf-8')
+    if revision.kind == 'snapshot':
+        return data
+    return apply_delta(next_content, json.loads(data))
+
+
+def _latest_revisions(session, note_ids):
+    latest = {}
+    for start in range(0, len(note_ids), _BATCH_SIZE):
+        batch = note_ids[start:start + _BATCH_SIZE]
+        newest = (select(NoteRevision.note_id, func.max(NoteRevision.revision).label('revision'))
+                  .where(NoteRevision.note_id.in_(batch)).group_by(NoteRevision.note_id).subquery())
+        rows = session.execute(select(NoteRevision).join(newest, and_(
+            NoteRevision.note_id == newest.c.note_id, NoteRevision.revision == newest.c.revision
+        ))).scalars()
+        latest.update((row.note_id, row) for row in rows)
+    return latest
+
+
+def record_revisions(session, changes, reason=None):
+    """Keep the versions that `changes` are about to replace.
+
+    `changes` holds dicts with the note's id, its old title, content and
+    updated_at, and its new title and content; a caller that already has the
+    delta from the new content back to the old one (PATCH inverts the
+    client's) passes it as `reverse_delta` to skip diffing the bodies. Each
+    old version is stored against the new content, so earlier revisions
+    never need rewriting.
+    """
+    changes = [c for c in changes if c['content'] != c['new_content'] or c['title'] != c['new_title']]
+    if not changes or not revisions_enabled():
+        return
+    reason = reason or session.info.get('revision_reason', 'edit')
+    now = datetime.utcnow()
+    window = coalesce_window()
+    latest = _latest_revisions(session, [c['note_id'] for c in changes])
+
+    for change in changes:
+        previous = latest.get(change['note_id'])
+        if (previous is not None and reason == 'edit' and previous.reason == 'edit'
+                and previous.replaced_at is not None and now - previous.replaced_at < window):
+            # The old version only existed mid-burst: drop it and re-base the
+            # previous revision on the new content
+            if previous.kind == 'delta':
+                content = _decode(previous, change['content'])
+                previous.kind, previous.data = _encode(previous.revision, content, change['new_content'])
+            continue
+        number = previous.revision + 1 if previous is not None else 1
+        kind, data = _encode(number, change['content'], change['new_content'], change.get('reverse_delta'))
+        revision = NoteRevision(
+            note_id=change['note_id'], revision=number, title=change['title'], kind=kind, data=data,
+            content_length=len(change['content']), reason=reason,
+            updated_at=change['updated_at'], replaced_at=now
+        )
+        session.add(revision)
+        latest[change['note_id']] = revision
+
+
+def clear_revisions(session, note_ids):
+    session.execute(delete(NoteRevision).where(NoteRevision.note_id.in_(note_ids)))
+
+
+def revision_content(session, note_id, number):
+    """Return (revision, content) for one revision, or None if it doesn't exist"""
+    revision = session.execute(select(NoteRevision).where(
+        NoteRevision.note_id == note_id, NoteRevision.revision == number
+    )).scalar_one_or_none()
+    if revision is None:
+        return None
+    if revision.kind == 'snapshot':
+        return revision, _decode(revision, None)
+
+    # Walk back from the nearest later snapshot, or from the note itself
+    snapshot = session.execute(select(func.min(NoteRevision.revision)).where(
+        NoteRevision.note_id == note_id, NoteRevision.revision > number, NoteRevision.kind == 'snapshot'
+    )).scalar()
+    chain = select(NoteRevision).where(NoteRevision.note_id == note_id, NoteRevision.revision > number)
+    if snapshot is not None:
+        chain = chain.where(NoteRevision.revision <= snapshot)
+        content = None
+    else:
+        content = session.execute(select(Note.content).where(Note.id == note_id)).scalar_one()
+    for later in session.execute(chain.order_by(NoteRevision.revision.desc())).scalars():
+        content = _decode(later, content)
+    return revision, _decode(revision, content)
+
+
+def list_revisions(session, note_id, limit=DEFAULT_REVISIONS_LIMIT, before=None):
+    """Revision metadata, newest first; pass the last `revision` as `before` for the next page"""
+    query = select(
+        NoteRevision.revision, NoteRevision.title, NoteRevision.reason, NoteRevision.content_length,
+        NoteRevision.updated_at, NoteRevision.replaced_at
+    ).where(NoteRevision.note_id == note_id)
+    if before is not None:
+        query = query.where(NoteRevision.revision < before)
+    rows = session.execute(query.order_by(NoteRevision.revision.desc()).limit(limit + 1)).all()
+    return [row._asdict() for row in rows[:limit]], len(rows) > limit
+
+
+def _old_value(state, key):
+    """The value before this flush, or None if it was never loaded"""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return state.attrs[key].value
+
+
+@event.listens_for(db.session, 'before_flush')
+def _record_note_revisions(session, flush_context, instances):
+    changes = []
+    for note in session.dirty:
+        if not isinstance(note, Note) or not session.is_modified(note):
+            continue
+        state = inspect(note)
+        if not (state.attrs.title.history.has_changes() or state.attrs.content.history.has_changes()):
+            continue
+        changes.append({
+            'note_id': note.id,
+            'title': _old_value(state, 'title'),
+            'content': _old_value(state, 'content'),
+            'updated_at': _old_value(state, 'updated_at'),
+            'new_title': note.title,
+            'new_content': note.content,
+        })
+    if not changes:
+        return
+    with session.no_autoflush:
+        # Values set without being loaded first (content is deferred, and
+        # commit expires everything) are still unchanged in the database
+        fields = ('title', 'content', 'updated_at')
+        unloaded = [c['note_id'] for c in changes if any(c[field] is None for field in fields)]
+        if unloaded:
+            old = {row.id: row for row in session.execute(
+                select(Note.id, Note.title, Note.content, Note.updated_at).where(Note.id.in_(unloaded)))}
+            for change in changes:
+                for field in fields:
+                    if change[field] is None and change['note_id'] in old:
+                        change[field] = getattr(old[change['note_id']], field)
+        record_revisions(session, changes)
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def _reset_revision_reason(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('revision_reason', None)
@@ -0,0 +1,12 @@
+from flask import Blueprint, jsonify
+from src.models.job import Job
+from src.owners import init_owner_scope, owned
+
+job_bp = Blueprint('job', __name__)
+init_owner_scope(job_bp)
+
+@job_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status (and result, once finished) of a background job"""
+    job = Job.query.filter(Job.id == job_id, *owned(Job)).first_or_404()
+    return jsonify(job.to_dict())
@@ -1,15 +1,95 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from datetime import datetime
+from sqlalchemy import select, update
 from src.models.note import Note, db
-from src.llm import translate, extract_structured_notes
+from src.pagination import CursorError, paginate_notes, parse_limit
+from src.search import parse_paging, search_notes as run_search
+from src.jobs import enqueue, register
+from src.bulk import BulkError, DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, MAX_OPERATIONS, TITLE_MAX_LENGTH, apply_bulk
+from src.tags import clear_note_tags, parse_tag_filter, set_note_tags, tag_new_notes, tagged_note_ids
+from src.embeddings import (
+    DEFAULT_TOP_K, MAX_TOP_K, clear_embeddings, embeddings_enabled, get_index, invalidate_embeddings,
+    related_notes, semantic_search
+)
+from src.delta import DeltaError, apply_delta, invert_delta
+from src.revisions import (
+    DEFAULT_REVISIONS_LIMIT, MAX_REVISIONS_LIMIT, clear_revisions, list_revisions, record_revisions,
+    revision_content, set_revision_reason
+)
+from src.sync import (
+    DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT, SyncCursorError, allocate_change_seq, changes_since, current_seq
+)
+from src.fast_json import json_array_response
+from src.owners import init_owner_scope, owned, request_user_id
+from src.transfer import TransferError, gzip_chunks, import_notes, iter_export
+from src.http_cache import add_validators, collection_etag, is_not_modified, not_modified_response, note_etag
+import gzip
 import json
 
 note_bp = Blueprint('note', __name__)
+init_owner_scope(note_bp)
+
+def llm():
+    """Import the LLM module (and openai) on first use, not at worker boot"""
+    import src.llm
+    return src.llm
+
+def title_error(title):
+    """Why a client-supplied title is invalid, or None (same rules as bulk writes)"""
+    if not isinstance(title, str):
+        return 'title must be a string'
+    if len(title) > TITLE_MAX_LENGTH:
+        return f'title is longer than {TITLE_MAX_LENGTH} characters'
+    return None
+
+def fields_error(data):
+    """Why the title/content in a create or update body are invalid, or None"""
+    if 'content' in data and not isinstance(data['content'], str):
+        return 'content must be a string'
+    return title_error(data['title']) if 'title' in data else None
 
 @note_bp.route('/notes', methods=['GET'])
 def get_notes():
-    """Get all notes, ordered by most recently updated"""
-    notes = Note.query.order_by(Note.updated_at.desc()).all()
-    return jsonify([note.to_dict() for note in notes])
+    """Get notes, ordered by most recently updated.
+
+    Without `limit`/`cursor` the full list is returned as before. With either
+    of them a keyset page is returned: `{"notes": [...], "next_cursor": ...}`.
+    `view=list` (the default for pages) returns id/title/preview/timestamps
+    only; `view=full` includes the full content.
+
+    `tag` (repeatable or comma-separated) filters by tag; `match=all` (the
+    default) requires every tag, `match=any` at least one.
+
+    Requests with an `X-User-Id` header (see src/owners.py) only see that
+    user's notes, here and in every other note route.
+    """
+    try:
+        tags, match = parse_tag_filter(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    where = owned() + ([Note.id.in_(tagged_note_ids(tags, match))] if tags else [])
+
+    # Every write bumps the sync sequence, so it versions the whole collection
+    etag = collection_etag(current_seq(db.session))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        rows = db.session.execute(
+            select(*Note.read_columns()).where(*where).order_by(Note.updated_at.desc())
+        )
+        return add_validators(json_array_response(Note.row_to_dict(row) for row in rows), etag)
+
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        view = request.args.get('view', 'list')
+        if view not in ('list', 'full'):
+            return jsonify({'error': 'view must be "list" or "full"'}), 400
+        notes, next_cursor = paginate_notes(db.session, Note, limit=limit,
+                                            cursor=request.args.get('cursor'), view=view, where=where)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    return add_validators(jsonify({'notes': notes, 'next_cursor': next_cursor}), etag)
 
 @note_bp.route('/notes', methods=['POST'])
 def create_note():
@@ -18,35 +98,230 @@ def create_note():
         data = request.json
         if not data or 'title' not in data or 'content' not in data:
             return jsonify({'error': 'Title and content are required'}), 400
+        error = fields_error(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        note = Note(title=data['title'], content=data['content'])
+        note = Note(title=data['title'], content=data['content'], user_id=request_user_id())
         db.session.add(note)
+        db.session.flush()
+        set_note_tags(db.session, note, data.get('tags'))
+        db.session.flush()
+        # Serialize before commit expires the note, or its body is read back
+        body = note.to_dict()
         db.session.commit()
-        return jsonify(note.to_dict()), 201
+        return jsonify(body), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@note_bp.route('/notes/export', methods=['GET'])
+def export_notes():
+    """Stream every note as NDJSON (one JSON object per line), oldest id first.
+
+    `gzip=1` gzip-encodes the stream. Rows are read in batches through a
+    server-side cursor, so memory use doesn't grow with the table.
+    """
+    compress = request.args.get('gzip', '').lower() in ('1', 'true')
+    chunks = iter_export(db.session, user_id=request_user_id())
+    filename = f"notes-{datetime.utcnow():%Y%m%d}.ndjson" + ('.gz' if compress else '')
+    response = Response(stream_with_context(gzip_chunks(chunks) if compress else chunks),
+                        mimetype='application/gzip' if compress else 'application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@note_bp.route('/notes/import', methods=['POST'])
+def import_notes_upload():
+    """Import an NDJSON export streamed as the request body.
+
+    The body may be gzipped (`Content-Encoding: gzip` or an application/gzip
+    body). Notes get new ids unless `keep_ids=1`. Batches are committed as
+    they arrive; returns {"imported", "skipped", "errors"}.
+    """
+    keep_ids = request.args.get('keep_ids', '').lower() in ('1', 'true')
+    stream = request.stream
+    if request.content_encoding == 'gzip' or request.mimetype == 'application/gzip':
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    try:
+        return jsonify(import_notes(db.session, stream, keep_ids=keep_ids, user_id=request_user_id()))
+    except TransferError as e:
+        db.session.rollback()
+        return jsonify(dict(e.stats, error=str(e))), 409
+    except (OSError, EOFError) as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid gzip body: {e}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@note_bp.route('/notes/changes', methods=['GET'])
+def get_note_changes():
+    """Incremental sync: notes written and ids deleted since `since` (a
+    cursor returned by a previous call). Omit `since` for a full sync."""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_CHANGES_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, MAX_CHANGES_LIMIT))
+    try:
+        return jsonify(changes_since(db.session, request.args.get('since'), limit=limit,
+                                     user_id=request_user_id()))
+    except SyncCursorError as e:
+        return jsonify({'error': str(e)}), 400
+
+@note_bp.route('/notes/bulk', methods=['POST'])
+def bulk_notes():
+    """Apply many create/update/delete operations in a single transaction.
+
+    Body: {"operations": [{"op": "create", "title": ..., "content": ...},
+                          {"op": "update", "id": 1, "title": ...},
+                          {"op": "delete", "id": 2}],
+           "batch_size": 500, "atomic": false}
+    Invalid items are reported per index and skipped, unless `atomic` is set,
+    in which case nothing is written.
+    """
+    try:
+        data = request.json
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations must be a non-empty list'}), 400
+        if len(operations) > MAX_OPERATIONS:
+            return jsonify({'error': f'At most {MAX_OPERATIONS} operations per request'}), 400
+        try:
+            batch_size = int(data.get('batch_size', DEFAULT_BATCH_SIZE))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'batch_size must be an integer'}), 400
+        batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+
+        try:
+            results = apply_bulk(db.session, Note, operations, batch_size=batch_size,
+                                 atomic=bool(data.get('atomic', False)), user_id=request_user_id())
+        except BulkError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'results': getattr(e, 'results', [])}), 400
+
+        summary = {'created': 0, 'updated': 0, 'deleted': 0, 'failed': 0}
+        for result in results:
+            if result['status'] == 'ok':
+                summary[result['op'] + 'd'] += 1
+            else:
+                summary['failed'] += 1
+        return jsonify(dict(summary, results=results))
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/notes/<int:note_id>', methods=['GET'])
 def get_note(note_id):
-    """Get a specific note by ID"""
-    note = Note.query.get_or_404(note_id)
-    return jsonify(note.to_dict())
+    """Get a specific note by ID (304 if the client's copy is current)"""
+    # Check validators against the row version before loading the body
+    version = db.session.query(Note.updated_at, Note.change_seq).filter(Note.id == note_id, *owned()).first()
+    if version is None:
+        abort(404)
+    etag = note_etag(note_id, version.updated_at, version.change_seq)
+    if is_not_modified(etag, version.updated_at):
+        return not_modified_response(etag, version.updated_at)
+
+    note = db.session.get(Note, note_id, options=[Note.full_note()])
+    return add_validators(jsonify(note.to_dict()), etag, version.updated_at)
 
 @note_bp.route('/notes/<int:note_id>', methods=['PUT'])
 def update_note(note_id):
     """Update a specific note"""
     try:
-        note = Note.query.get_or_404(note_id)
+        note = Note.query.options(Note.full_note()).filter(Note.id == note_id, *owned()).first_or_404()
         data = request.json
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
+        error = fields_error(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         note.title = data.get('title', note.title)
-        note.content = data.get('content', note.content)
+        if 'content' in data:
+            note.content = data['content']
+        if 'tags' in data:
+            set_note_tags(db.session, note, data['tags'])
+        if 'title' in data or 'content' in data:
+            invalidate_embeddings(db.session, [note.id])
+        db.session.flush()
+        body = note.to_dict()
         db.session.commit()
-        return jsonify(note.to_dict())
+        return jsonify(body)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@note_bp.route('/notes/<int:note_id>', methods=['PATCH'])
+def patch_note(note_id):
+    """Apply an incremental edit (used by autosave).
+
+    Body: {"base_version": 12, "content_delta": [{"retain": 10}, {"delete": 3},
+           {"insert": "abc"}], "title": "..."}; both fields are optional.
+    The delta is applied to the content at `base_version` (the note's
+    `version`); if the note has changed since, nothing is written and 409 is
+    returned with the current version. Returns {"id", "version", "updated_at"}.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'No data provided'}), 400
+        base_version = data.get('base_version')
+        if not isinstance(base_version, int) or isinstance(base_version, bool):
+            return jsonify({'error': 'base_version must be an integer'}), 400
+        title = data.get('title')
+        error = title_error(title) if title is not None else None
+        if error:
+            return jsonify({'error': error}), 400
+
+        current = db.session.execute(
+            select(Note.title, Note.content, Note.updated_at, Note.change_seq).where(Note.id == note_id, *owned())
+        ).first()
+        if current is None:
+            return jsonify({'error': 'Note not found'}), 404
+        if current.change_seq != base_version:
+            return jsonify({'error': 'Note has changed since base_version', 'version': current.change_seq}), 409
+
+        values = {}
+        if 'content_delta' in data:
+            try:
+                values['content'] = apply_delta(current.content, data['content_delta'])
+            except DeltaError as e:
+                return jsonify({'error': str(e)}), 400
+        if title is not None:
+            values['title'] = title
+        if not values:
+            return jsonify({'id': note_id, 'version': base_version})
+
+        # Core UPDATE guarded by the version: a concurrent write in between
+        # matches no row instead of being overwritten
+        now = datetime.utcnow()
+        seq = allocate_change_seq(db.session)
+        result = db.session.execute(
+            update(Note).where(Note.id == note_id, Note.change_seq == base_version)
+            .values(updated_at=now, change_seq=seq, **values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.session.rollback()
+            version = db.session.execute(select(Note.change_seq).where(Note.id == note_id)).scalar()
+            return jsonify({'error': 'Note has changed since base_version', 'version': version}), 409
+        change = {
+            'note_id': note_id, 'title': current.title, 'content': current.content,
+            'updated_at': current.updated_at, 'new_title': values.get('title', current.title),
+            'new_content': values.get('content', current.content)
+        }
+        if 'content' in values:
+            # The client's delta, inverted, is the revision: no need to diff the whole body
+            change['reverse_delta'] = invert_delta(current.content, data['content_delta'])
+        record_revisions(db.session, [change])
+        invalidate_embeddings(db.session, [note_id])
+        db.session.commit()
+
+        response = jsonify({'id': note_id, 'version': seq, 'updated_at': now.isoformat()})
+        return add_validators(response, note_etag(note_id, now, seq), now)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -55,7 +330,10 @@ def update_note(note_id):
 def delete_note(note_id):
     """Delete a specific note"""
     try:
-        note = Note.query.get_or_404(note_id)
+        note = Note.query.filter(Note.id == note_id, *owned()).first_or_404()
+        clear_note_tags(db.session, [note_id])
+        clear_embeddings(db.session, [note_id])
+        clear_revisions(db.session, [note_id])
         db.session.delete(note)
         db.session.commit()
         return '', 204
@@ -65,79 +343,459 @@ def delete_note(note_id):
 
 @note_bp.route('/notes/search', methods=['GET'])
 def search_notes():
-    """Search notes by title or content"""
+    """Full-text search over title and content, best matches first.
+
+    Supports `limit`/`offset`; each result carries a highlighted `snippet`.
+    """
     query = request.args.get('q', '')
-    if not query:
+    if not query.strip():
         return jsonify([])
-    
-    notes = Note.query.filter(
-        (Note.title.contains(query)) | (Note.content.contains(query))
-    ).order_by(Note.updated_at.desc()).all()
-    
-    return jsonify([note.to_dict() for note in notes])
+
+    try:
+        limit, offset = parse_paging(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    etag = collection_etag(current_seq(db.session))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    results = run_search(db.session, Note, query, limit=limit, offset=offset,
+                         backend=current_app.config.get('SEARCH_BACKEND'), user_id=request_user_id())
+    return add_validators(jsonify(results), etag)
+
+def note_exists(note_id):
+    """Whether the note exists and is visible to the request's user"""
+    return db.session.query(Note.id).filter(Note.id == note_id, *owned()).first() is not None
+
+@note_bp.route('/notes/<int:note_id>/revisions', methods=['GET'])
+def get_note_revisions(note_id):
+    """Past versions of a note, newest first (metadata only).
+
+    Supports `limit` and `before` (a revision number, for the next page).
+    """
+    if not note_exists(note_id):
+        abort(404)
+    try:
+        limit = max(1, min(int(request.args.get('limit', DEFAULT_REVISIONS_LIMIT)), MAX_REVISIONS_LIMIT))
+        before = request.args.get('before', type=int)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    revisions, has_more = list_revisions(db.session, note_id, limit=limit, before=before)
+    return jsonify({'revisions': revisions, 'has_more': has_more})
+
+@note_bp.route('/notes/<int:note_id>/revisions/<int:revision>', methods=['GET'])
+def get_note_revision(note_id, revision):
+    """A past version of a note, with its full content"""
+    found = revision_content(db.session, note_id, revision) if note_exists(note_id) else None
+    if found is None:
+        abort(404)
+    row, content = found
+    return jsonify({
+        'revision': row.revision,
+        'title': row.title,
+        'content': content,
+        'reason': row.reason,
+        'updated_at': row.updated_at,
+        'replaced_at': row.replaced_at
+    })
+
+@note_bp.route('/notes/<int:note_id>/revisions/<int:revision>/restore', methods=['POST'])
+def restore_note_revision(note_id, revision):
+    """Make a past version current again; the version it replaces becomes a revision"""
+    try:
+        note = Note.query.options(Note.full_note()).filter(Note.id == note_id, *owned()).first()
+        found = revision_content(db.session, note_id, revision) if note is not None else None
+        if found is None:
+            return jsonify({'error': 'Revision not found'}), 404
+        row, content = found
+        set_revision_reason(db.session, 'restore')
+        note.title = row.title
+        note.content = content
+        invalidate_embeddings(db.session, [note_id])
+        db.session.flush()
+        body = note.to_dict()
+        db.session.commit()
+        return jsonify(body)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def parse_top_k():
+    try:
+        return max(1, min(int(request.args.get('k', DEFAULT_TOP_K)), MAX_TOP_K))
+    except ValueError:
+        raise ValueError('k must be an integer')
+
+def refreshed_index():
+    """The vector index, refreshed once for this request, and its ETag.
+    The ETag is None while notes still wait for embeddings: each refresh
+    embeds more of them without a new sync sequence, so a seq-based ETag
+    would keep validating incomplete results."""
+    index = get_index(db.session)
+    if index.backlog:
+        return index, None
+    return index, collection_etag(index.seq)
+
+@note_bp.route('/notes/<int:note_id>/related', methods=['GET'])
+def get_related_notes(note_id):
+    """Notes most similar in meaning to this one: [{...note, "score": 0.83}], best first"""
+    if not embeddings_enabled():
+        return jsonify({'error': 'Embeddings are disabled'}), 503
+    try:
+        k = parse_top_k()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    index, etag = refreshed_index()
+    if etag is not None and is_not_modified(etag):
+        return not_modified_response(etag)
+    results = related_notes(db.session, note_id, k=k, user_id=request_user_id(), index=index)
+    if results is None:
+        abort(404)
+    response = jsonify(results)
+    return add_validators(response, etag) if etag is not None else response
+
+@note_bp.route('/notes/semantic-search', methods=['GET'])
+def semantic_search_notes():
+    """Notes closest in meaning to `q` (embedding similarity, top `k`)"""
+    if not embeddings_enabled():
+        return jsonify({'error': 'Embeddings are disabled'}), 503
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify([])
+    try:
+        k = parse_top_k()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    index, etag = refreshed_index()
+    if etag is not None and is_not_modified(etag):
+        return not_modified_response(etag)
+    response = jsonify(semantic_search(db.session, query, k=k, user_id=request_user_id(), index=index))
+    return add_validators(response, etag) if etag is not None else response
+
+def wants_async():
+    """Clients opt in to background execution with ?async=1 or {"async": true}"""
+    pool = current_app.extensions.get('job_pool')
+    if pool is None or pool.workers <= 0:
+        # No background workers (e.g. serverless): run inline instead
+        return False
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and data.get('async') is True
+
+def accepted(job):
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': f'/api/jobs/{job.id}'})
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response, 202
+
+@register('translate_note')
+def run_translate_note(payload):
+    """Translate a stored note in place and return its new state"""
+    note = db.session.get(Note, payload['note_id'], options=[Note.full_note()])
+    if note is None:
+        raise LookupError(f"Note {payload['note_id']} not found")
+
+    # Translate title and content concurrently
+    translated_title, translated_content = llm().translate_note_fields(
+        note.title, note.content, payload['target_language'], fresh=payload.get('fresh', False))
+
+    # Update the note with translated content; the original is kept as a revision
+    set_revision_reason(db.session, 'translate')
+    note.title = translated_title
+    note.content = translated_content
+    invalidate_embeddings(db.session, [note.id])
+    db.session.commit()
+    return note.to_dict()
 
 @note_bp.route('/notes/<int:note_id>/translate', methods=['POST'])
 def translate_note(note_id):
-    """Translate a note's title and content"""
+    """Translate a note's title and content (202 + job id when async)"""
     try:
-        note = Note.query.get_or_404(note_id)
+        Note.query.filter(Note.id == note_id, *owned()).first_or_404()
         data = request.json
         
-        if not data or 'target_language' not in data:
+        if not isinstance(data, dict) or 'target_language' not in data:
             return jsonify({'error': 'Target language is required'}), 400
         
-        target_language = data['target_language']
-        
-        # Translate title and content
-        translated_title = translate(note.title, target_language) if note.title else ""
-        translated_content = translate(note.content, target_language) if note.content else ""
-        
-        # Update the note with translated content
-        note.title = translated_title
-        note.content = translated_content
+        payload = {
+            'note_id': note_id,
+            'target_language': data['target_language'],
+            'fresh': bool(data.get('fresh', False))
+        }
+        if wants_async():
+            return accepted(enqueue('translate_note', payload, user_id=request_user_id()))
+
+        return jsonify(run_translate_note(payload))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+MAX_BULK_TRANSLATE = 100
+
+@note_bp.route('/notes/translate', methods=['POST'])
+def translate_notes():
+    """Translate many notes at once.
+
+    Body: {"note_ids": [...], "target_language": "...", "fresh": false}.
+    All LLM calls run concurrently on a bounded pool; successful notes are
+    committed in one transaction and each id gets its own status.
+    """
+    try:
+        data = request.json
+        if not isinstance(data, dict) or 'target_language' not in data:
+            return jsonify({'error': 'Target language is required'}), 400
+        note_ids = data.get('note_ids')
+        if (not isinstance(note_ids, list) or not note_ids
+                or not all(isinstance(i, int) for i in note_ids)):
+            return jsonify({'error': 'note_ids must be a non-empty list of ids'}), 400
+        if len(note_ids) > MAX_BULK_TRANSLATE:
+            return jsonify({'error': f'At most {MAX_BULK_TRANSLATE} notes per request'}), 400
+
+        note_ids = list(dict.fromkeys(note_ids))
+        notes = {note.id: note for note in
+                 Note.query.options(Note.full_note()).filter(Note.id.in_(note_ids), *owned())}
+        found = [notes[i] for i in note_ids if i in notes]
+
+        # Flatten to one task per field so the pool is never nested
+        texts = []
+        for note in found:
+            texts.extend([note.title, note.content])
+        translated = llm().translate_many(texts, data['target_language'], fresh=bool(data.get('fresh', False)))
+
+        results = []
+        by_id = {}
+        set_revision_reason(db.session, 'translate')
+        for index, note in enumerate(found):
+            title, content = translated[2 * index], translated[2 * index + 1]
+            error = next((r for r in (title, content) if isinstance(r, Exception)), None)
+            if error is not None:
+                by_id[note.id] = {'id': note.id, 'status': 'error', 'error': str(error)}
+                continue
+            note.title = title
+            note.content = content
+            by_id[note.id] = {'id': note.id, 'status': 'ok'}
+        invalidate_embeddings(db.session, [i for i, r in by_id.items() if r['status'] == 'ok'])
+        db.session.flush()
+
+        # Serialize before commit expires the notes, or each is reloaded on its own
+        for note_id in note_ids:
+            result = by_id.get(note_id, {'id': note_id, 'status': 'error', 'error': 'Note not found'})
+            if result['status'] == 'ok':
+                result['note'] = notes[note_id].to_dict()
+            results.append(result)
         db.session.commit()
-        
-        return jsonify(note.to_dict())
+
+        succeeded = sum(1 for r in results if r['status'] == 'ok')
+        return jsonify({
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded
+        })
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+class GenerationError(ValueError):
+    """The model's output couldn't be turned into a note (not retried as a job)"""
+
+@register('generate_note')
+def run_generate_note(payload):
+    """Generate and store a structured note; returns the response body"""
+    input_text = payload['text']
+
+    # Use extract_structured_notes to generate structured note
+    extracted_result = llm().extract_structured_notes(input_text, payload.get('language', 'English'),
+                                                fresh=payload.get('fresh', False))
+    return save_generated_note(input_text, extracted_result, payload.get('user_id'))
+
+def generated_fields(input_text, note_data):
+    """(title, content, tags) from the model's note object, accepting either key casing"""
+    if not isinstance(note_data, dict):
+        raise GenerationError('Failed to parse generated note structure')
+    title = note_data.get('Title', note_data.get('title', 'Generated Note'))
+    content = note_data.get('Notes', note_data.get('notes', note_data.get('content', input_text)))
+    tags = note_data.get('Tags', note_data.get('tags', []))
+    return str(title)[:200], str(content), tags
+
+def save_generated_note(input_text, extracted_result, user_id=None):
+    """Parse the model's JSON output and store it as a new note"""
+    # Parse the JSON result
+    try:
+        note_data = json.loads(extracted_result)
+    except json.JSONDecodeError:
+        raise GenerationError('Failed to parse generated note structure')
+
+    title, content, tags = generated_fields(input_text, note_data)
+    note = Note(title=title, content=content, user_id=user_id)
+    db.session.add(note)
+    db.session.flush()
+    set_note_tags(db.session, note, tags)
+    db.session.flush()
+
+    # Return the created note with extracted data, serialized before commit
+    # expires it
+    response_data = note.to_dict()
+    response_data['original_text'] = input_text
+    db.session.commit()
+    return response_data
+
 @note_bp.route('/notes/generate', methods=['POST'])
 def generate_note():
-    """Generate a structured note from user input text"""
+    """Generate a structured note from user input text (202 + job id when async)"""
     try:
         data = request.json
-        if not data or 'text' not in data:
+        # Both `text` and the Vercel app's `prompt` are accepted
+        text = (data.get('text') or data.get('prompt')) if isinstance(data, dict) else None
+        if not text:
             return jsonify({'error': 'Text input is required'}), 400
         
-        input_text = data['text']
-        language = data.get('language', 'English')
-        
-        # Use extract_structured_notes to generate structured note
-        extracted_result = extract_structured_notes(input_text, language)
-        
-        # Parse the JSON result
-        try:
-            note_data = json.loads(extracted_result)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to extract manually or return error
-            return jsonify({'error': 'Failed to parse generated note structure'}), 500
-        
-        # Create and save the note
-        title = note_data.get('Title', 'Generated Note')
-        content = note_data.get('Notes', input_text)
-        
-        note = Note(title=title, content=content)
-        db.session.add(note)
+        payload = {
+            'text': text,
+            'language': data.get('language', 'English'),
+            'fresh': bool(data.get('fresh', False)),
+            'user_id': request_user_id()
+        }
+        if wants_async():
+            return accepted(enqueue('generate_note', payload, user_id=payload['user_id']))
+
+        return jsonify(run_generate_note(payload)), 201
+    except GenerationError as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+MAX_BATCH_GENERATE = 100
+
+@note_bp.route('/notes/generate/batch', methods=['POST'])
+def generate_notes_batch():
+    """Generate one note per input text, packing many inputs into each LLM call.
+
+    Body: {"texts": [...], "language": "English", "fresh": false}.
+    Items a batched call fails to return are retried individually; all
+    generated notes are inserted in one transaction and each input gets its
+    own status, in input order.
+    """
+    try:
+        data = request.json
+        texts = data.get('texts') if isinstance(data, dict) else None
+        if (not isinstance(texts, list) or not texts
+                or not all(isinstance(text, str) and text.strip() for text in texts)):
+            return jsonify({'error': 'texts must be a non-empty list of non-empty strings'}), 400
+        if len(texts) > MAX_BATCH_GENERATE:
+            return jsonify({'error': f'At most {MAX_BATCH_GENERATE} texts per request'}), 400
+
+        extracted = llm().extract_structured_notes_batch(
+            texts, data.get('language', 'English'), fresh=bool(data.get('fresh', False)))
+
+        results, created = [], []
+        for index, (text, note_data) in enumerate(zip(texts, extracted)):
+            try:
+                if isinstance(note_data, Exception):
+                    raise note_data
+                title, content, tags = generated_fields(text, note_data)
+            except Exception as e:
+                results.append({'index': index, 'status': 'error', 'error': str(e)})
+                continue
+            note = Note(title=title, content=content, user_id=request_user_id())
+            created.append((index, note, tags))
+            results.append({'index': index, 'status': 'ok'})
+
+        db.session.add_all([note for _, note, _ in created])
+        db.session.flush()
+        tag_new_notes(db.session, [(note, tags) for _, note, tags in created])
+        db.session.flush()
+
+        # Serialize before commit expires the notes, or each is reloaded on its own
+        for index, note, _ in created:
+            results[index]['note'] = dict(note.to_dict(), original_text=texts[index])
         db.session.commit()
-        
-        # Return the created note with extracted data
-        response_data = note.to_dict()
-        response_data['tags'] = note_data.get('Tags', [])
-        response_data['original_text'] = input_text
-        
-        return jsonify(response_data), 201
+        return jsonify({
+            'results': results,
+            'succeeded': len(created),
+            'failed': len(results) - len(created)
+        })
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# ====================== Streaming (Server-Sent Events) ======================
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events):
+    """Stream an event generator; if the client disconnects Flask closes the
+    generator, which closes the upstream LLM stream and skips the final save."""
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@note_bp.route('/notes/generate/stream', methods=['POST'])
+def generate_note_stream():
+    """Generate a structured note, streaming model output as `token` events.
+    The note is saved and sent as a `done` event only once the stream completes."""
+    data = request.get_json(silent=True)
+    input_text = (data.get('text') or data.get('prompt')) if isinstance(data, dict) else None
+    if not input_text:
+        return jsonify({'error': 'Text input is required'}), 400
+
+    language = data.get('language', 'English')
+    fresh = bool(data.get('fresh', False))
+    user_id = request_user_id()
+
+    def events():
+        parts = []
+        try:
+            for delta in llm().stream_extract_structured_notes(input_text, language, fresh=fresh):
+                parts.append(delta)
+                yield sse('token', {'text': delta})
+            yield sse('done', save_generated_note(input_text, ''.join(parts), user_id))
+        except Exception as e:
+            db.session.rollback()
+            yield sse('error', {'error': str(e)})
+
+    return sse_response(events())
+
+@note_bp.route('/notes/<int:note_id>/translate/stream', methods=['POST'])
+def translate_note_stream(note_id):
+    """Translate a note, streaming `token` events tagged with the field
+    (title, then content). The note is updated only when both complete."""
+    note = Note.query.options(Note.full_note()).filter(Note.id == note_id, *owned()).first_or_404()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'target_language' not in data:
+        return jsonify({'error': 'Target language is required'}), 400
+
+    target_language = data['target_language']
+    fresh = bool(data.get('fresh', False))
+    source = {'title': note.title, 'content': note.content}
+
+    def events():
+        translated = {}
+        try:
+            for field in ('title', 'content'):
+                parts = []
+                if source[field]:
+                    for delta in llm().stream_translate(source[field], target_language, fresh=fresh):
+                        parts.append(delta)
+                        yield sse('token', {'field': field, 'text': delta})
+                translated[field] = ''.join(parts)
+
+            current = db.session.get(Note, note_id)
+            if current is None:
+                raise LookupError(f'Note {note_id} not found')
+            set_revision_reason(db.session, 'translate')
+            current.title = translated['title']
+            current.content = translated['content']
+            invalidate_embeddings(db.session, [note_id])
+            db.session.commit()
+            yield sse('done', current.to_dict())
+        except Exception as e:
+            db.session.rollback()
+            yield sse('error', {'error': str(e)})
+
+    return sse_response(events())
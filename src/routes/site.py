@@ -0,0 +1,48 @@
+import os
+from flask import Blueprint, current_app, jsonify, send_from_directory
+from sqlalchemy import text
+from src.models.user import db
+
+site_bp = Blueprint('site', __name__)
+
+
+@site_bp.route('/health')
+def health():
+    """健康检查端点 - 返回详细的系统状态"""
+    db_status = "disconnected"
+    db_error = None
+    try:
+        db.session.execute(text('SELECT 1'))
+        db_status = "connected"
+    except Exception as e:
+        db_error = str(e)
+
+    static_dir = current_app.static_folder
+    return jsonify({
+        "status": "healthy",
+        "database": db.engine.dialect.name,
+        "database_profile": current_app.config.get('DB_PROFILE'),
+        "database_url_exists": os.environ.get('DATABASE_URL') is not None,
+        "database_status": db_status,
+        "database_error": db_error,
+        "search_backend": current_app.config.get('SEARCH_BACKEND'),
+        "github_token_exists": os.environ.get('GITHUB_TOKEN') is not None,
+        "static_dir": static_dir,
+        "static_exists": os.path.exists(static_dir),
+        "index_exists": os.path.exists(os.path.join(static_dir, 'index.html'))
+    })
+
+
+@site_bp.route('/', defaults={'path': ''})
+@site_bp.route('/<path:path>')
+def serve(path):
+    static_folder_path = current_app.static_folder
+    if static_folder_path is None:
+        return "Static folder not configured", 404
+
+    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+        return send_from_directory(static_folder_path, path)
+    index_path = os.path.join(static_folder_path, 'index.html')
+    if os.path.exists(index_path):
+        return send_from_directory(static_folder_path, 'index.html')
+    return "index.html not found", 404
@@ -0,0 +1,35 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import select
+from src.models.note import Note, db
+from src.owners import init_owner_scope, owned
+from src.tags import parse_tag_filter, tag_counts, tagged_note_ids
+from src.sync import current_seq
+from src.http_cache import add_validators, collection_etag, is_not_modified, not_modified_response
+
+tag_bp = Blueprint('tag', __name__)
+init_owner_scope(tag_bp)
+
+@tag_bp.route('/tags', methods=['GET'])
+def get_tags():
+    """Tags with note counts, most used first: [{"name": ..., "count": ...}].
+
+    With `tag`/`match` (same as GET /notes) the counts are facets: only notes
+    matching that filter are counted. `limit` caps the number of tags.
+    """
+    try:
+        tags, match = parse_tag_filter(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        limit = max(0, int(request.args.get('limit', 0))) or None
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    etag = collection_etag(current_seq(db.session))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    # Count within the request user's notes
+    scoped = select(Note.id).where(*owned())
+    note_ids = scoped.where(Note.id.in_(tagged_note_ids(tags, match))) if tags else scoped
+    return add_validators(jsonify(tag_counts(db.session, note_ids=note_ids, limit=limit)), etag)
@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy import update
+from src.models.job import Job
+from src.models.note import Note, NoteTombstone
 from src.models.user import User, db
+from src.sync import allocate_change_seq
 
 user_bp = Blueprint('user', __name__)
 
@@ -34,6 +38,14 @@ def update_user(user_id):
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
+    # The user_id foreign keys are ON DELETE SET NULL, which SQLite doesn't
+    # enforce without PRAGMA foreign_keys: release the user's rows here so
+    # their notes stay reachable as unowned notes on every backend
+    seq = allocate_change_seq(db.session)
+    db.session.execute(update(Note).where(Note.user_id == user_id)
+                       .values(user_id=None, change_seq=seq, updated_at=Note.updated_at))
+    db.session.execute(update(NoteTombstone).where(NoteTombstone.user_id == user_id).values(user_id=None))
+    db.session.execute(update(Job).where(Job.user_id == user_id).values(user_id=None))
     db.session.delete(user)
     db.session.commit()
     return '', 204
@@ -0,0 +1,119 @@
+from sqlalchemy import LargeBinary, bindparam, cast, func, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from src.models.note import Note
+# Imported so create_all registers their tables
+from src.models.embedding import NoteEmbedding  # noqa: F401
+from src.models.revision import NoteRevision  # noqa: F401
+from src.models.schema import SchemaInfo
+from src.models.types import compress_min_size
+from src.search import app_indexes_notes, ensure_search_index, index_compressed_notes
+from src.sync import ensure_sync_state
+from src.tags import migrate_comma_tags
+
+# Bump whenever a model gains a table, column or index so deployed databases
+# are upgraded on their next boot.
+SCHEMA_VERSION = 10
+
+
+def upgrade_schema(db):
+    """Create missing tables, then add columns and indexes that the models
+    declare but an existing database lacks.
+
+    db.create_all() only creates whole tables, so databases created by an
+    older version (the local app.db, Supabase) would otherwise never get new
+    columns. New columns are added as nullable; code must treat NULL as the
+    column's "unset" value.
+    """
+    db.create_all()
+    engine = db.engine
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                quote = engine.dialect.identifier_preparer.quote
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}'
+                ))
+                print(f"🔧 Added column {table.name}.{column.name}")
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def _recorded_schema(db):
+    try:
+        return db.session.get(SchemaInfo, 1)
+    except (OperationalError, ProgrammingError):
+        # Fresh database: the schema_info table doesn't exist yet
+        db.session.rollback()
+        return None
+
+
+def prepare_database(app, force=False):
+    """Make sure the database schema is current; returns True if it upgraded.
+
+    The full upgrade (create_all, column/index checks, FTS setup, backfills)
+    costs dozens of round-trips, so it only runs when the recorded schema
+    version is behind. A warm database costs one primary-key lookup per boot.
+    Run `flask --app src.main init-db` to force it.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    in_memory = uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:')
+    if not force and not in_memory:
+        info = _recorded_schema(app.extensions['sqlalchemy'])
+        if info is not None and info.version == SCHEMA_VERSION:
+            app.config['SEARCH_BACKEND'] = info.search_backend
+            return False
+
+    db = app.extensions['sqlalchemy']
+    upgrade_schema(db)
+    ensure_sync_state(db.session)
+    migrate_comma_tags(db.session, Note)
+    backend = ensure_search_index(db.engine)
+
+    info = db.session.get(SchemaInfo, 1) or SchemaInfo(id=1)
+    info.version = SCHEMA_VERSION
+    info.search_backend = backend
+    db.session.add(info)
+    db.session.commit()
+    app.config['SEARCH_BACKEND'] = backend
+    return True
+
+
+def compress_note_bodies(session, batch_size=500):
+    """Rewrite plain-text note bodies at or above the compression threshold
+    so they're stored compressed (SQLite only); returns how many were rewritten.
+
+    New writes are compressed as they happen; this catches up rows written
+    before. Run VACUUM afterwards to return the freed pages to the OS.
+    """
+    threshold = compress_min_size()
+    if session.get_bind().dialect.name != 'sqlite' or threshold <= 0:
+        return 0
+    table = Note.__table__
+    # Keep updated_at as-is (it would otherwise get its onupdate timestamp)
+    rewrite = table.update().where(table.c.id == bindparam('b_id')).values(
+        content=bindparam('b_content'), updated_at=table.c.updated_at)
+    rewritten, last_id = 0, 0
+    while True:
+        rows = session.execute(
+            select(table.c.id, table.c.content)
+            .where(table.c.id > last_id, func.typeof(table.c.content) == 'text',
+                   func.length(cast(table.c.content, LargeBinary)) >= threshold)
+            .order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return rewritten
+        session.execute(rewrite, [{'b_id': row.id, 'b_content': row.content} for row in rows])
+        if app_indexes_notes():
+            # The rewrite drops the rows from the search index; see src.search
+            index_compressed_notes(session, ids=[row.id for row in rows])
+        session.commit()
+        rewritten += len(rows)
+        last_id = rows[-1].id
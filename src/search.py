@@ -0,0 +1,290 @@
+import re
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, event, or_, select, text
+from sqlalchemy.exc import OperationalError
+from src.models.note import db
+from src.models.types import plain_text
+from src.owners import ALL_USERS, owner_filter
+
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+SNIPPET_OPEN = '<mark>'
+SNIPPET_CLOSE = '</mark>'
+
+# The trigram tokenizer gives substring matching (same semantics as the old
+# LIKE search) and works for CJK text, but cannot match terms under 3 chars.
+TRIGRAM_MIN_LENGTH = 3
+
+# The index stores its own plain-text copy of each note, so the triggers are
+# plain SQL that any client (the sqlite3 shell, migration scripts) can run.
+# Compressed bodies (src/models/types.py) are the exception: a trigger can't
+# decompress them, so it leaves them out and the application indexes them
+# itself on commit (see index_compressed_notes).
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5(title, content, tokenize='trigram')""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_ai AFTER INSERT ON note
+        WHEN typeof(new.content) != 'blob' BEGIN
+        INSERT INTO note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_ad AFTER DELETE ON note BEGIN
+        DELETE FROM note_fts WHERE rowid = old.id;
+    END""",
+    # A title-only change keeps the indexed body, compressed or not
+    """CREATE TRIGGER IF NOT EXISTS note_fts_au AFTER UPDATE OF title, content ON note BEGIN
+        UPDATE note_fts SET title = new.title WHERE rowid = new.id AND new.content IS old.content;
+        DELETE FROM note_fts WHERE rowid = old.id AND new.content IS NOT old.content;
+        INSERT INTO note_fts(rowid, title, content)
+            SELECT new.id, new.title, new.content
+            WHERE new.content IS NOT old.content AND typeof(new.content) != 'blob';
+    END""",
+]
+
+# Objects of the earlier external-content indexes, which read `note` (or a
+# view over note_text()) instead of storing their own text; dropped and rebuilt
+SQLITE_LEGACY = [
+    "DROP TRIGGER IF EXISTS note_fts_ai",
+    "DROP TRIGGER IF EXISTS note_fts_ad",
+    "DROP TRIGGER IF EXISTS note_fts_au",
+    "DROP TABLE IF EXISTS note_fts",
+    "DROP VIEW IF EXISTS note_fts_source",
+]
+
+# Adds the notes the triggers left out: compressed bodies, read through the
+# note_text() function the app registers on its own connections
+SQLITE_INDEX_COMPRESSED = """
+    INSERT INTO note_fts(rowid, title, content)
+    SELECT note.id, note.title, note_text(note.content) FROM note
+    WHERE {where} AND typeof(note.content) = 'blob'
+      AND NOT EXISTS (SELECT 1 FROM note_fts WHERE note_fts.rowid = note.id)
+"""
+
+# Postgres matches substrings with ILIKE, like the SQLite trigram index and
+# the LIKE fallback, so CJK text and partial words ("note" in "footnote")
+# match on every backend. pg_trgm's GIN indexes serve those ILIKE scans; the
+# tsvector only ranks the matches.
+POSTGRES_SETUP = [
+    """ALTER TABLE note ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_note_search_vector ON note USING GIN (search_vector)",
+]
+
+POSTGRES_TRIGRAM_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_note_title_trgm ON note USING GIN (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_note_content_trgm ON note USING GIN (content gin_trgm_ops)",
+]
+
+SQLITE_QUERY = f"""
+    SELECT note.id, bm25(note_fts, 2.0, 1.0) AS rank,
+           snippet(note_fts, 1, '{SNIPPET_OPEN}', '{SNIPPET_CLOSE}', '…', 16) AS snippet
+    FROM note_fts JOIN note ON note.id = note_fts.rowid
+    WHERE note_fts MATCH :query {{owner}}
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+"""
+
+POSTGRES_QUERY = f"""
+    SELECT note.id, ts_rank(note.search_vector, q) AS rank,
+           ts_headline('simple', note.content, q,
+                       'StartSel={SNIPPET_OPEN}, StopSel={SNIPPET_CLOSE}, MaxFragments=1, MaxWords=24') AS snippet
+    FROM note, to_tsquery('simple', :query) AS q
+    WHERE {{match}} {{owner}}
+    ORDER BY rank DESC, note.updated_at DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+
+def _terms(query):
+    return [term for term in re.split(r'\s+', query.strip()) if term]
+
+
+def fts5_query(query):
+    """Quote each term as an FTS5 phrase so user input can't inject operators.
+    Returns None when any term is too short for the trigram index: FTS5 would
+    silently drop it and match on the remaining terms alone."""
+    terms = _terms(query)
+    if not terms or any(len(t) < TRIGRAM_MIN_LENGTH for t in terms):
+        return None
+    return ' '.join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def tsquery(query):
+    """AND together prefix matches of each term, stripped of tsquery syntax.
+    Only ranks Postgres results; the terms are matched with ilike_patterns()"""
+    terms = [re.sub(r"[&|!():*<>'\\\\]", ' ', t).strip() for t in _terms(query)]
+    terms = [t.split()[0] for t in terms if t]
+    if not terms:
+        return None
+    return ' & '.join(f"{t}:*" for t in terms)
+
+
+def ilike_patterns(query):
+    """A substring ILIKE pattern per term, with LIKE wildcards escaped so
+    `%` or `_` only match themselves"""
+    return ['%' + re.sub(r'([\\%_])', r'\\\1', t) + '%' for t in _terms(query)]
+
+
+def _ilike_match(patterns):
+    return ' AND '.join(
+        f"(note.title ILIKE :term{i} ESCAPE '\\' OR note.content ILIKE :term{i} ESCAPE '\\')"
+        for i in range(len(patterns))
+    )
+
+
+def ensure_search_index(engine):
+    """Create the full-text index for the current database, if supported.
+
+    SQLite gets an FTS5 table kept in sync by triggers (plus the application
+    for compressed bodies); Postgres gets pg_trgm GIN indexes for matching,
+    where the extension is available, and a generated tsvector column for
+    ranking. Returns the backend name, or None when falling back to LIKE
+    search.
+    """
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == 'sqlite':
+            try:
+                conn.execute(text('SELECT note_text(NULL)'))
+            except OperationalError:
+                raise RuntimeError(
+                    'The app\'s SQLite connections must register note_text() to read compressed notes: '
+                    'create the engine through src.engine.init_engine, or call '
+                    'src.engine.register_sqlite_functions on each raw sqlite3 connection'
+                )
+            exists = conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'note_fts'"
+            )).first()
+            if exists and 'content=' in exists.sql:
+                for statement in SQLITE_LEGACY:
+                    conn.execute(text(statement))
+                exists = None
+            try:
+                for statement in SQLITE_SETUP:
+                    conn.execute(text(statement))
+            except Exception as e:
+                print(f"⚠️ FTS5 unavailable, falling back to LIKE search: {e}")
+                return None
+            if not exists:
+                # Index any notes written before the FTS table existed
+                conn.execute(text(
+                    "INSERT INTO note_fts(rowid, title, content) SELECT id, title, note_text(content) FROM note"
+                ))
+            else:
+                # Compressed bodies written by other clients, which the triggers skip
+                conn.execute(text(SQLITE_INDEX_COMPRESSED.format(where='1 = 1')))
+            return 'fts5'
+        if dialect == 'postgresql':
+            for statement in POSTGRES_SETUP:
+                conn.execute(text(statement))
+            try:
+                with conn.begin_nested():
+                    for statement in POSTGRES_TRIGRAM_SETUP:
+                        conn.execute(text(statement))
+            except Exception as e:
+                print(f"⚠️ pg_trgm unavailable, substring search will scan notes: {e}")
+            return 'tsvector'
+    return None
+
+
+def index_compressed_notes(session, seq=None, ids=None):
+    """Index the compressed note bodies the triggers skipped, among the notes
+    written at change sequence `seq` or with the given `ids`"""
+    if ids is not None:
+        if not ids:
+            return
+        sql = text(SQLITE_INDEX_COMPRESSED.format(where='note.id IN :ids')).bindparams(
+            bindparam('ids', expanding=True))
+        session.execute(sql, {'ids': list(ids)})
+    else:
+        session.execute(text(SQLITE_INDEX_COMPRESSED.format(where='note.change_seq = :seq')), {'seq': seq})
+
+
+def app_indexes_notes():
+    """Whether writes in this app must index compressed bodies themselves"""
+    return has_app_context() and current_app.config.get('SEARCH_BACKEND') == 'fts5'
+
+
+@event.listens_for(db.session, 'before_commit')
+def _index_compressed_notes_on_write(session):
+    if not app_indexes_notes():
+        return
+    session.flush()
+    # change_seq is set once the transaction has written notes (see src.sync)
+    seq = session.info.get('change_seq')
+    if seq is not None:
+        index_compressed_notes(session, seq=seq)
+
+
+def _like_search(session, model, query, limit, offset, user_id=ALL_USERS):
+    """Substring match requiring every term, in the title or the content.
+    LIKE wildcards in a term are escaped, so `%` or `_` only match themselves."""
+    owner = owner_filter(model.user_id, user_id)
+    matches = [or_(model.title.icontains(term, autoescape=True),
+                   plain_text(model.content).icontains(term, autoescape=True))
+               for term in _terms(query)]
+    rows = session.execute(
+        select(*model.read_columns())
+        .where(*matches, *owner)
+        .order_by(model.updated_at.desc()).limit(limit).offset(offset)
+    ).all()
+    return [dict(model.row_to_dict(row), snippet=None, rank=None) for row in rows]
+
+
+def search_notes(session, model, query, limit=DEFAULT_SEARCH_LIMIT, offset=0, backend=None, user_id=ALL_USERS):
+    """Ranked full-text search. Each result is the note's read_columns() plus
+    a highlighted `snippet` and its `rank` score, read without ORM hydration.
+    With `user_id` only that user's notes match (None: unowned notes).
+
+    On SQLite that doesn't make the search cheaper: FTS5 matches against
+    every note and the hits are filtered by owner afterwards (restricting
+    the MATCH to a user's rowids costs more, one lookup per note), so a
+    user's search costs as much as a search of the whole table. Postgres
+    and the LIKE fallback apply the owner filter in the same scan.
+    """
+    if backend == 'fts5':
+        match, sql = fts5_query(query), SQLITE_QUERY
+    elif backend == 'tsvector':
+        match, sql = tsquery(query), POSTGRES_QUERY
+    else:
+        match, sql = None, None
+
+    if match is None:
+        return _like_search(session, model, query, limit, offset, user_id)
+
+    params = {'query': match, 'limit': limit, 'offset': offset}
+    if user_id is ALL_USERS:
+        owner = ''
+    elif user_id is None:
+        owner = 'AND note.user_id IS NULL'
+    else:
+        owner, params['user_id'] = 'AND note.user_id = :user_id', user_id
+    if backend == 'tsvector':
+        patterns = ilike_patterns(query)
+        params.update((f'term{i}', pattern) for i, pattern in enumerate(patterns))
+        sql = sql.format(match=_ilike_match(patterns), owner=owner)
+    else:
+        sql = sql.format(owner=owner)
+    hits = session.execute(text(sql), params).all()
+    if not hits:
+        return []
+    rows = session.execute(
+        select(*model.read_columns()).where(model.id.in_([h.id for h in hits]))
+    ).all()
+    notes = {row.id: model.row_to_dict(row) for row in rows}
+    return [
+        dict(notes[h.id], snippet=h.snippet, rank=h.rank)
+        for h in hits if h.id in notes
+    ]
+
+
+def parse_paging(args):
+    """Read limit/offset query args, clamped to sane bounds"""
+    try:
+        limit = int(args.get('limit', DEFAULT_SEARCH_LIMIT))
+        offset = int(args.get('offset', 0))
+    except (TypeError, ValueError):
+        raise ValueError('limit and offset must be integers')
+    return max(1, min(limit, MAX_SEARCH_LIMIT)), max(0, offset)
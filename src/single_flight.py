@@ -0,0 +1,93 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: coalesce within the process only
+    fcntl = None
+
+# Cross-process locks are striped over a fixed set of files so the lock
+# directory doesn't grow with every distinct request
+LOCK_STRIPES = 1024
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait and receive the same result, or the
+    same exception. Nothing is remembered once the call finishes; caching
+    is the caller's job.
+
+    With `lock_dir`, leaders in different processes also serialize on a file
+    lock per key, and `recheck` (typically a shared-cache lookup) runs once
+    the lock is held, so a process that waited can reuse another process's
+    result instead of calling again.
+    """
+
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'followers': 0}
+
+    def do(self, key, fn, recheck=None):
+        """Return fn(), shared with concurrent callers using the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats['followers'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['leaders'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._process_lock(key):
+                result = recheck() if recheck is not None and self.lock_dir else None
+                call.result = result if result is not None else fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    @contextmanager
+    def _process_lock(self, key):
+        if not self.lock_dir:
+            yield
+            return
+        stripe = int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) % LOCK_STRIPES
+        with open(os.path.join(self.lock_dir, f'{stripe:04d}.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
@@ -0,0 +1,112 @@
+from sqlalchemy import and_, event, or_, select, update
+from src.models.note import Note, NoteTombstone, SyncState, db
+from src.owners import ALL_USERS, owner_filter
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+
+class SyncCursorError(ValueError):
+    pass
+
+
+def allocate_change_seq(session):
+    """Return this transaction's change sequence, taking the next one from
+    the counter row on first use. The UPDATE locks the row until commit, so
+    sequence order matches commit order and a cursor never skips a write."""
+    seq = session.info.get('change_seq')
+    if seq is None:
+        conn = session.connection()
+        conn.execute(update(SyncState).where(SyncState.id == 1).values(last_seq=SyncState.last_seq + 1))
+        seq = conn.execute(select(SyncState.last_seq).where(SyncState.id == 1)).scalar_one()
+        session.info['change_seq'] = seq
+    return seq
+
+
+def current_seq(session):
+    return session.execute(select(SyncState.last_seq).where(SyncState.id == 1)).scalar() or 0
+
+
+def ensure_sync_state(session):
+    """Create the counter row and stamp notes written before sync existed"""
+    if session.get(SyncState, 1) is None:
+        session.add(SyncState(id=1, last_seq=0))
+    # Keep updated_at as-is (it would otherwise get its onupdate timestamp)
+    session.execute(update(Note).where(Note.change_seq.is_(None))
+                    .values(change_seq=0, updated_at=Note.updated_at))
+    session.commit()
+
+
+@event.listens_for(db.session, 'before_flush')
+def _stamp_note_changes(session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, Note)]
+    changed += [obj for obj in session.dirty if isinstance(obj, Note) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Note)]
+    if not changed and not deleted:
+        return
+    seq = allocate_change_seq(session)
+    for note in changed:
+        note.change_seq = seq
+    for note in deleted:
+        session.add(NoteTombstone(note_id=note.id, user_id=note.user_id, change_seq=seq))
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def _reset_change_seq(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('change_seq', None)
+
+
+def parse_cursor(value):
+    """Cursors are "<seq>" or "<seq>:<note id>" (a position inside a large transaction)"""
+    if value is None or value == '':
+        return -1, None
+    try:
+        seq, _, note_id = value.partition(':')
+        return int(seq), (int(note_id) if note_id else None)
+    except ValueError:
+        raise SyncCursorError('Invalid cursor')
+
+
+def changes_since(session, since=None, limit=DEFAULT_CHANGES_LIMIT, user_id=ALL_USERS):
+    """Notes written and ids deleted after `since`, oldest change first.
+
+    Returns {'notes', 'deleted', 'cursor', 'has_more'}; pass `cursor` back
+    as `since` to continue. Omitting `since` performs a full sync. Clients
+    should apply `deleted` before upserting `notes`: a listed note is always
+    its latest live state, even if SQLite reused the id of a deleted one.
+    With `user_id` only that user's notes and deletions are listed (None:
+    unowned ones; deletions recorded before tombstones kept their owner
+    count as unowned).
+    """
+    since_seq, since_id = parse_cursor(since)
+    # Read the counter first: anything committed later is left for the next call
+    upto = current_seq(session)
+
+    after_cursor = Note.change_seq > since_seq
+    if since_id is not None:
+        # Resume inside a transaction that didn't fit on the previous page
+        after_cursor = or_(after_cursor, and_(Note.change_seq == since_seq, Note.id > since_id))
+    after_cursor = and_(*owner_filter(Note.user_id, user_id), after_cursor)
+    notes = session.query(Note).options(Note.full_note()).filter(after_cursor, Note.change_seq <= upto) \
+        .order_by(Note.change_seq, Note.id).limit(limit + 1).all()
+
+    has_more = len(notes) > limit
+    notes = notes[:limit]
+    if has_more:
+        last = notes[-1]
+        end_seq, cursor = last.change_seq, f'{last.change_seq}:{last.id}'
+    else:
+        end_seq, cursor = upto, str(upto)
+
+    owner = owner_filter(NoteTombstone.user_id, user_id)
+    deleted = session.query(NoteTombstone.note_id).filter(
+        NoteTombstone.change_seq > since_seq, NoteTombstone.change_seq <= end_seq, *owner
+    ).order_by(NoteTombstone.change_seq).all()
+
+    return {
+        'notes': [note.to_dict() for note in notes],
+        'deleted': [row.note_id for row in deleted],
+        'cursor': cursor,
+        'has_more': has_more
+    }
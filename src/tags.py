@@ -0,0 +1,150 @@
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from src.models.tag import Tag, note_tag
+
+MAX_TAG_LENGTH = 50
+MAX_TAGS_PER_NOTE = 20
+# Length of the comma-joined Note.tags column (String(500))
+MAX_JOINED_TAGS_LENGTH = 500
+MAX_FILTER_TAGS = 10
+MIGRATION_BATCH_SIZE = 500
+
+
+def normalize_tags(tags):
+    """Clean a list (or comma-joined string) of tags: trimmed, de-duplicated,
+    order kept. Commas are dropped since Note.tags stores them comma-joined;
+    tags that would push that copy past its column length are dropped too."""
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    if not isinstance(tags, (list, tuple)):
+        return []
+    names, joined_length = [], -1
+    for tag in tags:
+        name = ' '.join(str(tag).replace(',', ' ').split())[:MAX_TAG_LENGTH]
+        if not name or name in names:
+            continue
+        if len(names) == MAX_TAGS_PER_NOTE or joined_length + 1 + len(name) > MAX_JOINED_TAGS_LENGTH:
+            break
+        names.append(name)
+        joined_length += 1 + len(name)
+    return names
+
+
+def tag_ids(session, names):
+    """Map tag names to ids, creating the missing tags"""
+    if not names:
+        return {}
+    lookup = select(Tag.name, Tag.id).where(Tag.name.in_(names))
+    ids = dict(session.execute(lookup).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        try:
+            with session.begin_nested():
+                session.execute(insert(Tag), [{'name': name} for name in missing])
+        except IntegrityError:
+            pass  # another request created some of them first
+        ids = dict(session.execute(lookup).all())
+    return ids
+
+
+def set_note_tags(session, note, tags):
+    """Replace a note's tags: the link rows and the denormalized Note.tags
+    copy the read path serves. The note must have been flushed (have an id)."""
+    names = normalize_tags(tags)
+    ids = tag_ids(session, names)
+    session.execute(delete(note_tag).where(note_tag.c.note_id == note.id))
+    if names:
+        session.execute(insert(note_tag), [{'note_id': note.id, 'tag_id': ids[name]} for name in names])
+    note.tags = ','.join(names)
+    return names
+
+
+def tag_new_notes(session, notes_and_tags):
+    """set_note_tags for many freshly inserted notes at once: one tag lookup
+    and one link insert for the whole batch"""
+    names_by_note = [(note, normalize_tags(tags)) for note, tags in notes_and_tags]
+    link_note_tags(session, [(note.id, names) for note, names in names_by_note])
+    for note, names in names_by_note:
+        note.tags = ','.join(names)
+
+
+def link_note_tags(session, names_by_note_id):
+    """Insert the note_tag links for (note id, normalized names) pairs of
+    notes that have none yet; the caller writes Note.tags itself"""
+    ids = tag_ids(session, sorted({name for _, names in names_by_note_id for name in names}))
+    links = [{'note_id': note_id, 'tag_id': ids[name]} for note_id, names in names_by_note_id for name in names]
+    if links:
+        session.execute(insert(note_tag), links)
+
+
+def clear_note_tags(session, note_ids):
+    """Drop the links of deleted notes (SQLite doesn't enforce ON DELETE CASCADE by default)"""
+    session.execute(delete(note_tag).where(note_tag.c.note_id.in_(note_ids)))
+
+
+def parse_tag_filter(args):
+    """Read `tag` (repeatable or comma-separated) and `match` (all|any) from
+    the query string; returns (names, match) or (None, None) if unfiltered"""
+    names = normalize_tags([part for value in args.getlist('tag') for part in value.split(',')])
+    if not names:
+        return None, None
+    if len(names) > MAX_FILTER_TAGS:
+        raise ValueError(f'At most {MAX_FILTER_TAGS} tags per filter')
+    match = args.get('match', 'all').lower()
+    if match not in ('all', 'any'):
+        raise ValueError('match must be "all" or "any"')
+    return names, match
+
+
+def tagged_note_ids(names, match='all'):
+    """Subquery of the ids of notes carrying all (AND) or any (OR) of the tags"""
+    stmt = (select(note_tag.c.note_id)
+            .join(Tag, Tag.id == note_tag.c.tag_id)
+            .where(Tag.name.in_(names)))
+    if match == 'all' and len(names) > 1:
+        # Each (note, tag) link is unique, so a note matches every tag iff it has len(names) hits
+        stmt = stmt.group_by(note_tag.c.note_id).having(func.count() == len(names))
+    return stmt
+
+
+def tag_counts(session, note_ids=None, limit=None):
+    """Tags with the number of notes carrying each, most used first.
+
+    Pass a note-id subquery (e.g. tagged_note_ids(...)) to count only within
+    those notes, which gives the facet counts for a filtered list.
+    """
+    count = func.count(note_tag.c.note_id).label('count')
+    stmt = (select(Tag.name, count)
+            .join(note_tag, note_tag.c.tag_id == Tag.id)
+            .group_by(Tag.id, Tag.name)
+            .order_by(count.desc(), Tag.name))
+    if note_ids is not None:
+        stmt = stmt.where(note_tag.c.note_id.in_(note_ids))
+    if limit:
+        stmt = stmt.limit(limit)
+    return [row._asdict() for row in session.execute(stmt)]
+
+
+def migrate_comma_tags(session, model, batch_size=MIGRATION_BATCH_SIZE):
+    """Create link rows for notes that only have the legacy comma-joined
+    tags column. Safe to re-run: notes that already have links are skipped."""
+    linked = select(note_tag.c.note_id).where(note_tag.c.note_id == model.id).exists()
+    stmt = (select(model.id, model.tags)
+            .where(model.tags.is_not(None), model.tags != '', ~linked)
+            .order_by(model.id))
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = session.execute(stmt.where(model.id > last_id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        tags_by_note = {row.id: normalize_tags(row.tags) for row in rows}
+        ids = tag_ids(session, sorted({name for names in tags_by_note.values() for name in names}))
+        links = [{'note_id': note_id, 'tag_id': ids[name]}
+                 for note_id, names in tags_by_note.items() for name in names]
+        if links:
+            session.execute(insert(note_tag), links)
+        migrated += len(rows)
+    session.commit()
+    return migrated
@@ -0,0 +1,151 @@
+import zlib
+from datetime import datetime
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from src.bulk import TITLE_MAX_LENGTH, insert_returning_ids
+from src.fast_json import dumps_bytes, loads
+from src.models.note import Note
+from src.owners import ALL_USERS, owner_filter
+from src.sync import allocate_change_seq
+from src.tags import link_note_tags, normalize_tags
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+class TransferError(ValueError):
+    pass
+
+
+def export_columns():
+    return (Note.id, Note.title, Note.content, Note.tags, Note.user_id, Note.created_at, Note.updated_at)
+
+
+def iter_export(session, batch_size=EXPORT_BATCH_SIZE, user_id=ALL_USERS):
+    """Yield the whole corpus (or one user's notes, None: the unowned ones)
+    as NDJSON, one chunk
+    per batch of notes.
+
+    yield_per streams rows through a server-side cursor on Postgres (SQLite
+    steps its cursor lazily anyway), so memory stays flat at any table size.
+    """
+    stmt = select(*export_columns()).where(*owner_filter(Note.user_id, user_id))
+    result = session.execute(stmt.order_by(Note.id).execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield b''.join(dumps_bytes(Note.row_to_dict(row)) + b'\n' for row in rows)
+
+
+def gzip_chunks(chunks, level=6):
+    """gzip-encode a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _timestamp(value, field):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise TransferError(f'{field} must be an ISO 8601 string')
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise TransferError(f'{field} must be an ISO 8601 string')
+
+
+def parse_record(line, keep_ids=False):
+    """Validate one exported note; returns (row values, tag names)"""
+    try:
+        record = loads(line)
+    except ValueError:
+        raise TransferError('Invalid JSON')
+    if not isinstance(record, dict):
+        raise TransferError('Line must be a JSON object')
+    title, content = record.get('title'), record.get('content')
+    if not isinstance(title, str) or not title:
+        raise TransferError('title must be a non-empty string')
+    if len(title) > TITLE_MAX_LENGTH:
+        raise TransferError(f'title is longer than {TITLE_MAX_LENGTH} characters')
+    if not isinstance(content, str):
+        raise TransferError('content must be a string')
+    names = normalize_tags(record.get('tags') or [])
+    now = datetime.utcnow()
+    values = {
+        'title': title,
+        'content': content,
+        'tags': ','.join(names),
+        'created_at': _timestamp(record.get('created_at'), 'created_at') or now,
+        'updated_at': _timestamp(record.get('updated_at'), 'updated_at') or now,
+    }
+    if keep_ids:
+        note_id = record.get('id')
+        if not isinstance(note_id, int) or isinstance(note_id, bool):
+            raise TransferError('id is required with keep_ids')
+        values['id'] = note_id
+    return values, names
+
+
+def _insert_batch(session, batch, user_id):
+    seq = allocate_change_seq(session)
+    ids = insert_returning_ids(session, Note, [dict(values, change_seq=seq, user_id=user_id) for values, _ in batch])
+    link_note_tags(session, [(note_id, names) for note_id, (_, names) in zip(ids, batch)])
+    session.commit()
+
+
+def _reset_id_sequence(session):
+    """After inserting explicit ids, move Postgres' id sequence past them"""
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(text(
+            "SELECT setval(pg_get_serial_sequence('note', 'id'), COALESCE((SELECT MAX(id) FROM note), 1))"
+        ))
+        session.commit()
+
+
+def import_notes(session, lines, batch_size=IMPORT_BATCH_SIZE, keep_ids=False, user_id=None):
+    """Insert notes from NDJSON lines (as produced by iter_export).
+
+    Lines are read lazily and inserted with multi-row INSERTs (see
+    insert_returning_ids), each batch committed on its own, so an upload of
+    any size is never held in memory. Invalid lines are skipped and reported by line number. By
+    default notes get new ids; keep_ids=True keeps the exported ones (for
+    migrating into an empty database). Imported notes belong to `user_id`
+    (exported owners aren't kept: users aren't part of the export).
+    Returns {"imported", "skipped", "errors"}.
+    """
+    stats = {'imported': 0, 'skipped': 0, 'errors': []}
+    batch = []
+    first_line = 1
+
+    def flush():
+        try:
+            _insert_batch(session, batch, user_id)
+        except IntegrityError:
+            session.rollback()
+            error = TransferError(f'Lines {first_line}-{number}: note ids already exist')
+            error.stats = stats
+            raise error
+        stats['imported'] += len(batch)
+
+    number = 0
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            batch.append(parse_record(line, keep_ids))
+        except TransferError as e:
+            stats['skipped'] += 1
+            if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                stats['errors'].append({'line': number, 'error': str(e)})
+            continue
+        if len(batch) >= batch_size:
+            flush()
+            batch, first_line = [], number + 1
+    if batch:
+        flush()
+    if keep_ids and stats['imported']:
+        _reset_id_sequence(session)
+    return stats
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+from benchmarks.load import percentile
+from benchmarks.mock_llm import start_mock_server
+from src.llm_client import LLMClientManager
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_mock_llm_server():
+    """The offline stand-in answers extraction prompts with note JSON"""
+    server, base_url = start_mock_server(latency=0)
+    manager = LLMClientManager(max_retries=0)
+    try:
+        response = manager.chat_completion(base_url, 'mock-token', model='mock', messages=[
+            {'role': 'system', 'content': 'Extract... Title ... Notes ... Tags'},
+            {'role': 'user', 'content': 'Badminton tmr 5pm'}])
+        note = json.loads(response.choices[0].message.content)
+        assert note['Title'] == 'Badminton tmr 5pm' and note['Tags'] == ['badminton', 'tmr', '5pm']
+        assert response.usage.completion_tokens > 0
+        assert list(manager.stream_chat_completion(base_url, 'mock-token', model='mock', messages=[
+            {'role': 'user', 'content': 'Translate the following text to French: hello'}])) == ['[French]', ' hello']
+    finally:
+        manager.close()
+        server.shutdown()
+
+
+def test_load_benchmark_smoke():
+    """A tiny offline run completes every scenario without errors"""
+    assert percentile([1, 2, 3, 4], 50) == 2 and percentile([1, 2, 3, 4], 99) == 4
+    assert percentile(list(range(1, 31)), 95) == 29 and percentile([1, 2, 3, 4, 5], 50) == 3
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'results.json')
+        env = {key: value for key, value in os.environ.items() if key != 'DATABASE_URL'}
+        subprocess.run([sys.executable, 'benchmarks/load.py', '--notes', '200', '--requests', '10',
+                        '--concurrency', '2', '--llm-latency', '0', '--json', out],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+        with open(out) as f:
+            results = json.load(f)['results']
+    assert [r['scenario'] for r in results] == ['list', 'get', 'search', 'create', 'update', 'generate', 'generate_batch', 'translate']
+    assert all(r['requests'] == 10 and r['errors'] == 0 for r in results)
+
+
+def test_ownership_benchmark_smoke():
+    """A tiny per-user run times every scenario with and without the user indexes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {key: value for key, value in os.environ.items() if key != 'DATABASE_URL'}
+        output = subprocess.run([sys.executable, 'benchmarks/ownership.py', '--users', '5', '--notes-per-user', '40',
+                                 '--queries', '3', '--db', os.path.join(tmp, 'owners.db')],
+                                cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    for scenario in ('list page (50)', 'count', 'changes feed (500)'):
+        assert scenario in output
+    assert 'search' not in output
+
+
+def test_autosave_benchmark_smoke():
+    """A tiny run times PATCH, PUT and the revision diff for each note size"""
+    env = {key: value for key, value in os.environ.items() if key != 'DATABASE_URL'}
+    output = subprocess.run([sys.executable, 'benchmarks/autosave.py', '--sizes', '1000,20000', '--edits', '3'],
+                            cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    assert 'make_delta' in output and '20,000' in output
+
+
+if __name__ == "__main__":
+    test_mock_llm_server()
+    test_load_benchmark_smoke()
+    test_ownership_benchmark_smoke()
+    test_autosave_benchmark_smoke()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import event
+from src.main import app
+from src.models.note import Note, db
+from src import metrics
+
+
+def test_bulk_operations():
+    """Mixed operations apply in one request with per-item errors"""
+    client = app.test_client()
+    with app.app_context():
+        db.session.query(Note).delete()
+        db.session.commit()
+
+    created = client.post('/api/notes/bulk', json={'batch_size': 7, 'operations': [
+        {'op': 'create', 'title': f'Note {i}', 'content': f'Body {i}'} for i in range(20)
+    ]}).get_json()
+    assert created['created'] == 20 and created['failed'] == 0
+    ids = [r['id'] for r in created['results']]
+    assert [client.get(f'/api/notes/{i}').get_json()['title'] for i in ids[:3]] == ['Note 0', 'Note 1', 'Note 2']
+
+    body = client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'update', 'id': ids[0], 'title': 'Renamed'},
+        {'op': 'update', 'id': ids[1], 'content': 'New body'},
+        {'op': 'delete', 'id': ids[2]},
+        {'op': 'delete', 'id': 999999},
+        {'op': 'create', 'title': ''},
+        {'op': 'update', 'id': ids[0], 'content': 'twice'},
+    ]}).get_json()
+    assert (body['updated'], body['deleted'], body['failed']) == (2, 1, 3)
+    assert [r['status'] for r in body['results']] == ['ok', 'ok', 'ok', 'error', 'error', 'error']
+    assert body['results'][3]['error'] == 'Note not found'
+
+    note = client.get(f'/api/notes/{ids[0]}').get_json()
+    assert (note['title'], note['content']) == ('Renamed', 'Body 0')
+    assert client.get(f'/api/notes/{ids[2]}').status_code == 404
+
+    # Atomic requests write nothing if any item is invalid
+    response = client.post('/api/notes/bulk', json={'atomic': True, 'operations': [
+        {'op': 'delete', 'id': ids[3]}, {'op': 'delete', 'id': 999999},
+    ]})
+    assert response.status_code == 400
+    assert client.get(f'/api/notes/{ids[3]}').status_code == 200
+
+
+def test_bulk_create_statement_count():
+    """Creates go out as multi-row INSERTs, not one statement per note"""
+    client = app.test_client()
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('INSERT INTO NOTE '):
+            inserts.append(statement)
+
+    n_plus_one = metrics.db_n_plus_one.value('/api/notes/bulk')
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_inserts)
+    try:
+        body = client.post('/api/notes/bulk', json={'batch_size': 500, 'operations': [
+            {'op': 'create', 'title': f'Counted {i}', 'content': f'Body {i}'} for i in range(100)
+        ]}).get_json()
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', count_inserts)
+
+    assert body['created'] == 100
+    assert len(inserts) == 1
+    assert metrics.db_n_plus_one.value('/api/notes/bulk') == n_plus_one
+    # Ids still line up with the operations that created them
+    ids = [r['id'] for r in body['results']]
+    assert ids == sorted(ids)
+    assert client.get(f'/api/notes/{ids[57]}').get_json()['title'] == 'Counted 57'
+
+
+if __name__ == "__main__":
+    test_bulk_operations()
+    test_bulk_create_statement_count()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import threading
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.chunking import estimate_tokens, split_into_chunks
+
+NOTE = (
+    "# Trip plan\n\n"
+    "Flights are booked. Hotel is not yet confirmed!\n\n"
+    "```\nitinerary = load()\n\nprint(itinerary)\n```\n\n"
+    "- pack charger\n- pack passport\n\n"
+    + "We should visit the old town early in the morning. " * 40
+)
+
+
+def test_split_preserves_text():
+    """Chunks respect the size budget and join back to the original exactly"""
+    for max_tokens in (8, 40, 200, 10000):
+        chunks = split_into_chunks(NOTE, max_tokens)
+        assert ''.join(chunk + separator for chunk, separator in chunks) == NOTE
+        assert all(estimate_tokens(chunk) <= max_tokens for chunk, _ in chunks)
+    # A fenced block is kept whole when it fits
+    fence = "```\nitinerary = load()\n\nprint(itinerary)\n```"
+    for max_tokens in (20, 40):
+        assert any(fence in chunk for chunk, _ in split_into_chunks(NOTE, max_tokens))
+    assert estimate_tokens('你好世界') == 4
+
+
+def test_translate_long_note_in_parallel_chunks():
+    """Long notes are translated chunk by chunk, bounded, and reassembled in order"""
+    import src.llm as llm
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fake_completion(*args, **kwargs):
+        text = kwargs['messages'][-1]['content'].split(': ', 1)[1]
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f' {text.upper()} \n'))])
+
+    original = (llm.token, llm.client_manager.chat_completion, llm.cache_enabled, llm.chunk_tokens)
+    llm.token, llm.client_manager.chat_completion, llm.cache_enabled = 'test-token', fake_completion, False
+    llm.chunk_tokens = 60
+    try:
+        translated = llm.translate_chunked(NOTE, 'Upper', parallelism=2)
+        assert translated == NOTE.upper()
+        assert peak[0] == 2
+        assert llm.translate(NOTE, 'Upper') == NOTE.upper()
+        assert ''.join(llm.stream_translate(NOTE, 'Upper')) == NOTE.upper()
+    finally:
+        llm.token, llm.client_manager.chat_completion, llm.cache_enabled, llm.chunk_tokens = original
+
+
+if __name__ == "__main__":
+    test_split_preserves_text()
+    test_translate_long_note_in_parallel_chunks()
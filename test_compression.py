@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql
+from src.main import app
+from src.models.note import Note, db
+from src.models.types import CompressedText
+
+BIG = 'The quick brown fox jumps over the lazy dog. ' * 200
+
+
+def storage(note_id):
+    with app.app_context():
+        return db.session.execute(
+            text('SELECT typeof(content), length(content) FROM note WHERE id = :id'), {'id': note_id}
+        ).one()
+
+
+def test_large_bodies_compressed_transparently():
+    """Large bodies are stored compressed; reads, previews and search see plain text"""
+    client = app.test_client()
+    big = client.post('/api/notes', json={'title': 'Big', 'content': BIG + 'zanzibar'}).get_json()
+    small = client.post('/api/notes', json={'title': 'Small', 'content': 'short'}).get_json()
+
+    kind, size = storage(big['id'])
+    assert kind == 'blob' and size < len(BIG) / 10
+    assert storage(small['id'])[0] == 'text'
+
+    assert big['content'] == BIG + 'zanzibar'
+    assert client.get(f"/api/notes/{big['id']}").get_json()['content'] == BIG + 'zanzibar'
+    page = client.get('/api/notes?limit=200').get_json()['notes']
+    assert next(n for n in page if n['id'] == big['id'])['preview'] == BIG[:120]
+    hits = client.get('/api/notes/search?q=zanzibar').get_json()
+    assert [h['id'] for h in hits] == [big['id']] and '<mark>zan' in hits[0]['snippet']
+
+    client.put(f"/api/notes/{big['id']}", json={'content': 'now small'})
+    assert storage(big['id'])[0] == 'text'
+    assert client.get('/api/notes/search?q=zanzibar').get_json() == []
+
+    # Non-string bodies are rejected before they reach the column type
+    for content in (5, None, ['x']):
+        assert client.post('/api/notes', json={'title': 'Bad', 'content': content}).status_code == 400
+        assert client.put(f"/api/notes/{big['id']}", json={'content': content}).status_code == 400
+    assert client.get(f"/api/notes/{big['id']}").get_json()['content'] == 'now small'
+
+    # Postgres already compresses large values itself and indexes the text in SQL
+    assert CompressedText().process_bind_param(BIG, postgresql.dialect()) == BIG
+
+
+def test_content_is_deferred():
+    """Loading notes doesn't read bodies unless asked; setting one still keeps a revision"""
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Deferred', 'content': BIG}).get_json()
+    with app.app_context():
+        loaded = db.session.get(Note, note['id'])
+        assert 'content' not in inspect(loaded).dict
+        db.session.expunge_all()
+        assert 'content' in inspect(db.session.get(Note, note['id'], options=[Note.full_note()])).dict
+        db.session.expunge_all()
+
+        loaded = db.session.get(Note, note['id'])
+        loaded.content = 'replaced'
+        db.session.commit()
+    revisions = client.get(f"/api/notes/{note['id']}/revisions").get_json()['revisions']
+    assert client.get(f"/api/notes/{note['id']}/revisions/{revisions[0]['revision']}").get_json()['content'] == BIG
+
+
+def test_compress_existing_bodies():
+    """compress-notes rewrites bodies stored before compression, keeping
+    timestamps and the notes' place in the search index"""
+    with app.app_context():
+        note_id = db.session.execute(text(
+            "INSERT INTO note (title, content, updated_at) VALUES ('Legacy', :content, '2020-01-01 00:00:00') RETURNING id"
+        ), {'content': BIG + 'mombasa'}).scalar()
+        db.session.commit()
+    assert storage(note_id)[0] == 'text'
+
+    result = app.test_cli_runner().invoke(args=['compress-notes'])
+    assert result.exit_code == 0 and 'Compressed' in result.output
+    assert storage(note_id)[0] == 'blob'
+    note = app.test_client().get(f'/api/notes/{note_id}').get_json()
+    assert note['content'] == BIG + 'mombasa' and note['updated_at'].startswith('2020-01-01')
+    assert [h['id'] for h in app.test_client().get('/api/notes/search?q=mombasa').get_json()] == [note_id]
+
+
+if __name__ == "__main__":
+    test_large_bodies_compressed_transparently()
+    test_content_is_deferred()
+    test_compress_existing_bodies()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+from src.models.embedding import NoteEmbedding
+from src.models.job import Job
+from src.models.note import db
+from src.embeddings import EMBED_JOB, HashingEmbedder, VectorIndex, pack
+from src.jobs import run_pending
+import src.embeddings as embeddings
+
+
+def test_related_and_semantic_search():
+    """Similar notes rank first; the index follows creates, updates and deletes"""
+    client = app.test_client()
+
+    def create(title, content):
+        return client.post('/api/notes', json={'title': title, 'content': content}).get_json()['id']
+
+    badminton = create('Badminton club', 'Play badminton with the club at the sports hall on Friday')
+    tennis = create('Sports hall booking', 'Book the sports hall for badminton and tennis practice')
+    budget = create('Quarterly budget', 'Review the marketing budget spreadsheet before the finance meeting')
+
+    related = client.get(f'/api/notes/{badminton}/related?k=5').get_json()
+    assert related[0]['id'] == tennis and badminton not in [r['id'] for r in related]
+    assert 0 < related[0]['score'] <= 1
+
+    hits = client.get('/api/notes/semantic-search?q=finance+budget+review').get_json()
+    assert hits[0]['id'] == budget
+
+    # Incremental refresh: an update and a delete are picked up
+    client.put(f'/api/notes/{budget}', json={'content': 'Badminton tournament at the sports hall'})
+    assert client.get(f'/api/notes/{badminton}/related').get_json()[0]['id'] in (tennis, budget)
+    client.delete(f'/api/notes/{tennis}')
+    assert tennis not in [r['id'] for r in client.get(f'/api/notes/{badminton}/related').get_json()]
+
+    assert client.get('/api/notes/999999/related').status_code == 404
+    assert client.get('/api/notes/semantic-search?q=x&k=abc').status_code == 400
+
+
+def test_vector_index_backends_agree():
+    """The NumPy index and the pure-Python fallback return the same ranking"""
+    embedder = HashingEmbedder(dim=64)
+    texts = ['apples and pears', 'pears and plums', 'rust compiler errors', 'python compiler', 'fruit salad apples']
+    fast, slow = VectorIndex(64), VectorIndex(64, use_numpy=False)
+    for index in (fast, slow):
+        for i, vector in enumerate(embedder.embed(texts)):
+            index.upsert(i, pack(vector))
+        index.remove(2)
+    query = embedder.embed_one('apples')
+    assert [i for i, _ in fast.search(query, 3)] == [i for i, _ in slow.search(query, 3)]
+    assert 2 not in [i for i, _ in fast.search(embedder.embed_one('rust compiler'), 5)]
+
+
+def embedded_count():
+    with app.app_context():
+        return db.session.query(NoteEmbedding).count()
+
+
+def test_writes_defer_embedding_to_index_refresh():
+    """Writes never call the embedding backend; queries embed a capped batch at a time"""
+    calls = []
+    original_embed, original_limit = HashingEmbedder.embed, embeddings.EMBED_REFRESH_LIMIT
+
+    def counting_embed(self, texts):
+        calls.append(len(texts))
+        return original_embed(self, texts)
+
+    HashingEmbedder.embed = counting_embed
+    embeddings.EMBED_REFRESH_LIMIT = 3
+    try:
+        client = app.test_client()
+        note = client.post('/api/notes', json={'title': 'Deferred', 'content': 'embedding later'}).get_json()
+        client.put(f"/api/notes/{note['id']}", json={'content': 'embedding much later'})
+        version = client.get(f"/api/notes/{note['id']}").get_json()['version']
+        assert client.patch(f"/api/notes/{note['id']}", json={
+            'base_version': version, 'content_delta': [{'insert': 'no '}]}).status_code == 200
+        assert calls == []
+
+        # A fresh process: nothing loaded, no vectors stored yet
+        with app.app_context():
+            db.session.query(NoteEmbedding).delete()
+            db.session.commit()
+        app.extensions.pop('embedding_index', None)
+        for i in range(5):
+            client.post('/api/notes', json={'title': f'Backlog {i}', 'content': 'waiting for a vector'})
+
+        partial = client.get('/api/notes/semantic-search?q=vector')
+        assert embedded_count() == 3
+        assert app.extensions['embedding_index'].backlog
+        # Incomplete results carry no validator, so clients can't pin them with a 304
+        assert partial.headers.get('ETag') is None
+        client.get('/api/notes/semantic-search?q=vector')
+        assert embedded_count() == 6
+        assert max(calls) <= 3
+
+        # Once the backlog is worked off, the rewritten note is found again
+        while app.extensions['embedding_index'].backlog:
+            client.get('/api/notes/semantic-search?q=vector')
+        response = client.get('/api/notes/semantic-search?q=no+embedding+much+later')
+        assert response.get_json()[0]['id'] == note['id']
+        assert client.get('/api/notes/semantic-search?q=no+embedding+much+later',
+                          headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    finally:
+        HashingEmbedder.embed = original_embed
+        embeddings.EMBED_REFRESH_LIMIT = original_limit
+
+
+def queued_embedding_jobs():
+    with app.app_context():
+        return db.session.query(Job).filter(Job.kind == EMBED_JOB, Job.status == 'queued').count()
+
+
+def test_writes_queue_an_embedding_job():
+    """With job workers, writes queue one embed_notes job and requests never embed notes"""
+    embedded = []
+    original_embed = HashingEmbedder.embed
+
+    def recording_embed(self, texts):
+        embedded.extend(texts)
+        return original_embed(self, texts)
+
+    pool = app.extensions['job_pool']
+    original_pool = pool.workers, pool.start
+    pool.workers, pool.start = 2, lambda: None
+    HashingEmbedder.embed = recording_embed
+    try:
+        client = app.test_client()
+        first = client.post('/api/notes', json={'title': 'Glacier hike', 'content': 'Crampons and ice axes'}).get_json()
+        client.post('/api/notes', json={'title': 'Glacier photos', 'content': 'Ice caves at dawn'})
+        client.put(f"/api/notes/{first['id']}", json={'content': 'Crampons, ice axes and a rope'})
+        assert queued_embedding_jobs() == 1
+
+        pending = client.get('/api/notes/semantic-search?q=glacier+crampons')
+        assert app.extensions['embedding_index'].backlog and pending.headers.get('ETag') is None
+        assert embedded == ['glacier crampons']
+
+        run_pending(app)
+        assert queued_embedding_jobs() == 0 and 'Glacier hike\nCrampons, ice axes and a rope' in embedded
+        response = client.get('/api/notes/semantic-search?q=glacier+crampons+rope')
+        assert response.get_json()[0]['id'] == first['id'] and response.headers.get('ETag')
+    finally:
+        HashingEmbedder.embed = original_embed
+        pool.workers, pool.start = original_pool
+
+
+def test_inline_embedding_backs_off_after_a_failure():
+    """Without workers a failing backend is called outside the index lock, then left alone for a while"""
+    attempts = []
+    original_embed = HashingEmbedder.embed
+
+    def failing_embed(self, texts):
+        if any(text.startswith('Unembedded') for text in texts):
+            assert not app.extensions['embedding_index'].lock.locked()
+            attempts.append(texts)
+            raise RuntimeError('embedding backend unavailable')
+        return original_embed(self, texts)
+
+    client = app.test_client()
+    HashingEmbedder.embed = failing_embed
+    try:
+        client.post('/api/notes', json={'title': 'Unembedded', 'content': 'the backend is down'})
+        assert client.get('/api/notes/semantic-search?q=backend').status_code == 200
+        assert client.get('/api/notes/semantic-search?q=backend').status_code == 200
+    finally:
+        HashingEmbedder.embed = original_embed
+    index = app.extensions['embedding_index']
+    assert index.backlog and len(attempts) == 1
+
+    index.retry_at = 0
+    client.get('/api/notes/semantic-search?q=backend')
+    assert not index.backlog
+
+
+if __name__ == "__main__":
+    test_related_and_semantic_search()
+    test_vector_index_backends_agree()
+    test_writes_defer_embedding_to_index_refresh()
+    test_writes_queue_an_embedding_job()
+    test_inline_embedding_backs_off_after_a_failure()
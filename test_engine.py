@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+from src.app import create_app
+from src.engine import engine_options, engine_profile
+from src.models.user import db
+from src.search import ensure_search_index
+
+
+def test_sqlite_profile_pragmas():
+    """File-backed SQLite connections run in WAL with synchronous=NORMAL"""
+    path = os.path.join(tempfile.mkdtemp(), 'engine.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    assert app.config['DB_PROFILE'] == 'sqlite'
+    with app.app_context():
+        pragma = lambda name: db.session.execute(text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1
+        assert pragma('busy_timeout') == 5000
+        assert pragma('mmap_size') > 0
+
+
+def test_postgres_profiles(monkeypatch):
+    """The transaction-pooler profile is picked from the URL and holds no pool on Vercel"""
+    direct = 'postgresql://u:p@db.example.supabase.co:5432/postgres'
+    pooled = 'postgresql://u:p@aws-0-eu.pooler.supabase.com:6543/postgres'
+    assert engine_profile(direct) == 'postgres'
+    assert engine_profile(pooled) == 'pgbouncer'
+    assert engine_options(direct)['pool_pre_ping'] is True
+
+    monkeypatch.setenv('VERCEL', '1')
+    assert engine_options(pooled)['poolclass'] is NullPool
+    monkeypatch.setenv('DB_POOL_SIZE', '1')
+    assert engine_options(pooled)['pool_size'] == 1
+    assert engine_options('postgresql+psycopg://u:p@h:6543/d')['connect_args']['prepare_threshold'] is None
+
+    monkeypatch.setenv('DB_PROFILE', 'pgbouncer')
+    assert engine_profile(direct) == 'pgbouncer'
+
+
+def test_sqlite_functions_without_sqlite_profile(monkeypatch):
+    """note_text() follows the dialect, so SQLite works under any DB_PROFILE,
+    and raw sqlite3 connections can write notes without registering it"""
+    path = os.path.join(tempfile.mkdtemp(), 'profile.db')
+    monkeypatch.setenv('DB_PROFILE', 'postgres')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'SQLALCHEMY_ENGINE_OPTIONS': {}})
+    assert app.config['DB_PROFILE'] == 'postgres'
+    client = app.test_client()
+    assert client.post('/api/notes', json={'title': 'Profiled', 'content': 'trigram body ' * 200}).status_code == 201
+    assert len(client.get('/api/notes/search?q=trigram').get_json()) == 1
+
+    conn = sqlite3.connect(path)
+    try:
+        # The body above is stored compressed; renaming keeps it searchable
+        conn.execute("UPDATE note SET title = 'Renamed'")
+        conn.execute("INSERT INTO note (title, content) VALUES ('Shell', 'written from the sqlite3 shell')")
+        conn.commit()
+    finally:
+        conn.close()
+    renamed = client.get('/api/notes/search?q=trigram').get_json()
+    assert [r['title'] for r in renamed] == ['Renamed']
+    assert [r['title'] for r in client.get('/api/notes/search?q=shell').get_json()] == ['Shell']
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("DELETE FROM note")
+        conn.commit()
+    finally:
+        conn.close()
+    assert client.get('/api/notes/search?q=trigram').get_json() == []
+
+
+def test_missing_sqlite_functions_fail_at_startup():
+    """An engine that never registered note_text() fails with a clear error"""
+    from sqlalchemy import create_engine
+    engine = create_engine('sqlite://')
+    try:
+        ensure_search_index(engine)
+        assert False, 'expected a RuntimeError'
+    except RuntimeError as e:
+        assert 'register_sqlite_functions' in str(e)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    test_sqlite_profile_pragmas()
+    test_missing_sqlite_functions_fail_at_startup()
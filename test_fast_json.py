@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from flask.json.provider import DefaultJSONProvider
+from src.main import app
+from src.fast_json import FastJSONProvider, dumps_bytes
+
+
+def key_order(text):
+    """Every object's keys, in document order"""
+    keys = []
+    json.loads(text, object_pairs_hook=lambda pairs: keys.append([k for k, _ in pairs]) or dict(pairs))
+    return keys
+
+
+def test_matches_default_provider():
+    """The orjson provider encodes the app's payloads to the same JSON values,
+    in the same key order, as Flask's default provider"""
+    fast, default = FastJSONProvider(app), DefaultJSONProvider(app)
+    assert isinstance(app.json, FastJSONProvider)
+    created = datetime(2024, 5, 1, 9, 30, 15, 123456)
+    updated = datetime(2024, 5, 2, 18, 0)
+    # A Core row as the read path hands it over (raw datetimes) and the same
+    # note as Note.to_dict() produced it for the default provider
+    row = {'version': 7, 'updated_at': updated, 'id': 1, 'title': 'Café ☕ 会议 😀', 'content': 'naïve\n"quoted"',
+           'tags': ['ünïcode', 'x'], 'user_id': None, 'created_at': created}
+    as_dict = dict(row, created_at=created.isoformat(), updated_at=updated.isoformat())
+    payload = {'notes': [row], 'next_cursor': None, 'results': [{'status': 'ok', 'note': row}]}
+    expected = {'notes': [as_dict], 'next_cursor': None, 'results': [{'status': 'ok', 'note': as_dict}]}
+
+    assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(expected))
+    assert key_order(fast.dumps(payload)) == key_order(default.dumps(expected))
+    assert json.loads(dumps_bytes(row))['created_at'] == '2024-05-01T09:30:15.123456'
+    assert json.loads(dumps_bytes(row))['updated_at'] == '2024-05-02T18:00:00'
+    # Non-ASCII text is sent as UTF-8 rather than \u escapes, and round-trips
+    assert 'Café ☕ 会议 😀' in fast.dumps(row)
+    assert fast.loads(fast.dumps(row))['title'] == row['title']
+    assert list(json.loads(fast.dumps({'b': 1, 'a': 2}, sort_keys=False))) == ['b', 'a']
+
+
+def test_responses_match_between_read_paths():
+    """The row-tuple list and the ORM single-note route serialize a note identically"""
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Grüße 👋', 'content': '東京 meeting'}).get_json()
+    listed = next(n for n in client.get('/api/notes').get_json() if n['id'] == note['id'])
+    single = client.get(f"/api/notes/{note['id']}")
+    assert listed == single.get_json()
+    assert key_order(json.dumps(listed)) == key_order(single.get_data(as_text=True))
+
+
+if __name__ == "__main__":
+    test_matches_default_provider()
+    test_responses_match_between_read_paths()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+import src.llm as llm
+
+
+def reply(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_generate_batch():
+    """Many inputs share one LLM call; dropped items fall back to single calls"""
+    calls = []
+
+    def fake_completion(*args, **kwargs):
+        user = kwargs['messages'][-1]['content']
+        calls.append(user)
+        if user.startswith('['):
+            items = json.loads(user)
+            # Fenced, with prose, missing two of the items and two others' fields
+            notes = [{'id': item['id'], 'Title': item['text'].title(), 'Notes': item['text'] + '.',
+                      'Tags': ['batch']} for item in items if item['id'] != 1 and item['text'] != 'unparseable']
+            for note in notes:
+                if note['Notes'] in ('no notes.', 'no title.'):
+                    del note['Notes' if note['Notes'] == 'no notes.' else 'Title']
+            return reply('Here you go:\n```json\n' + json.dumps(notes) + '\n```')
+        if user == 'unparseable':
+            return reply('sorry, no JSON')
+        if user == 'no title':
+            return reply(json.dumps({'Notes': 'still untitled', 'Tags': []}))
+        return reply(json.dumps({'Title': 'Single', 'Notes': user, 'Tags': ['single']}))
+
+    original = (llm.token, llm.client_manager.chat_completion, llm.cache_enabled)
+    llm.token, llm.client_manager.chat_completion, llm.cache_enabled = 'test-token', fake_completion, False
+    try:
+        client = app.test_client()
+        texts = ['buy milk', 'call mom', 'gym at 6', 'unparseable', 'no notes', 'no title']
+        response = client.post('/api/notes/generate/batch', json={'texts': texts})
+        body = response.get_json()
+    finally:
+        llm.token, llm.client_manager.chat_completion, llm.cache_enabled = original
+
+    assert response.status_code == 200
+    assert body['succeeded'] == 4 and body['failed'] == 2
+    # One batched call, then individual retries for the items it lacked or left incomplete
+    assert len(calls) == 5 and calls[0].startswith('[')
+    assert [r['status'] for r in body['results']] == ['ok', 'ok', 'ok', 'error', 'ok', 'error']
+    assert body['results'][4]['note']['title'] == 'Single'
+    assert 'Title' in body['results'][5]['error']
+    assert body['results'][0]['note']['title'] == 'Buy Milk'
+    assert body['results'][1]['note']['tags'] == ['single']
+    assert body['results'][2]['note']['original_text'] == 'gym at 6'
+    assert client.get('/api/notes?tag=batch').get_json()[0]['title'] in ('Buy Milk', 'Gym At 6')
+
+    assert client.post('/api/notes/generate/batch', json={'texts': []}).status_code == 400
+
+
+def test_parse_batch_output():
+    """Objects are recovered from wrapped or truncated replies"""
+    assert set(llm.parse_batch_output('{"notes": [{"id": 0, "Title": "a"}, {"id": 1, "Title": "b"}]}')) == {0, 1}
+    assert set(llm.parse_batch_output('[{"id": 0, "Title": "a"}, {"id": 1, "Tit')) == {0}
+
+
+if __name__ == "__main__":
+    test_generate_batch()
+    test_parse_batch_output()
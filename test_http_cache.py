@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import gzip
+import json
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+
+
+def test_conditional_get_and_compression():
+    """ETag / Last-Modified revalidation returns 304; large JSON is gzipped"""
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Cached', 'content': 'word ' * 400}).get_json()
+    url = f"/api/notes/{note['id']}"
+
+    first = client.get(url)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+
+    # Lists are versioned as a whole: any write invalidates them
+    listing = client.get('/api/notes?limit=5')
+    assert client.get('/api/notes?limit=5', headers={'If-None-Match': listing.headers['ETag']}).status_code == 304
+    assert client.get('/api/notes?limit=6', headers={'If-None-Match': listing.headers['ETag']}).status_code == 200
+
+    client.put(url, json={'title': 'Changed'})
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
+    assert client.get('/api/notes?limit=5', headers={'If-None-Match': listing.headers['ETag']}).status_code == 200
+
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert json.loads(gzip.decompress(compressed.data))['title'] == 'Changed'
+    # The encoded variant's ETag still validates
+    assert client.get(url, headers={'If-None-Match': compressed.headers['ETag']}).status_code == 304
+
+    small = client.get('/api/notes/search?q=zzzz', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+if __name__ == "__main__":
+    test_conditional_get_and_compression()
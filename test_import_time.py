@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+IMPORT_BUDGET = 1.5  # seconds, generous enough for a slow CI box
+
+
+def test_cold_start_import():
+    """Both entry points import within budget and without loading openai"""
+    script = (
+        "import sys, time; start = time.perf_counter()\n"
+        "import api.index, src.main\n"
+        "print(time.perf_counter() - start, 'openai' in sys.modules)"
+    )
+    env = dict(os.environ, DATABASE_URL='sqlite://', LLM_CACHE='0')
+    out = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    elapsed, openai_loaded = float(out[0]), out[1] == 'True'
+    assert not openai_loaded
+    assert elapsed < IMPORT_BUDGET, f"cold import took {elapsed:.2f}s"
+
+
+if __name__ == "__main__":
+    test_cold_start_import()
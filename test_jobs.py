@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+from contextlib import contextmanager
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from datetime import datetime, timedelta
+from src.main import app
+from src.models.job import Job, db
+from src.jobs import enqueue, run_pending
+import src.llm as llm
+
+
+@contextmanager
+def jobs_run_here():
+    """Requests enqueue jobs as if the app had workers; run_pending runs them
+    in this thread instead of the background pool, starting from an empty
+    queue. Note writes don't queue embedding jobs meanwhile."""
+    with app.app_context():
+        db.session.query(Job).filter(Job.status == 'queued').delete()
+        db.session.commit()
+    pool = app.extensions['job_pool']
+    original = (pool.workers, pool.start, os.environ.get('EMBEDDINGS'))
+    pool.workers, pool.start, os.environ['EMBEDDINGS'] = 2, lambda: None, '0'
+    try:
+        yield
+    finally:
+        pool.workers, pool.start, embeddings = original
+        if embeddings is None:
+            os.environ.pop('EMBEDDINGS')
+        else:
+            os.environ['EMBEDDINGS'] = embeddings
+
+
+def test_async_generate_job():
+    """An async generate returns 202, runs on a worker, retries, and reports its result"""
+    calls = []
+
+    def flaky_extract(text, lang="English", fresh=False):
+        calls.append(text)
+        if len(calls) == 1:
+            raise Exception("LLM API call failed: 503")
+        return json.dumps({"Title": "Badminton", "Notes": "Play at 5pm.", "Tags": ["sports"]})
+
+    original = llm.extract_structured_notes
+    llm.extract_structured_notes = flaky_extract
+    try:
+        with jobs_run_here():
+            client = app.test_client()
+            response = client.post('/api/notes/generate?async=1', json={'text': 'Badminton tmr 5pm'})
+            assert response.status_code == 202
+            job_id = response.get_json()['job_id']
+            assert response.headers['Location'] == f'/api/jobs/{job_id}'
+            assert client.get(f'/api/jobs/{job_id}').get_json()['status'] == 'queued'
+
+            # First attempt fails and is re-queued with backoff
+            assert run_pending(app) == 1
+            job = client.get(f'/api/jobs/{job_id}').get_json()
+            assert job['status'] == 'queued' and job['attempts'] == 1 and '503' in job['error']
+
+            with app.app_context():
+                db.session.get(Job, job_id).run_after = datetime.utcnow()
+                db.session.commit()
+            assert run_pending(app) == 1
+            job = client.get(f'/api/jobs/{job_id}').get_json()
+            assert job['status'] == 'succeeded' and job['attempts'] == 2
+            assert job['result']['title'] == 'Badminton'
+            assert client.get(f"/api/notes/{job['result']['id']}").status_code == 200
+    finally:
+        llm.extract_structured_notes = original
+
+
+def test_expired_lease_is_reclaimed():
+    """A job stuck in 'running' past its visibility timeout is picked up again"""
+    with app.app_context():
+        job = Job(kind='missing_kind', payload='{}', status='running', attempts=1, max_attempts=2,
+                  locked_until=datetime.utcnow() - timedelta(seconds=1))
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    assert run_pending(app) == 1
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        assert job.status == 'failed' and job.attempts == 2
+
+
+def test_permanent_error_is_not_retried():
+    """A job for a deleted note fails on its first attempt; list bodies don't opt into async"""
+    with jobs_run_here():
+        with app.test_request_context():
+            job_id = enqueue('translate_note', {'note_id': 10 ** 6, 'target_language': 'Chinese'}).id
+
+        assert run_pending(app) == 1
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            assert job.status == 'failed' and job.attempts == 1 and 'not found' in job.error
+
+        client = app.test_client()
+        assert client.post('/api/notes/generate?async=1', json=['not', 'an', 'object']).status_code == 400
+        note = client.post('/api/notes', json={'title': 'Async', 'content': '...'}).get_json()
+        assert client.post(f"/api/notes/{note['id']}/translate", json=['Chinese']).status_code == 400
+
+
+if __name__ == "__main__":
+    test_async_generate_job()
+    test_expired_lease_is_reclaimed()
+    test_permanent_error_is_not_retried()
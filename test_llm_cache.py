@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.llm_cache import LLMCache, cache_key
+
+
+def test_llm_cache():
+    """Keys are content-addressed; entries persist to disk and expire/evict"""
+    messages = [{"role": "user", "content": "Translate the following text to Chinese: hello"}]
+    key = cache_key("openai/gpt-4.1-mini", messages, temperature=1.0, top_p=1.0)
+    assert key == cache_key("openai/gpt-4.1-mini", list(messages), top_p=1.0, temperature=1.0)
+    assert key != cache_key("openai/gpt-4.1-mini", messages, temperature=0.0, top_p=1.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.db")
+        cache = LLMCache(path=path, memory_size=2, disk_size=3)
+        assert cache.get(key) is None
+        cache.set(key, "你好")
+        assert cache.get(key) == "你好"
+
+        # A new process (fresh memory tier) is served from disk
+        restarted = LLMCache(path=path, memory_size=2, disk_size=3)
+        assert restarted.get(key) == "你好"
+        assert restarted.info()["disk_hits"] == 1
+
+        for i in range(4):
+            restarted.set(f"k{i}", str(i))
+        assert len(restarted._memory) == 2
+        assert restarted.get(key) is None  # evicted from both tiers
+        assert restarted.get("k3") == "3"
+
+        expired = LLMCache(path=path, ttl=0)
+        assert expired.get("k3") is None
+        assert expired.info()["misses"] == 1
+
+
+def test_disk_writes_are_throttled():
+    """Hits only refresh stale access times; purges run every N writes or over the cap"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(path=os.path.join(tmp, "llm_cache.db"), memory_size=0, disk_size=20,
+                         touch_interval=60, evict_every=5)
+        statements = []
+        cache._conn().set_trace_callback(statements.append)
+
+        cache.set("a", "1")
+        for _ in range(3):
+            assert cache.get("a") == "1"
+        assert not any(s.startswith(("UPDATE", "DELETE")) for s in statements)
+
+        cache._conn().execute("UPDATE llm_cache SET accessed_at = accessed_at - 120")
+        statements.clear()
+        assert cache.get("a") == "1" and cache.get("a") == "1"
+        assert sum(s.startswith("UPDATE") for s in statements) == 1
+
+        statements.clear()
+        for i in range(4):
+            cache.set(f"k{i}", str(i))
+        # The fifth write since the last purge runs it
+        assert sum(s.startswith("DELETE") for s in statements) == 2
+
+        for i in range(30):
+            cache.set(f"n{i}", str(i))
+        assert cache._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] <= 20
+
+
+if __name__ == "__main__":
+    test_llm_cache()
+    test_disk_writes_are_throttled()
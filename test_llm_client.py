@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.llm_client import LLMClientManager
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /chat/completions endpoint"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            fail = server.failures_left > 0
+            server.failures_left -= 1
+
+        if fail:
+            payload = json.dumps({'error': {'message': 'rate limited'}}).encode()
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+        else:
+            payload = json.dumps({
+                'id': 'chatcmpl-test', 'object': 'chat.completion', 'created': 0,
+                'model': body['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {
+                    'role': 'assistant', 'content': 'echo: ' + body['messages'][-1]['content']}}],
+            }).encode()
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_llm_client_manager():
+    """Connections are reused, concurrency is bounded and 429s are retried"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.requests, server.connections, server.failures_left = 0, set(), 2
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+
+    manager = LLMClientManager(max_concurrency=2, max_retries=3, backoff_base=0.01)
+    try:
+        def ask(i):
+            response = manager.chat_completion(
+                base_url, 'test-token', model='test-model',
+                messages=[{'role': 'user', 'content': f'hi {i}'}])
+            return response.choices[0].message.content
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            answers = list(pool.map(ask, range(12)))
+
+        assert answers == [f'echo: hi {i}' for i in range(12)]
+        stats = manager.stats()
+        assert stats['retries'] == 2 and stats['failures'] == 0
+        assert stats['clients_created'] == 1 and stats['in_flight'] == 0
+        # Keep-alive: at most max_concurrency sockets served 14 requests
+        assert server.requests == 14
+        assert len(server.connections) <= 2
+    finally:
+        manager.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_llm_client_manager()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.app import create_app
+from src.models.note import Note, db
+from src import metrics
+
+
+def test_metrics_endpoint():
+    """Requests, per-request SQL and N+1 patterns show up in /metrics"""
+    app = create_app()
+
+    @app.route('/n-plus-one')
+    def n_plus_one():
+        # One lookup per id: the pattern the detector exists for
+        for note_id in range(metrics.N_PLUS_ONE_THRESHOLD):
+            db.session.get(Note, note_id + 10 ** 6)
+        return 'ok'
+
+    client = app.test_client()
+    before = metrics.http_requests.value('GET', '/api/notes/<int:note_id>', '200')
+    note = client.post('/api/notes', json={'title': 'Metered', 'content': '...'}).get_json()
+    client.get(f"/api/notes/{note['id']}")
+    client.get('/n-plus-one')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_requests_total{method="GET",endpoint="/api/notes/<int:note_id>",status="200"}' in body
+    assert metrics.http_requests.value('GET', '/api/notes/<int:note_id>', '200') - before == 1
+    assert 'db_statements_per_request_count{endpoint="/api/notes"}' in body
+    assert metrics.db_n_plus_one.value('/n-plus-one') == 1
+    assert 'db_n_plus_one_total{endpoint="/api/notes' not in body
+    assert 'db_query_duration_seconds_bucket{operation="SELECT",le="+Inf"}' in body
+
+
+def test_llm_metrics():
+    """call_llm_model records latency, token usage and errors"""
+    import src.llm as llm
+    usage = SimpleNamespace(prompt_tokens=12, completion_tokens=30)
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='hi'))], usage=usage)
+    calls = []
+
+    def fake_completion(*args, **kwargs):
+        calls.append(kwargs)
+        if len(calls) == 2:
+            raise TimeoutError('upstream timed out')
+        return reply
+
+    original = (llm.token, llm.client_manager.chat_completion, llm.cache_enabled)
+    llm.token, llm.client_manager.chat_completion, llm.cache_enabled = 'test-token', fake_completion, False
+    try:
+        before = metrics.llm_tokens.value('metered-model', 'completion')
+        assert llm.call_llm_model('metered-model', [{'role': 'user', 'content': 'x'}], use_cache=False) == 'hi'
+        try:
+            llm.call_llm_model('metered-model', [{'role': 'user', 'content': 'y'}], use_cache=False)
+        except Exception:
+            pass
+    finally:
+        llm.token, llm.client_manager.chat_completion, llm.cache_enabled = original
+
+    assert metrics.llm_tokens.value('metered-model', 'completion') - before == 30
+    assert metrics.llm_errors.value('metered-model', 'TimeoutError') >= 1
+    assert metrics.llm_request_duration.count('metered-model', 'ok', 'false') >= 1
+    assert 'llm_tokens_total{model="metered-model",type="prompt"}' in metrics.render()
+
+
+if __name__ == "__main__":
+    test_metrics_endpoint()
+    test_llm_metrics()
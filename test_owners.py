@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import uuid
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+
+
+def make_user(client):
+    name = uuid.uuid4().hex[:12]
+    return client.post('/api/users', json={'username': name, 'email': f'{name}@example.com'}).get_json()['id']
+
+
+def test_notes_are_scoped_to_their_owner():
+    """With X-User-Id every note route only sees and writes that user's notes"""
+    client = app.test_client()
+    alice, bob = make_user(client), make_user(client)
+    as_alice, as_bob = {'X-User-Id': str(alice)}, {'X-User-Id': str(bob)}
+
+    mine = client.post('/api/notes', headers=as_alice,
+                       json={'title': 'Alice ownedword', 'content': 'tennis racket', 'tags': ['owned']}).get_json()
+    theirs = client.post('/api/notes', headers=as_bob,
+                         json={'title': 'Bob ownedword', 'content': 'tennis ball', 'tags': ['owned']}).get_json()
+    assert mine['user_id'] == alice and theirs['user_id'] == bob
+
+    listing = client.get('/api/notes?limit=200', headers=as_alice)
+    assert [n['id'] for n in listing.get_json()['notes']] == [mine['id']]
+    assert 'X-User-Id' in listing.headers['Vary']
+    # Another user's cached page doesn't validate
+    assert client.get('/api/notes?limit=200', headers=dict(as_bob, **{'If-None-Match': listing.headers['ETag']})).status_code == 200
+    assert [n['id'] for n in client.get('/api/notes/search?q=ownedword', headers=as_alice).get_json()] == [mine['id']]
+    assert client.get('/api/tags?tag=owned', headers=as_alice).get_json() == [{'name': 'owned', 'count': 1}]
+    assert [n['id'] for n in client.get('/api/notes/changes', headers=as_alice).get_json()['notes']] == [mine['id']]
+    assert [n['id'] for n in client.get('/api/notes/semantic-search?q=tennis', headers=as_alice).get_json()] == [mine['id']]
+    assert client.get(f"/api/notes/{mine['id']}/related", headers=as_alice).get_json() == []
+
+    # Bob's note is invisible to Alice, by id too
+    url = f"/api/notes/{theirs['id']}"
+    assert client.get(url, headers=as_alice).status_code == 404
+    assert client.put(url, headers=as_alice, json={'title': 'Hijacked'}).status_code != 200
+    assert client.delete(url, headers=as_alice).status_code != 204
+    assert client.patch(url, headers=as_alice, json={'base_version': theirs['version'], 'title': 'x'}).status_code == 404
+    assert client.get(f'{url}/revisions', headers=as_alice).status_code == 404
+    assert client.get(f'{url}/related', headers=as_alice).status_code == 404
+    bulk = client.post('/api/notes/bulk', headers=as_alice, json={'operations': [
+        {'op': 'update', 'id': theirs['id'], 'title': 'Hijacked'}, {'op': 'create', 'title': 'Bulk', 'content': '.'}
+    ]}).get_json()
+    assert bulk['failed'] == 1 and bulk['created'] == 1
+    assert client.get(url, headers=as_bob).get_json()['title'] == 'Bob ownedword'
+    assert {n['user_id'] for n in client.get('/api/notes?view=full&limit=200', headers=as_alice).get_json()['notes']} == {alice}
+
+    # Requests without the header (the bundled frontend) only see unowned notes
+    shared = client.post('/api/notes', json={'title': 'Shared ownedword', 'content': '.'}).get_json()
+    assert shared['user_id'] is None
+    listed = [n['id'] for n in client.get('/api/notes?limit=200').get_json()['notes']]
+    assert shared['id'] in listed and mine['id'] not in listed and theirs['id'] not in listed
+    assert [n['id'] for n in client.get('/api/notes/search?q=ownedword').get_json()] == [shared['id']]
+    assert client.get('/api/tags?tag=owned').get_json() == []
+    assert client.get(url).status_code == 404
+    assert client.get(f"/api/notes/{shared['id']}", headers=as_alice).status_code == 404
+    assert client.get('/api/notes', headers={'X-User-Id': 'alice'}).status_code == 400
+
+
+def test_unknown_users_and_foreign_deletions():
+    """Ids of users that don't exist are rejected; the changes feed only lists the user's own deletions"""
+    client = app.test_client()
+    alice, bob = make_user(client), make_user(client)
+    as_alice, as_bob = {'X-User-Id': str(alice)}, {'X-User-Id': str(bob)}
+    missing = client.post('/api/notes', headers={'X-User-Id': '99999999'}, json={'title': 'Orphan', 'content': '.'})
+    assert missing.status_code == 403
+    assert not any(n['title'] == 'Orphan' for n in client.get('/api/notes', headers=as_alice).get_json())
+
+    cursor = client.get('/api/notes/changes', headers=as_alice).get_json()['cursor']
+    gone = client.post('/api/notes', headers=as_bob, json={'title': 'Bob private', 'content': '.'}).get_json()['id']
+    bulk_gone = client.post('/api/notes', headers=as_bob, json={'title': 'Bob bulk', 'content': '.'}).get_json()['id']
+    assert client.delete(f'/api/notes/{gone}', headers=as_bob).status_code == 204
+    assert client.post('/api/notes/bulk', headers=as_bob,
+                       json={'operations': [{'op': 'delete', 'id': bulk_gone}]}).status_code == 200
+
+    assert client.get(f'/api/notes/changes?since={cursor}', headers=as_alice).get_json()['deleted'] == []
+    assert client.get(f'/api/notes/changes?since={cursor}', headers=as_bob).get_json()['deleted'] == [gone, bulk_gone]
+
+
+def test_jobs_are_scoped_to_their_owner():
+    """A background job's status and result are only visible to the user who enqueued it"""
+    # Accept async requests but leave the job queued instead of starting the background pool
+    pool = app.extensions['job_pool']
+    original = pool.workers, pool.start
+    pool.workers, pool.start = 2, lambda: None
+    client = app.test_client()
+    alice, bob = make_user(client), make_user(client)
+    try:
+        note = client.post('/api/notes', headers={'X-User-Id': str(alice)},
+                           json={'title': 'Secret', 'content': 'PIN 1234'}).get_json()
+        response = client.post(f"/api/notes/{note['id']}/translate?async=1", headers={'X-User-Id': str(alice)},
+                               json={'target_language': 'French'})
+    finally:
+        pool.workers, pool.start = original
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    url = f'/api/jobs/{job_id}'
+    assert client.get(url, headers={'X-User-Id': str(alice)}).get_json()['user_id'] == alice
+    assert client.get(url, headers={'X-User-Id': str(bob)}).status_code == 404
+    assert 'X-User-Id' in client.get(url, headers={'X-User-Id': str(alice)}).headers['Vary']
+    assert client.get(url, headers={'X-User-Id': 'bob'}).status_code == 400
+
+
+def test_deleted_users_notes_become_unowned():
+    """Deleting a user releases their notes to header-less requests instead of orphaning them"""
+    client = app.test_client()
+    carol = make_user(client)
+    note = client.post('/api/notes', headers={'X-User-Id': str(carol)},
+                       json={'title': 'Carol leftover', 'content': '.'}).get_json()
+    cursor = client.get('/api/notes/changes').get_json()['cursor']
+    assert client.get(f"/api/notes/{note['id']}").status_code == 404
+
+    assert client.delete(f'/api/users/{carol}').status_code == 204
+    kept = client.get(f"/api/notes/{note['id']}").get_json()
+    assert kept['user_id'] is None and kept['updated_at'] == note['updated_at']
+    assert [n['id'] for n in client.get(f'/api/notes/changes?since={cursor}').get_json()['notes']] == [note['id']]
+
+
+if __name__ == "__main__":
+    test_notes_are_scoped_to_their_owner()
+    test_unknown_users_and_foreign_deletions()
+    test_jobs_are_scoped_to_their_owner()
+    test_deleted_users_notes_become_unowned()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from datetime import datetime, timedelta
+from src.main import app
+from src.models.note import Note, db
+
+
+def test_keyset_pagination():
+    """Walk every page of /api/notes and check order, projection and completeness"""
+    with app.app_context():
+        db.session.query(Note).delete()
+        base = datetime(2024, 1, 1)
+        # Several notes share an updated_at so the id tiebreaker is exercised
+        for i in range(25):
+            db.session.add(Note(title=f'Note {i}', content='x' * 500,
+                                updated_at=base + timedelta(minutes=i // 3)))
+        db.session.commit()
+        expected = [n.id for n in Note.query.order_by(Note.updated_at.desc(), Note.id.desc())]
+
+    client = app.test_client()
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/notes?limit=7' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        for item in body['notes']:
+            assert 'content' not in item
+            assert len(item['preview']) == 120
+        seen.extend(item['id'] for item in body['notes'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert seen == expected
+    assert client.get('/api/notes?cursor=not-a-cursor').status_code == 400
+
+    # The unpaginated form is unchanged
+    assert len(client.get('/api/notes').get_json()) == 25
+
+
+if __name__ == "__main__":
+    test_keyset_pagination()
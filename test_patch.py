@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+from src.delta import DeltaError, apply_delta, invert_delta, make_delta
+
+
+def test_apply_and_make_delta():
+    """Deltas round-trip, count UTF-16 units like the browser, and are validated"""
+    for old, new in [('hello world', 'hello brave world'), ('abc', ''), ('a😀b', 'a😀😀b'), ('😀x', '😁x'),
+                     ('😀', '😁😀'), ('x', '😀x')]:
+        ops = make_delta(old, new)
+        assert apply_delta(old, ops) == new
+        assert apply_delta(new, invert_delta(old, ops)) == old
+    # Deleting the halves of two neighbouring pairs: the inverse re-inserts lone surrogates
+    assert apply_delta('a😀😀b', [{'retain': 2}, {'delete': 2}]) == 'a😀b'
+    assert apply_delta('a😀b', invert_delta('a😀😀b', [{'retain': 2}, {'delete': 2}])) == 'a😀😀b'
+    assert apply_delta('😀 hi', [{'retain': 3}, {'insert': '!'}]) == '😀 !hi'
+    for bad in ([{'retain': 99}], [{'retain': 1, 'insert': 'x'}], [{'delete': -1}], [{'move': 1}], 'nope'):
+        try:
+            apply_delta('abc', bad)
+            assert False, bad
+        except DeltaError:
+            pass
+
+
+def test_make_delta_large_note():
+    """Diffing a large note runs in C-level slice comparisons, not a per-byte loop"""
+    text = ''.join(f'Sentence number {i} with a few more words. ' for i in range(14000))  # ~560 KB
+    edited = text[:len(text) // 2] + 'x' + text[len(text) // 2:]
+    start = time.perf_counter()
+    ops = make_delta(edited, text)
+    elapsed = time.perf_counter() - start
+    assert ops == [{'retain': len(text) // 2}, {'delete': 1}]
+    # A per-byte Python loop takes over 100 ms here
+    assert elapsed < 0.03, elapsed
+
+
+def test_patch_note():
+    """PATCH applies a delta against the base version and rejects stale bases"""
+    client = app.test_client()
+    long_content = 'Lorem ipsum dolor sit amet. ' * 2000
+    note = client.post('/api/notes', json={'title': 'Draft', 'content': long_content}).get_json()
+    url = f"/api/notes/{note['id']}"
+
+    edited = long_content[:100] + 'EDIT ' + long_content[100:]
+    body = {'base_version': note['version'], 'content_delta': make_delta(long_content, edited)}
+    assert len(json.dumps(body)) < 100 < len(long_content)
+    response = client.patch(url, json=body)
+    assert response.status_code == 200
+    version = response.get_json()['version']
+    assert version > note['version']
+    saved = client.get(url).get_json()
+    assert saved['content'] == edited and saved['version'] == version
+
+    # A second client still on the old version gets a conflict, and nothing is written
+    stale = client.patch(url, json={'base_version': note['version'], 'title': 'Stale'})
+    assert stale.status_code == 409 and stale.get_json()['version'] == version
+    assert client.get(url).get_json()['title'] == 'Draft'
+
+    assert client.patch(url, json={'base_version': version, 'title': 'Final'}).status_code == 200
+    assert client.get(url).get_json()['title'] == 'Final'
+    assert client.patch(url, json={'base_version': 'x'}).status_code == 400
+    current = client.get(url).get_json()['version']
+    assert client.patch(url, json={'base_version': current, 'content_delta': [{'delete': 10 ** 6}]}).status_code == 400
+    assert client.patch('/api/notes/999999', json={'base_version': 1}).status_code == 404
+
+    # Titles are held to the same 200-character limit as POST and PUT
+    too_long = 'x' * 201
+    response = client.patch(url, json={'base_version': current, 'title': too_long})
+    assert response.status_code == 400 and '200' in response.get_json()['error']
+    assert client.put(url, json={'title': too_long}).status_code == 400
+    assert client.post('/api/notes', json={'title': too_long, 'content': ''}).status_code == 400
+    assert client.get(url).get_json()['title'] == 'Final'
+
+
+if __name__ == "__main__":
+    test_apply_and_make_delta()
+    test_make_delta_large_note()
+    test_patch_note()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+from src.models.note import db
+from src.models.revision import NoteRevision
+
+
+def stored_revisions(note_id):
+    with app.app_context():
+        return db.session.query(NoteRevision).filter_by(note_id=note_id).order_by(NoteRevision.revision).all()
+
+
+def test_reverse_deltas_and_snapshots():
+    """Every save is kept as a small reverse delta and any revision reads back exactly"""
+    client = app.test_client()
+    with app.app_context():
+        # Other tests wipe the note table directly, so SQLite may reuse ids
+        db.session.query(NoteRevision).delete()
+        db.session.commit()
+    os.environ['REVISION_COALESCE_SECONDS'] = '0'
+    try:
+        paragraphs = [f'Paragraph {i}: ' + 'lorem ipsum dolor sit amet ' * 8 for i in range(40)]
+        versions = ['\n'.join(paragraphs)]
+        note = client.post('/api/notes', json={'title': 'Draft', 'content': versions[0]}).get_json()
+        url = f"/api/notes/{note['id']}"
+        for i in range(60):
+            # Autosave-sized edits: a few words somewhere in the note
+            paragraphs[(i * 7) % 40] += f' edit {i}'
+            versions.append('\n'.join(paragraphs))
+            assert client.put(url, json={'content': versions[-1]}).status_code == 200
+
+        revisions = stored_revisions(note['id'])
+        assert [r.revision for r in revisions] == list(range(1, 61))
+        assert {r.revision for r in revisions if r.kind == 'snapshot'} == {20, 40, 60}
+        stored = sum(len(r.data) for r in revisions)
+        assert stored < 0.05 * sum(len(v) for v in versions[:-1])
+
+        for number in (1, 7, 20, 21, 45, 59, 60):
+            revision = client.get(f'{url}/revisions/{number}').get_json()
+            assert revision['content'] == versions[number - 1] and revision['reason'] == 'edit'
+
+        page = client.get(f'{url}/revisions?limit=25').get_json()
+        assert page['has_more'] and [r['revision'] for r in page['revisions']][:2] == [60, 59]
+        rest = client.get(f'{url}/revisions?limit=50&before=36').get_json()
+        assert not rest['has_more'] and len(rest['revisions']) == 35
+        assert client.get(f'{url}/revisions/61').status_code == 404
+    finally:
+        del os.environ['REVISION_COALESCE_SECONDS']
+
+
+def test_autosave_bursts_coalesce():
+    """Quick successive edits keep the version from before the burst, not every keystroke"""
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Burst', 'content': 'v0'}).get_json()
+    url = f"/api/notes/{note['id']}"
+    for i in range(1, 6):
+        client.put(url, json={'content': f'v{i}'})
+    revisions = stored_revisions(note['id'])
+    assert len(revisions) == 1
+    assert client.get(f'{url}/revisions/1').get_json()['content'] == 'v0'
+
+
+def test_translate_restore_bulk_and_delete():
+    """A translation can be undone; restores, PATCH and bulk writes are recorded too"""
+    import src.llm as llm
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Original', 'content': 'Keep me 😀'}).get_json()
+    url = f"/api/notes/{note['id']}"
+
+    original = llm.translate_note_fields
+    llm.translate_note_fields = lambda title, content, language, fresh=False: ('Traduit', 'Gardez-moi')
+    try:
+        assert client.post(f'{url}/translate', json={'target_language': 'French'}).get_json()['title'] == 'Traduit'
+    finally:
+        llm.translate_note_fields = original
+
+    first = client.get(f'{url}/revisions').get_json()['revisions'][0]
+    assert first['reason'] == 'translate' and first['title'] == 'Original'
+    restored = client.post(f"{url}/revisions/{first['revision']}/restore").get_json()
+    assert restored['title'] == 'Original' and restored['content'] == 'Keep me 😀'
+    assert client.get(f'{url}/revisions').get_json()['revisions'][0]['reason'] == 'restore'
+
+    version = client.get(url).get_json()['version']
+    client.patch(url, json={'base_version': version, 'content_delta': [{'retain': 8}, {'insert': 'safe '}]})
+    client.post('/api/notes/bulk', json={'operations': [{'op': 'update', 'id': note['id'], 'title': 'Bulk'}]})
+    reasons = [r['reason'] for r in client.get(f'{url}/revisions').get_json()['revisions']]
+    assert reasons == ['bulk', 'edit', 'restore', 'translate']
+    assert client.get(f'{url}/revisions/{len(reasons)}').get_json()['content'] == 'Keep me safe 😀'
+    # Stored from PATCH's inverted delta
+    assert client.get(f'{url}/revisions/{len(reasons) - 1}').get_json()['content'] == 'Keep me 😀'
+
+    assert client.post(f'{url}/revisions/99/restore').status_code == 404
+    client.delete(url)
+    assert stored_revisions(note['id']) == []
+    assert client.get(f'{url}/revisions').status_code == 404
+
+
+if __name__ == "__main__":
+    test_reverse_deltas_and_snapshots()
+    test_autosave_bursts_coalesce()
+    test_translate_restore_bulk_and_delete()
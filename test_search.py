@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+from src.models.note import Note, db
+from src.search import ilike_patterns
+
+
+def test_full_text_search():
+    """Search is ranked, highlighted, paged and follows create/update/delete"""
+    assert app.config['SEARCH_BACKEND'] == 'fts5'
+    client = app.test_client()
+    with app.app_context():
+        db.session.query(Note).delete()
+        db.session.commit()
+
+    ids = [client.post('/api/notes', json=body).get_json()['id'] for body in [
+        {'title': 'Badminton at PolyU', 'content': 'Play badminton at 5pm tomorrow.'},
+        {'title': 'Groceries', 'content': 'Buy milk, eggs and a badminton racket.'},
+        {'title': '会议记录', 'content': '明天下午三点和项目组开会。'},
+    ]]
+
+    results = client.get('/api/notes/search?q=badminton').get_json()
+    # The title match is weighted above the content-only match
+    assert [r['id'] for r in results] == ids[:2]
+    assert '<mark>' in results[1]['snippet']
+
+    assert [r['id'] for r in client.get('/api/notes/search?q=项目组').get_json()] == [ids[2]]
+    assert len(client.get('/api/notes/search?q=badminton&limit=1&offset=1').get_json()) == 1
+
+    client.put(f'/api/notes/{ids[1]}', json={'content': 'Buy milk and eggs.'})
+    client.delete(f'/api/notes/{ids[0]}')
+    assert client.get('/api/notes/search?q=badminton').get_json() == []
+
+    # Terms shorter than a trigram fall back to substring matching
+    assert [r['id'] for r in client.get('/api/notes/search?q=会议').get_json()] == [ids[2]]
+
+
+def test_short_term_in_multi_term_query():
+    """A term shorter than a trigram isn't dropped: the whole query uses LIKE"""
+    client = app.test_client()
+    with app.app_context():
+        db.session.query(Note).delete()
+        db.session.commit()
+
+    go = client.post('/api/notes', json={'title': 'Go lang notes', 'content': 'Channels and goroutines'}).get_json()['id']
+    client.post('/api/notes', json={'title': 'Rust lang notes', 'content': 'Ownership and borrowing'})
+
+    assert [r['id'] for r in client.get('/api/notes/search?q=go lang').get_json()] == [go]
+    assert [r['id'] for r in client.get('/api/notes/search?q=lang go').get_json()] == [go]
+    assert client.get('/api/notes/search?q=go python').get_json() == []
+
+    # LIKE wildcards in a short term match literally
+    discount = client.post('/api/notes', json={'title': 'Sale', 'content': '50% off_today'}).get_json()['id']
+    assert [r['id'] for r in client.get('/api/notes/search?q=%25').get_json()] == [discount]
+    assert [r['id'] for r in client.get('/api/notes/search?q=_').get_json()] == [discount]
+    assert client.get('/api/notes/search?q=o%25').get_json() == []
+
+
+def test_substring_matching_on_every_backend():
+    """Partial words and CJK match as substrings; Postgres matches the same
+    terms with ILIKE patterns instead of whole tsvector tokens"""
+    client = app.test_client()
+    with app.app_context():
+        db.session.query(Note).delete()
+        db.session.commit()
+
+    footnote = client.post('/api/notes', json={'title': 'Refs', 'content': 'See the footnote below'}).get_json()['id']
+    meeting = client.post('/api/notes', json={'title': 'Plan', 'content': '明天下午的会议'}).get_json()['id']
+    assert [r['id'] for r in client.get('/api/notes/search?q=note').get_json()] == [footnote]
+    assert [r['id'] for r in client.get('/api/notes/search?q=下午的').get_json()] == [meeting]
+
+    assert ilike_patterns('会议 note') == ['%会议%', '%note%']
+    assert ilike_patterns('50% off_') == ['%50\\%%', '%off\\_%']
+
+
+if __name__ == "__main__":
+    test_full_text_search()
+    test_short_term_in_multi_term_query()
+    test_substring_matching_on_every_backend()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    """Waiters get the leader's result, or its error; distinct keys don't wait"""
+    import src.llm as llm
+    calls = []
+    lock = threading.Lock()
+
+    def slow_completion(*args, **kwargs):
+        with lock:
+            calls.append(kwargs['messages'][-1]['content'])
+        time.sleep(0.2)
+        if 'fail' in kwargs['messages'][-1]['content']:
+            raise TimeoutError('upstream timed out')
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='bonjour'))])
+
+    original = (llm.token, llm.client_manager.chat_completion, llm.cache_enabled)
+    llm.token, llm.client_manager.chat_completion, llm.cache_enabled = 'test-token', slow_completion, False
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: llm.translate('coalesce me', 'French'), range(8)))
+        assert results == ['bonjour'] * 8
+        assert calls == ['Translate the following text to French: coalesce me']
+
+        def attempt(_):
+            try:
+                return llm.translate('fail please', 'French')
+            except Exception as e:
+                return str(e)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            errors = list(pool.map(attempt, range(4)))
+        assert all('upstream timed out' in error for error in errors)
+        assert len(calls) == 2
+
+        # Fresh samples are never shared
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda _: llm.translate('coalesce me', 'French', fresh=True), range(3)))
+        assert len(calls) == 5
+    finally:
+        llm.token, llm.client_manager.chat_completion, llm.cache_enabled = original
+
+
+def test_cross_process_recheck():
+    """With a lock directory the leader re-checks the shared cache under the lock"""
+    flight = SingleFlight(lock_dir=tempfile.mkdtemp())
+    assert flight.do('k', lambda: 'computed', recheck=lambda: 'from another process') == 'from another process'
+    assert flight.do('k', lambda: 'computed', recheck=lambda: None) == 'computed'
+    assert flight.stats() == {'leaders': 2, 'followers': 0, 'in_flight': 0}
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_calls_share_one_upstream_call()
+    test_cross_process_recheck()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+from src.models.note import Note, db
+import src.llm as llm
+
+
+def parse_events(body):
+    """[(event, data)] from a text/event-stream body"""
+    events = []
+    for block in body.split('\n\n'):
+        if not block:
+            continue
+        lines = block.split('\n')
+        assert lines[0].startswith('event: ') and lines[1].startswith('data: ') and len(lines) == 2
+        events.append((lines[0][len('event: '):], json.loads(lines[1][len('data: '):])))
+    return events
+
+
+def stub_stream(pieces, fail_after=None):
+    """A stand-in for llm.stream_llm_model yielding `pieces`, optionally failing part-way"""
+    def stream(model, messages, temperature=1.0, top_p=1.0, use_cache=True, timeout=None):
+        for index, piece in enumerate(pieces):
+            if index == fail_after:
+                raise Exception('LLM stream failed: connection reset')
+            yield piece
+    return stream
+
+
+def stream_post(url, body, stream):
+    original = llm.stream_llm_model
+    llm.stream_llm_model = stream
+    try:
+        response = app.test_client().post(url, json=body)
+        return response, parse_events(response.get_data(as_text=True))
+    finally:
+        llm.stream_llm_model = original
+
+
+def note_count():
+    with app.app_context():
+        return db.session.query(Note).count()
+
+
+def test_generate_stream():
+    """Tokens arrive as `token` events and the saved note as a final `done` event"""
+    pieces = ['{"Title": "Badminton", ', '"Notes": "Play at 5pm.", ', '"Tags": ["sports"]}']
+    before = note_count()
+    response, events = stream_post('/api/notes/generate/stream', {'text': 'Badminton tmr 5pm'}, stub_stream(pieces))
+
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert events[:-1] == [('token', {'text': piece}) for piece in pieces]
+    event, note = events[-1]
+    assert event == 'done'
+    assert note['title'] == 'Badminton' and note['tags'] == ['sports']
+    assert note['original_text'] == 'Badminton tmr 5pm'
+    assert note_count() == before + 1
+    assert app.test_client().get(f"/api/notes/{note['id']}").get_json()['content'] == 'Play at 5pm.'
+
+
+def test_generate_stream_failure_saves_nothing():
+    before = note_count()
+    _, events = stream_post('/api/notes/generate/stream', {'text': 'Badminton tmr 5pm'},
+                            stub_stream(['{"Title": ', '"Badminton"}'], fail_after=1))
+    assert events[0] == ('token', {'text': '{"Title": '})
+    assert events[-1][0] == 'error' and 'connection reset' in events[-1][1]['error']
+    assert 'done' not in [event for event, _ in events]
+    assert note_count() == before
+
+
+def test_translate_stream():
+    """Title then content stream as tagged tokens; the note is updated once both finish"""
+    client = app.test_client()
+    note_id = client.post('/api/notes', json={'title': 'Hello', 'content': 'Good morning'}).get_json()['id']
+    _, events = stream_post(f'/api/notes/{note_id}/translate/stream', {'target_language': 'French'},
+                            stub_stream(['Bon', 'jour']))
+
+    assert events[:-1] == [('token', {'field': 'title', 'text': 'Bon'}), ('token', {'field': 'title', 'text': 'jour'}),
+                           ('token', {'field': 'content', 'text': 'Bon'}), ('token', {'field': 'content', 'text': 'jour'})]
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['id'] == note_id and events[-1][1]['content'] == 'Bonjour'
+    stored = client.get(f'/api/notes/{note_id}').get_json()
+    assert stored['title'] == 'Bonjour' and stored['content'] == 'Bonjour'
+
+
+def test_translate_stream_failure_leaves_note():
+    client = app.test_client()
+    note_id = client.post('/api/notes', json={'title': 'Hello', 'content': 'Good morning'}).get_json()['id']
+    _, events = stream_post(f'/api/notes/{note_id}/translate/stream', {'target_language': 'French'},
+                            stub_stream(['Bon', 'jour'], fail_after=1))
+
+    assert events[0] == ('token', {'field': 'title', 'text': 'Bon'})
+    assert events[-1][0] == 'error' and 'connection reset' in events[-1][1]['error']
+    stored = client.get(f'/api/notes/{note_id}').get_json()
+    assert stored['title'] == 'Hello' and stored['content'] == 'Good morning'
+    assert client.get(f'/api/notes/{note_id}/revisions').get_json()['revisions'] == []
+
+
+def test_stream_rejects_non_object_bodies():
+    client = app.test_client()
+    note_id = client.post('/api/notes', json={'title': 'Hello', 'content': 'Good morning'}).get_json()['id']
+    assert client.post('/api/notes/generate/stream', json=['x']).status_code == 400
+    assert client.post(f'/api/notes/{note_id}/translate/stream', json=['target_language']).status_code == 400
+
+
+if __name__ == "__main__":
+    test_generate_stream()
+    test_generate_stream_failure_saves_nothing()
+    test_translate_stream()
+    test_translate_stream_failure_leaves_note()
+    test_stream_rejects_non_object_bodies()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+
+
+def sync(client, since=None, limit=100):
+    """Follow has_more until caught up; returns (notes by id, deleted ids, cursor)"""
+    notes, deleted = {}, []
+    while True:
+        url = f'/api/notes/changes?limit={limit}' + (f'&since={since}' if since is not None else '')
+        page = client.get(url).get_json()
+        deleted.extend(page['deleted'])
+        notes.update({note['id']: note for note in page['notes']})
+        since = page['cursor']
+        if not page['has_more']:
+            return notes, deleted, since
+
+
+def test_delta_sync():
+    """Only changes after the cursor are returned, with tombstones for deletes"""
+    client = app.test_client()
+    _, _, cursor = sync(client)
+
+    a = client.post('/api/notes', json={'title': 'A', 'content': 'a'}).get_json()['id']
+    b = client.post('/api/notes', json={'title': 'B', 'content': 'b'}).get_json()['id']
+    bulk = client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'create', 'title': f'Bulk {i}', 'content': '...'} for i in range(5)
+    ]}).get_json()
+    notes, deleted, cursor = sync(client, cursor, limit=2)
+    assert set(notes) == {a, b} | {r['id'] for r in bulk['results']}
+    assert deleted == []
+
+    # Nothing changed: nothing returned and the cursor is stable
+    notes, deleted, same = sync(client, cursor)
+    assert notes == {} and deleted == [] and same == cursor
+
+    client.put(f'/api/notes/{a}', json={'title': 'A2'})
+    client.delete(f'/api/notes/{b}')
+    client.post('/api/notes/bulk', json={'operations': [{'op': 'delete', 'id': bulk['results'][0]['id']}]})
+    notes, deleted, cursor = sync(client, cursor)
+    assert list(notes) == [a] and notes[a]['title'] == 'A2'
+    assert deleted == [b, bulk['results'][0]['id']]
+
+    assert client.get('/api/notes/changes?since=bogus').status_code == 400
+
+
+if __name__ == "__main__":
+    test_delta_sync()
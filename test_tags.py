@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+from src.models.note import Note, db
+from src.tags import migrate_comma_tags, tag_counts
+
+
+def create(client, title, tags):
+    return client.post('/api/notes', json={'title': title, 'content': '...', 'tags': tags}).get_json()
+
+
+def test_tag_filter_and_counts():
+    """Notes filter by tag with AND/OR, and /api/tags counts with grouped queries"""
+    client = app.test_client()
+    work = create(client, 'Standup', ['tagtest-work', 'tagtest-daily'])
+    gym = create(client, 'Gym', ['tagtest-health', 'tagtest-daily', ' tagtest-daily '])
+    plan = create(client, 'Plan', 'tagtest-work,tagtest-q3')
+    assert gym['tags'] == ['tagtest-health', 'tagtest-daily']
+    # The comma-joined copy must fit Note.tags (String(500)) on Postgres too
+    long_note = create(client, 'Long', [f'{i:02d}' + 'x' * 48 for i in range(20)])
+    assert len(','.join(long_note['tags'])) <= 500 and long_note['tags'][0] == '00' + 'x' * 48
+    client.delete(f"/api/notes/{long_note['id']}")
+
+    def titles(query):
+        return sorted(note['title'] for note in client.get(f'/api/notes?{query}').get_json())
+
+    assert titles('tag=tagtest-daily') == ['Gym', 'Standup']
+    assert titles('tag=tagtest-daily&tag=tagtest-work') == ['Standup']
+    assert titles('tag=tagtest-daily,tagtest-q3&match=any') == ['Gym', 'Plan', 'Standup']
+    page = client.get('/api/notes?tag=tagtest-work&limit=1').get_json()
+    assert len(page['notes']) == 1 and page['next_cursor']
+    assert client.get('/api/notes?tag=x&match=some').status_code == 400
+
+    counts = {t['name']: t['count'] for t in client.get('/api/tags').get_json()}
+    assert counts['tagtest-daily'] == 2 and counts['tagtest-work'] == 2 and counts['tagtest-q3'] == 1
+    facets = client.get('/api/tags?tag=tagtest-work').get_json()
+    assert {t['name']: t['count'] for t in facets} == {'tagtest-work': 2, 'tagtest-daily': 1, 'tagtest-q3': 1}
+
+    client.put(f"/api/notes/{plan['id']}", json={'tags': ['tagtest-q4']})
+    client.delete(f"/api/notes/{work['id']}")
+    counts = {t['name']: t['count'] for t in client.get('/api/tags').get_json()}
+    assert 'tagtest-work' not in counts and counts['tagtest-daily'] == 1 and counts['tagtest-q4'] == 1
+
+
+def test_migrate_comma_tags():
+    """Notes that only have the legacy comma-joined column get link rows"""
+    with app.app_context():
+        db.session.add(Note(title='Legacy', content='...', tags='legacy-a, legacy-b,,legacy-a'))
+        db.session.commit()
+        assert migrate_comma_tags(db.session, Note) == 1
+        assert migrate_comma_tags(db.session, Note) == 0
+        counts = {t['name']: t['count'] for t in tag_counts(db.session)}
+        assert counts['legacy-a'] == 1 and counts['legacy-b'] == 1
+
+
+if __name__ == "__main__":
+    test_tag_filter_and_counts()
+    test_migrate_comma_tags()
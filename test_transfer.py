@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import gzip
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import event
+from src.main import app
+from src.models.note import Note, db
+from src.transfer import iter_export
+
+
+def exported(client, **params):
+    response = client.get('/api/notes/export', query_string=params)
+    assert response.status_code == 200 and response.is_streamed
+    body = response.get_data()
+    if params.get('gzip'):
+        assert response.mimetype == 'application/gzip'
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_export_import_round_trip():
+    """The NDJSON export re-imports as the same notes, tags and timestamps"""
+    client = app.test_client()
+    marker = 'transfer-round-trip'
+    for i in range(25):
+        client.post('/api/notes', json={'title': f'{marker} {i}', 'content': f'Body {i} 😀', 'tags': ['transfer', f't{i % 3}']})
+
+    notes = [n for n in exported(client) if n['title'].startswith(marker)]
+    assert len(notes) == 25 and notes[0]['tags'] == ['transfer', 't0']
+    assert [n['id'] for n in exported(client, gzip=1)] == [n['id'] for n in exported(client)]
+
+    with app.app_context():
+        chunks = list(iter_export(db.session, batch_size=10))
+        assert len(chunks) >= 3 and all(chunk.endswith(b'\n') for chunk in chunks)
+
+    lines = [json.dumps(n) for n in notes] + ['', 'not json', json.dumps({'title': '', 'content': 'x'})]
+    body = gzip.compress('\n'.join(lines).encode('utf-8'))
+    result = client.post('/api/notes/import', data=body, headers={'Content-Encoding': 'gzip'}).get_json()
+    assert result['imported'] == 25 and result['skipped'] == 2
+    assert [e['line'] for e in result['errors']] == [27, 28]
+
+    copies = [n for n in exported(client) if n['title'].startswith(marker)][25:]
+    assert [(c['title'], c['content'], c['tags'], c['created_at']) for c in copies] == \
+        [(n['title'], n['content'], n['tags'], n['created_at']) for n in notes]
+    assert {c['id'] for c in copies}.isdisjoint(n['id'] for n in notes)
+    tagged = client.get('/api/notes?tag=t1&limit=200').get_json()['notes']
+    assert sum(1 for n in tagged if n['title'].startswith(marker)) == 2 * 8
+
+    # Existing ids can't be kept
+    conflict = client.post('/api/notes/import?keep_ids=1', data=json.dumps(notes[0]))
+    assert conflict.status_code == 409 and conflict.get_json()['imported'] == 0
+
+
+def test_cli_export_import():
+    """The export-notes / import-notes commands stream files, gzipped by suffix"""
+    runner = app.test_cli_runner()
+    client = app.test_client()
+    client.post('/api/notes', json={'title': 'transfer-cli', 'content': 'from the CLI'})
+    path = os.path.join(tempfile.mkdtemp(), 'notes.ndjson.gz')
+
+    result = runner.invoke(args=['export-notes', path])
+    assert result.exit_code == 0, result.output
+    with gzip.open(path) as f:
+        lines = f.read().splitlines()
+    with app.app_context():
+        assert len(lines) == db.session.query(Note).count()
+
+    result = runner.invoke(args=['import-notes', path, '--batch-size', '7'])
+    assert result.exit_code == 0, result.output
+    assert f'Imported {len(lines)} notes, skipped 0 lines' in result.output
+    with app.app_context():
+        assert db.session.query(Note).filter_by(title='transfer-cli').count() == 2
+
+
+def test_import_uses_multi_row_inserts():
+    """A batch is one INSERT, and tags follow their notes even with kept, unsorted ids"""
+    client = app.test_client()
+    with app.app_context():
+        top = db.session.query(db.func.max(Note.id)).scalar() or 0
+    records = [{'id': top + 1000 - i, 'title': f'transfer-kept {i}', 'content': f'Body {i}', 'tags': [f'k{i}']}
+               for i in range(100)]
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('INSERT INTO NOTE '):
+            inserts.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_inserts)
+    try:
+        result = client.post('/api/notes/import?keep_ids=1',
+                             data='\n'.join(json.dumps(r) for r in records)).get_json()
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', count_inserts)
+
+    assert result['imported'] == 100 and len(inserts) == 1
+    for record in (records[0], records[57], records[-1]):
+        note = client.get(f"/api/notes/{record['id']}").get_json()
+        assert (note['title'], note['tags']) == (record['title'], record['tags'])
+
+
+if __name__ == "__main__":
+    test_export_import_round_trip()
+    test_cli_export_import()
+    test_import_uses_multi_row_inserts()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from src.main import app
+from src.models.note import Note, db
+from src import metrics
+import src.llm as llm
+
+
+def reply(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_bulk_translate():
+    """Every id gets a status; successes are committed together, without an N+1"""
+    def fake_completion(*args, **kwargs):
+        text = kwargs['messages'][-1]['content'].split(': ', 1)[-1]
+        if 'untranslatable' in text:
+            raise Exception('LLM API call failed: 400')
+        return reply(text.upper())
+
+    client = app.test_client()
+    ids = [client.post('/api/notes', json={'title': f'note {i}', 'content': f'body {i}'}).get_json()['id']
+           for i in range(metrics.N_PLUS_ONE_THRESHOLD)]
+    broken = client.post('/api/notes', json={'title': 'untranslatable', 'content': 'x'}).get_json()['id']
+    missing = max(ids + [broken]) + 1000
+
+    original = (llm.token, llm.client_manager.chat_completion, llm.cache_enabled)
+    llm.token, llm.client_manager.chat_completion, llm.cache_enabled = 'test-token', fake_completion, False
+    n_plus_one = metrics.db_n_plus_one.value('/api/notes/translate')
+    try:
+        response = client.post('/api/notes/translate', json={
+            'note_ids': ids + [broken, missing, ids[0]], 'target_language': 'Shouting'})
+        body = response.get_json()
+    finally:
+        llm.token, llm.client_manager.chat_completion, llm.cache_enabled = original
+
+    assert response.status_code == 200
+    assert body['succeeded'] == len(ids) and body['failed'] == 2
+    # Request order, duplicates dropped
+    assert [r['id'] for r in body['results']] == ids + [broken, missing]
+    assert body['results'][0]['note']['title'] == 'NOTE 0'
+    assert body['results'][0]['note']['content'] == 'BODY 0'
+    assert body['results'][-2]['status'] == 'error' and '400' in body['results'][-2]['error']
+    assert body['results'][-1] == {'id': missing, 'status': 'error', 'error': 'Note not found'}
+    assert metrics.db_n_plus_one.value('/api/notes/translate') == n_plus_one
+
+    # Successes are stored; the failed note is left alone
+    assert client.get(f'/api/notes/{ids[-1]}').get_json()['content'] == f'BODY {len(ids) - 1}'
+    assert client.get(f'/api/notes/{broken}').get_json()['title'] == 'untranslatable'
+    with app.app_context():
+        assert db.session.get(Note, ids[0]).title == 'NOTE 0'
+
+
+def test_bulk_translate_validation():
+    client = app.test_client()
+    assert client.post('/api/notes/translate', json={'note_ids': [1]}).status_code == 400
+    assert client.post('/api/notes/translate', json={'note_ids': [], 'target_language': 'French'}).status_code == 400
+    assert client.post('/api/notes/translate', json={'note_ids': ['1'], 'target_language': 'French'}).status_code == 400
+    assert client.post('/api/notes/translate', json=['target_language']).status_code == 400
+
+
+if __name__ == "__main__":
+    test_bulk_translate()
+    test_bulk_translate_validation()